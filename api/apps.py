@@ -1,5 +1,29 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # Importing the resident models registers their role actions
+        from .models import residents  # NOQA
+
+        from .sharding import replicate_user
+        post_save.connect(
+            replicate_user,
+            sender=settings.AUTH_USER_MODEL,
+            dispatch_uid='api.sharding.replicate_user'
+        )
+
+        # Players connected over WebSockets are sent the changes to their
+        # game, wherever they are made
+        from .consumers import PUBLIC_MODELS, schedule_publish
+        for model in PUBLIC_MODELS:
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    schedule_publish,
+                    sender=model,
+                    dispatch_uid='api.consumers.schedule_publish'
+                )
@@ -0,0 +1,149 @@
+"""
+Coroutine variants of read-only API views, served by the ASGI handler in
+`werewolf.asgi_handler`. Authentication, permissions and serialization are
+left to the regular views, which are run on the handler's thread pool.
+"""
+import asyncio
+import logging
+import weakref
+
+from urllib.parse import parse_qs
+
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Max
+
+from .models import Turn
+from .sharding import group_by_shard
+
+
+logger = logging.getLogger(__name__)
+
+# Longest a client may wait for new turns, in seconds
+MAX_WAIT = 30
+
+# How often waiting clients check for new turns, in seconds
+POLL_INTERVAL = 1.0
+
+
+def latest_turn_numbers(game_ids):
+    """
+    The number of the latest turn of each of the games, with one query per
+    shard. The thread's connection is kept between calls unless it failed.
+    """
+    latest = {}
+    try:
+        for alias, ids in group_by_shard(game_ids).items():
+            latest.update(
+                Turn.objects.using(alias).filter(game_id__in=ids).values_list(
+                    'game_id'
+                ).annotate(latest=Max('number')).order_by()
+            )
+    except DatabaseError:
+        close_old_connections()
+        raise
+
+    return latest
+
+
+class TurnWatcher(object):
+    """
+    Waits for new turns on behalf of every waiting client of a handler. A
+    single loop polls the games of all of them at once, and only runs while
+    someone is waiting.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.waiting = {}
+        self.task = None
+
+    async def wait(self, game_id, since_number, timeout):
+        """
+        Whether the game gets a turn after `since_number` within `timeout`
+        seconds
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self.waiting[future] = (int(game_id), since_number)
+
+        if self.task is None:
+            self.task = loop.create_task(self.run())
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting.pop(future, None)
+
+    async def run(self):
+        try:
+            while self.waiting:
+                await asyncio.sleep(POLL_INTERVAL)
+                await self.poll()
+        finally:
+            self.task = None
+
+    async def poll(self):
+        waiting = dict(self.waiting)
+        if not waiting:
+            return
+
+        try:
+            latest = await self.handler.run_in_thread(
+                latest_turn_numbers,
+                set(game_id for game_id, since_number in waiting.values())
+            )
+        except DatabaseError:
+            logger.exception('Unable to check for new turns')
+            return
+
+        for future, (game_id, since_number) in waiting.items():
+            if latest.get(game_id, 0) > since_number and not future.done():
+                future.set_result(True)
+
+
+_watchers = weakref.WeakKeyDictionary()
+
+
+def get_watcher(handler):
+    if handler not in _watchers:
+        _watchers[handler] = TurnWatcher(handler)
+    return _watchers[handler]
+
+
+async def turn_history(handler, environ, game_id):
+    """
+    Turn history that long-polls with `?wait=<seconds>`: when there are no
+    turns after `since_number` yet, the response is held until one shows up
+    or the wait runs out. Waiting clients don't hold on to a thread.
+    """
+    query = parse_qs(environ['QUERY_STRING'])
+    try:
+        wait = min(float(query.get('wait', ['0'])[0]), MAX_WAIT)
+        since_number = int(query.get('since_number', ['0'])[0])
+    except ValueError:
+        wait = 0
+
+    has_turns = False
+    if wait > 0:
+        latest = await handler.run_in_thread(
+            latest_turn_numbers, [game_id]
+        )
+        has_turns = latest.get(int(game_id), 0) > since_number
+
+    # The regular view still checks whether the client may see the turns
+    status, headers, body = await handler.call_wsgi(environ)
+
+    if wait <= 0 or has_turns or not status.startswith('200'):
+        return status, headers, body
+
+    if await get_watcher(handler).wait(game_id, since_number, wait):
+        return await handler.call_wsgi(environ)
+
+    return status, headers, body
+
+
+routes = [
+    ('GET', r'^/api/games/(?P<game_id>[0-9]+)/turns/$', turn_history),
+]
@@ -0,0 +1,433 @@
+"""
+WebSocket consumers, served by the ASGI handler in `werewolf.asgi_handler`.
+
+Players connect to `/ws/games/<id>/` with their session cookie, from a page
+served by one of the `WEBSOCKET_ALLOWED_ORIGINS`, and send JSON
+commands (votes, resident actions, ending the turn) that are run through the
+same model methods as the REST API. Whenever a change to a game commits,
+whether it came from a command, the REST API or the phase scheduler, the
+game's public state is serialized once and only the top-level fields that
+changed are sent to every player connected to the game. Changes are only
+published by processes that share the channel layer with the connections.
+
+Werewolves also join their team's private group when they connect, which
+carries their teammates and the messages they send each other. The public
+state never depends on who is watching.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from importlib import import_module
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections, connections, transaction
+from django.http import Http404, HttpRequest, parse_cookie
+from django.http.request import split_domain_port, validate_host
+
+from rest_framework import status
+
+from .exceptions import APIException, APIExceptionCode
+from .models import Game, Hut, Player, Resident, Teams, Turn, Vote
+from .presence import get_tracker
+from .serializers import GameSerializer, ResidentSerializer, TeamSerializer
+from .views import GameViewSet, get_sharded_game
+
+from werewolf.channels import get_channel_layer
+
+
+logger = logging.getLogger(__name__)
+
+# Close code sent to clients that aren't participants of the game
+CLOSE_FORBIDDEN = 4003
+
+# The last public state sent to each game's group, by game id. States are
+# computed and sent under the game's lock, so that a state read after
+# another is never sent before it.
+_states = {}
+_locks = {}
+
+
+def is_allowed_origin(origin):
+    """
+    Whether pages served from `origin` may connect. Browsers always send
+    the page's origin, so connections without one are refused as well.
+    """
+    if not origin:
+        return False
+
+    allowed = getattr(settings, 'WEBSOCKET_ALLOWED_ORIGINS', None)
+    if not allowed:
+        allowed = settings.ALLOWED_HOSTS
+        if settings.DEBUG and not allowed:
+            allowed = ['localhost', '127.0.0.1', '[::1]']
+
+    domain, port = split_domain_port(urlparse(origin).netloc)
+    return bool(domain) and validate_host(domain, allowed)
+
+
+def load_game(game_id):
+    game = get_sharded_game(game_id)
+
+    queryset = GameViewSet().prefetch_fields(
+        game.__class__.objects.using(game._state.db),
+        GameSerializer.Meta.fields
+    )
+    return queryset.get(pk=game.pk)
+
+
+def get_public_state(game_id):
+    # Public game data never includes teams, so the same data can be sent to
+    # everyone; werewolves get their team over their team's group instead
+    return GameSerializer(load_game(game_id)).data
+
+
+def get_team(player):
+    return TeamSerializer({
+        'team': player.team,
+        'members': player.get_teammates(),
+    }).data
+
+
+def diff_state(old, new):
+    return dict(
+        (key, value) for key, value in new.items()
+        if old is None or old.get(key) != value
+    )
+
+
+def get_group(game_id):
+    return 'game-%d' % game_id
+
+
+def get_lock(game_id):
+    return _locks.setdefault(game_id, threading.Lock())
+
+
+def reset_state(game_id):
+    """
+    The public state of the game, which changes are published against from
+    now on
+    """
+    with get_lock(game_id):
+        state = get_public_state(game_id)
+        _states[game_id] = state
+
+    return state
+
+
+def publish_state(game_id):
+    """
+    Send the changes to the game's public state since it was last sent to
+    the players connected to it
+    """
+    layer = get_channel_layer()
+    group = get_group(game_id)
+
+    with get_lock(game_id):
+        if not layer.group_size(group):
+            return
+
+        state = get_public_state(game_id)
+        changes = diff_state(_states.get(game_id), state)
+        _states[game_id] = state
+
+        if changes:
+            layer.group_send(group, {'type': 'state.diff', 'changes': changes})
+
+
+# The game of each model's rows that are part of the public state
+PUBLIC_MODELS = {
+    Game: lambda game: game.pk,
+    Player: lambda player: player.game_id,
+    Resident: lambda resident: resident.game_id,
+    Hut: lambda hut: hut.game_id,
+    Turn: lambda turn: turn.game_id,
+    Vote: lambda vote: vote.hut.game_id,
+}
+
+
+def schedule_publish(sender, instance, using, raw=False, **kwargs):
+    """
+    Publish the public state of the instance's game once the current
+    transaction commits, unless no player is connected to the game. The
+    state is only published once per transaction.
+    """
+    if raw:
+        return
+
+    game_id = PUBLIC_MODELS[sender](instance)
+    if game_id is None:
+        return
+
+    if not get_channel_layer().group_size(get_group(game_id)):
+        return
+
+    connection = connections[using]
+    if any(getattr(func, 'game_id', None) == game_id
+           for sids, func in connection.run_on_commit):
+        return
+
+    def publish():
+        try:
+            publish_state(game_id)
+        except Http404:
+            # The game was deleted
+            pass
+        except Exception:
+            # The change itself is already committed
+            logger.exception('Unable to publish game %d', game_id)
+
+    publish.game_id = game_id
+    transaction.on_commit(publish, using=using)
+
+
+class GameConsumer(object):
+    def __init__(self, handler, scope, receive, send, game_id):
+        self.handler = handler
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.game_id = int(game_id)
+
+        self.group = get_group(self.game_id)
+        self.team_group = None
+        self.layer = get_channel_layer()
+        self.queue = asyncio.Queue()
+
+    async def run(self):
+        message = await self.receive()
+        if message['type'] != 'websocket.connect':
+            return
+
+        # Session cookies are sent whichever page opens the connection, so
+        # other sites must not get to act on behalf of their visitors
+        if not is_allowed_origin(self.get_header(b'origin')):
+            self.player = None
+        else:
+            self.player = await self.run_in_thread(self.authenticate)
+
+        if self.player is None:
+            await self.send({
+                'type': 'websocket.close', 'code': CLOSE_FORBIDDEN
+            })
+            return
+
+        await self.send({'type': 'websocket.accept'})
+        self.heartbeat()
+
+        self.layer.group_add(self.group, self.queue)
+        try:
+            state = await self.run_in_thread(reset_state, self.game_id)
+            await self.send_json({'type': 'state', 'state': state})
+
+            # Teams are handed out when the game starts, so players have to
+            # reconnect to join theirs
+            if self.player.team == Teams.WEREWOLF.value:
+                team = await self.run_in_thread(get_team, self.player)
+                self.team_group = '%s-%s' % (self.group, self.player.team)
+                self.layer.group_add(self.team_group, self.queue)
+                await self.send_json(dict(team, type='team'))
+
+            tasks = [
+                asyncio.ensure_future(self.read()),
+                asyncio.ensure_future(self.write()),
+            ]
+            done, pending = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in pending:
+                task.cancel()
+        finally:
+            self.layer.group_discard(self.group, self.queue)
+            if self.team_group is not None:
+                self.layer.group_discard(self.team_group, self.queue)
+            if not self.layer.group_size(self.group):
+                _states.pop(self.game_id, None)
+                _locks.pop(self.game_id, None)
+
+    async def run_in_thread(self, func, *args):
+        def run():
+            close_old_connections()
+            try:
+                return func(*args)
+            finally:
+                close_old_connections()
+
+        return await self.handler.run_in_thread(run)
+
+    async def send_json(self, message):
+        await self.send({'type': 'websocket.send', 'text': json.dumps(
+            message, cls=self.layer.encoder_class
+        )})
+
+    def get_header(self, name):
+        for header, value in self.scope.get('headers', []):
+            if header == name:
+                return value.decode('latin-1')
+        return None
+
+    def authenticate(self):
+        """
+        The connecting user's player in the game, or `None` if they aren't
+        logged in or aren't a participant
+        """
+        cookies = {}
+        for name, value in self.scope.get('headers', []):
+            if name == b'cookie':
+                cookies.update(parse_cookie(value.decode('latin-1')))
+
+        engine = import_module(settings.SESSION_ENGINE)
+
+        request = HttpRequest()
+        request.session = engine.SessionStore(
+            cookies.get(settings.SESSION_COOKIE_NAME)
+        )
+        user = get_user(request)
+        if not user.is_authenticated():
+            return None
+
+        try:
+            player = get_sharded_game(self.game_id).get_player(user.username)
+        except (Http404, Player.DoesNotExist):
+            return None
+
+        if player.has_left():
+            return None
+
+        return player
+
+    async def read(self):
+        while True:
+            message = await self.receive()
+            if message['type'] == 'websocket.disconnect':
+                return
+
+            if message['type'] != 'websocket.receive':
+                continue
+
+            # Any message keeps the player online
+            self.heartbeat()
+
+            try:
+                command = json.loads(message.get('text') or '')
+            except ValueError:
+                command = None
+
+            if not isinstance(command, dict):
+                await self.send_json({
+                    'type': 'error', 'detail': 'Commands must be JSON objects'
+                })
+                continue
+
+            if command.get('type') == 'heartbeat':
+                reply = {'type': 'ok'}
+            elif command.get('type') == 'team_message':
+                reply = self.team_message(command)
+            else:
+                # Changes are published to the game's group as they commit
+                reply = await self.run_in_thread(self.handle, command)
+
+            if 'id' in command:
+                reply['id'] = command['id']
+            await self.send_json(reply)
+
+    async def write(self):
+        while True:
+            frame = await self.queue.get()
+            await self.send({'type': 'websocket.send', 'text': frame})
+
+    def heartbeat(self):
+        get_tracker().heartbeat(self.game_id, self.player.pk)
+
+    def team_message(self, command):
+        if self.team_group is None:
+            return {
+                'type': 'error',
+                'detail': 'Only werewolves have a team channel'
+            }
+
+        text = command.get('text')
+        if not isinstance(text, str) or not text:
+            return {'type': 'error', 'detail': 'Invalid command'}
+
+        self.layer.group_send(self.team_group, {
+            'type': 'team.message', 'player': self.player.id, 'text': text
+        })
+        return {'type': 'ok'}
+
+    def handle(self, command):
+        """
+        Run `command` and return the reply to the sender
+        """
+        handler = getattr(self, 'command_%s' % command.get('type'), None)
+        if handler is None:
+            return {'type': 'error', 'detail': 'Unknown command'}
+
+        game = get_sharded_game(self.game_id)
+        # The player may have been updated since connecting
+        player = game.players.get(pk=self.player.pk)
+
+        try:
+            return handler(game, player, command)
+        except APIException as e:
+            return {
+                'type': 'error', 'code': e.code.value, 'detail': e.message
+            }
+        except (Hut.DoesNotExist, Player.DoesNotExist,
+                Resident.DoesNotExist, KeyError, ValueError, TypeError):
+            return {'type': 'error', 'detail': 'Invalid command'}
+
+    def get_active_turn(self, game):
+        turn = game.active_turn
+        if turn is None:
+            raise APIException(
+                'The game has not started yet',
+                APIExceptionCode.GAME_NOT_YET_STARTED,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+        return turn
+
+    def command_vote(self, game, player, command):
+        hut = game.huts.get(pk=command['hut'])
+        self.get_active_turn(game).cast_vote(player, hut)
+
+        return {'type': 'ok'}
+
+    def command_action(self, game, player, command):
+        resident = game.residents.get(pk=command['resident'])
+
+        targets = {}
+        if 'target_hut' in command:
+            targets['target_hut'] = game.huts.get(pk=command['target_hut'])
+        if 'target_player' in command:
+            targets['target_player'] = game.players.get(
+                pk=command['target_player']
+            )
+
+        result = resident.action(player, **targets)
+
+        # Results (e.g. what a seer saw) are only for the acting player
+        return {
+            'type': 'ok',
+            'result': ResidentSerializer(result).data if result else None
+        }
+
+    def command_end_turn(self, game, player, command):
+        if not player.is_owner:
+            return {
+                'type': 'error',
+                'detail': "Only the game's owner may end the turn"
+            }
+
+        self.get_active_turn(game).end()
+
+        return {'type': 'ok'}
+
+
+routes = [
+    (r'^/ws/games/(?P<game_id>[0-9]+)/$', GameConsumer),
+]
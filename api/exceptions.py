@@ -16,9 +16,14 @@ class APIExceptionCode(Enum):
     PLAYER_ALREADY_LEFT = 2001
 
     TURN_ALREADY_ENDED = 3000
+    TURN_INVALID_PHASE = 3001
 
     ACTION_INVALID_ACTOR = 4000
     ACTION_INVALID_TARGET = 4001
+    ACTION_ALREADY_QUEUED = 4002
+
+    VOTE_INVALID_VOTER = 5000
+    VOTE_INVALID_TARGET = 5001
 
 
 class APIException(RestAPIException):
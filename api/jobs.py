@@ -0,0 +1,189 @@
+"""
+A lightweight database-backed job queue for work that doesn't need to
+happen while the client waits (notifications, stats, archiving, ...).
+
+Jobs are enqueued with `enqueue`, which only writes the job once the
+surrounding transaction commits, and are picked up by the workers started
+with the `run_job_worker` management command.
+"""
+import json
+import logging
+import threading
+import time
+
+from datetime import datetime, timedelta
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+
+from .models.job import Job, JobStatus
+
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def register(name):
+    def decorator(func):
+        _handlers[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name, using=None, **payload):
+    """
+    Queue a job to run after the current transaction on the `using`
+    database commits. Outside of a transaction the job is queued right away.
+    """
+    transaction.on_commit(
+        lambda: Job.objects.create(name=name, payload=json.dumps(payload)),
+        using=using
+    )
+
+
+def enqueue_many(name, payloads, using=None):
+    """
+    Queue one job per payload with a single INSERT, after the current
+    transaction on the `using` database commits
+    """
+    jobs = [Job(name=name, payload=json.dumps(p)) for p in payloads]
+    if not jobs:
+        return
+
+    transaction.on_commit(
+        lambda: Job.objects.bulk_create(jobs), using=using
+    )
+
+
+class JobWorker(object):
+    def __init__(self, poll_interval=1.0, batch_size=10,
+                 visibility_timeout=300):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        # Seconds after which a running job is assumed to belong to a worker
+        # that died, and is handed to another worker if it has attempts left
+        self.visibility_timeout = visibility_timeout
+        self._stopped = threading.Event()
+
+    def claimable(self, now):
+        stale = now - timedelta(seconds=self.visibility_timeout)
+
+        return Q(status=JobStatus.PENDING.value) | Q(
+            status=JobStatus.RUNNING.value,
+            time_started__lt=stale,
+            attempts__lt=Job.MAX_ATTEMPTS
+        )
+
+    def claim(self):
+        """
+        Claim the oldest pending or abandoned job. Claiming is a conditional
+        UPDATE so concurrent workers never run the same job twice. Attempts
+        are counted when a job is claimed, so jobs whose worker died count
+        them too.
+        """
+        now = datetime.now()
+        claimable = self.claimable(now)
+
+        candidates = Job.objects.filter(claimable).order_by(
+            'id'
+        ).values_list('id', flat=True)[:self.batch_size]
+
+        for job_id in candidates:
+            claimed = Job.objects.filter(claimable, id=job_id).update(
+                status=JobStatus.RUNNING.value,
+                attempts=F('attempts') + 1,
+                time_started=now
+            )
+
+            if claimed:
+                return Job.objects.get(pk=job_id)
+
+        return None
+
+    def run(self, job):
+        try:
+            handler = _handlers[job.name]
+            handler(**json.loads(job.payload))
+        except Exception as e:
+            logger.exception('Job %d (%s) failed', job.id, job.name)
+
+            job.error = repr(e)
+            if job.attempts >= Job.MAX_ATTEMPTS:
+                job.status = JobStatus.FAILED.value
+                job.time_finished = datetime.now()
+            else:
+                job.status = JobStatus.PENDING.value
+        else:
+            job.error = None
+            job.status = JobStatus.DONE.value
+            job.time_finished = datetime.now()
+
+        job.save()
+
+    def run_once(self):
+        """
+        Run a single pending job, if any. Returns whether a job was run.
+        """
+        job = self.claim()
+        if job is None:
+            return False
+
+        self.run(job)
+        return True
+
+    def run_forever(self):
+        try:
+            while not self._stopped.is_set():
+                close_old_connections()
+
+                if not self.run_once():
+                    self._stopped.wait(self.poll_interval)
+        finally:
+            # Every worker thread has its own database connection
+            connection.close()
+
+    def stop(self):
+        self._stopped.set()
+
+
+class WorkerPool(object):
+    def __init__(self, size=4, **worker_options):
+        self.workers = [JobWorker(**worker_options) for i in range(size)]
+        self.threads = []
+
+    def start(self):
+        for idx, worker in enumerate(self.workers):
+            thread = threading.Thread(
+                target=worker.run_forever, name='job-worker-%d' % idx
+            )
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+        for thread in self.threads:
+            thread.join()
+
+    def wait(self):
+        while any(thread.is_alive() for thread in self.threads):
+            time.sleep(self.workers[0].poll_interval)
+
+
+@register('game_started')
+def record_game_started(game_id):
+    logger.info('Game %d started', game_id)
+
+
+@register('turn_ended')
+def record_turn_ended(turn_id):
+    logger.info('Turn %d ended', turn_id)
+
+
+@register('game_ended')
+def archive_game(game_id):
+    logger.info('Game %d ended', game_id)
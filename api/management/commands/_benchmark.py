@@ -0,0 +1,125 @@
+"""
+Shared helpers for the `bench_*` management commands.
+
+Modules prefixed with an underscore are not picked up by Django as commands.
+"""
+import time
+
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.backends.utils import CursorWrapper, CursorDebugWrapper
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+@contextmanager
+def test_database(verbosity=0):
+    """
+    Run a benchmark against a throwaway test database, the same way the test
+    runner does, so that real game data is never touched
+    """
+    setup_test_environment()
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+@contextmanager
+def no_transactions(*args, **kwargs):
+    """
+    Stand-in for `transaction.atomic` that lets every statement autocommit
+    """
+    yield
+
+
+class CommitCounter(object):
+    """
+    Counts the number of commits issued against a connection.
+
+    Writes executed outside of an atomic block are committed implicitly by
+    the database (autocommit) so those are counted as one commit each, on top
+    of the explicit commits issued when an outermost atomic block exits.
+    """
+
+    def __init__(self, conn=connection):
+        self.connection = conn
+        self.commits = 0
+        self.writes = 0
+
+    def __enter__(self):
+        counter = self
+        conn = self.connection
+
+        def counted(wrapper_class):
+            class CountingCursor(wrapper_class):
+                def execute(self, sql, params=None):
+                    counter.record(sql)
+                    return super(CountingCursor, self).execute(sql, params)
+
+                def executemany(self, sql, param_list):
+                    counter.record(sql)
+                    return super(CountingCursor, self).executemany(
+                        sql, param_list
+                    )
+
+            return lambda cursor: CountingCursor(cursor, conn)
+
+        def commit():
+            counter.commits += 1
+            return self._commit()
+
+        self._commit = conn._commit
+        self._make_cursor = conn.make_cursor
+        self._make_debug_cursor = conn.make_debug_cursor
+
+        conn._commit = commit
+        conn.make_cursor = counted(CursorWrapper)
+        conn.make_debug_cursor = counted(CursorDebugWrapper)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        conn = self.connection
+        conn._commit = self._commit
+        conn.make_cursor = self._make_cursor
+        conn.make_debug_cursor = self._make_debug_cursor
+
+    def record(self, sql):
+        if not sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+            return
+
+        self.writes += 1
+        if not self.connection.in_atomic_block:
+            self.commits += 1
+
+
+class Timer(object):
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def percentile(samples, percent):
+    """
+    Nearest-rank percentile of a list of samples
+    """
+    if not samples:
+        return 0.0
+
+    ordered = sorted(samples)
+    rank = max(0, int(round(percent / 100.0 * len(ordered))) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.test import Client
+
+from werewolf.pool import PooledDatabaseWrapperMixin, close_pools
+
+from ...factories import GameFactory
+
+from ._benchmark import Timer, percentile, test_database
+
+
+MODES = (
+    ('reconnect', {'CONN_MAX_AGE': 0, 'POOL': None}),
+    ('persistent', {'CONN_MAX_AGE': 60, 'POOL': None}),
+    ('pooled', {
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': 10,
+            'MAX_LIFETIME': 600,
+            'HEALTH_CHECK_INTERVAL': 30,
+        },
+    }),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests per second on the game detail endpoint when '
+        'reconnecting on every request, with persistent connections and '
+        'with a connection pool'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Number of requests made per mode'
+        )
+
+    def handle(self, *args, **options):
+        num_requests = options['requests']
+
+        connection = connections[DEFAULT_DB_ALIAS]
+
+        with test_database():
+            name = connection.settings_dict['NAME']
+            if connection.vendor == 'sqlite' and \
+                    connection.is_in_memory_db(name):
+                self.stderr.write(
+                    'Connections to in-memory SQLite databases are never '
+                    'closed, so all modes will perform the same. Use a '
+                    'server database or set a TEST NAME for SQLite.'
+                )
+
+            game = GameFactory.create_start_ready_game()
+            game.start()
+
+            client = Client()
+            client.force_login(game.owner.user)
+            url = '/api/games/%d/' % game.id
+
+            self.stdout.write('%-12s %10s %10s %10s' % (
+                'mode', 'req/s', 'p50 ms', 'p95 ms'
+            ))
+
+            original = dict(connection.settings_dict)
+            try:
+                for mode, db_settings in MODES:
+                    pooled = db_settings['POOL'] is not None
+                    if pooled and not isinstance(
+                            connection, PooledDatabaseWrapperMixin):
+                        self.stdout.write(
+                            '%-12s (needs a werewolf.backends engine)' % mode
+                        )
+                        continue
+
+                    connection.close()
+                    close_pools()
+                    connection.settings_dict.update(db_settings)
+
+                    timings = self.measure(client, url, num_requests)
+                    self.stdout.write('%-12s %10.1f %10.3f %10.3f' % (
+                        mode,
+                        num_requests / sum(timings),
+                        percentile(timings, 50) * 1000,
+                        percentile(timings, 95) * 1000
+                    ))
+            finally:
+                connection.close()
+                close_pools()
+                connection.settings_dict.clear()
+                connection.settings_dict.update(original)
+
+    def measure(self, client, url, num_requests):
+        timings = []
+
+        for i in range(num_requests):
+            with Timer() as timer:
+                client.get(url)
+                # The test client doesn't do this for us like the request
+                # handler does at the end of every request
+                close_old_connections()
+            timings.append(timer.elapsed)
+
+        return timings
@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand
+
+from rest_framework import serializers
+
+from ...factories import GameFactory
+from ...models import Hut, Player, Turn
+from ...serializers import HutSerializer, PlayerSerializer, TurnSerializer
+
+from ._benchmark import Timer, percentile, test_database
+
+
+def load_players():
+    return list(Player.objects.all())
+
+
+def load_huts():
+    return list(Hut.objects.prefetch_related('votes'))
+
+
+def load_turns():
+    return list(Turn.objects.select_related(
+        'game', 'current_player__user', 'grand_inquisitor__user'
+    ))
+
+
+# Teams are hidden from anonymous viewers on the compiled path, so both paths
+# render players without them
+SERIALIZERS = (
+    ('PlayerSerializer', PlayerSerializer, load_players,
+     {'fields': ('id', 'user', 'position')}),
+    ('HutSerializer', HutSerializer, load_huts, {}),
+    ('TurnSerializer', TurnSerializer, load_turns, {}),
+)
+
+
+def render_generic(serializer, instance):
+    # Django REST framework's own field by field rendering
+    return serializers.ModelSerializer.to_representation(serializer, instance)
+
+
+def render_compiled(serializer, instance):
+    return serializer.to_representation(instance)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the per-instance render time of the compiled serializer '
+        'path with the generic Django REST framework one'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--games', type=int, default=20,
+            help='Number of started games to render data from'
+        )
+        parser.add_argument(
+            '--rounds', type=int, default=50,
+            help='Number of times every instance is rendered per path'
+        )
+
+    def handle(self, *args, **options):
+        with test_database():
+            for i in range(options['games']):
+                GameFactory.create_start_ready_game().start()
+
+            self.stdout.write(
+                '%-18s %-10s %10s %10s %10s' % (
+                    'serializer', 'path', 'instances', 'p50 us', 'mean us'
+                )
+            )
+
+            for name, serializer_class, load, kwargs in SERIALIZERS:
+                instances = load()
+
+                for path, render in (('generic', render_generic),
+                                     ('compiled', render_compiled)):
+                    timings = self.measure(
+                        serializer_class(**kwargs), render, instances,
+                        options['rounds']
+                    )
+                    self.stdout.write(
+                        '%-18s %-10s %10d %10.2f %10.2f' % (
+                            name, path, len(instances),
+                            percentile(timings, 50) * 1000000,
+                            sum(timings) / len(timings) * 1000000
+                        )
+                    )
+
+    def measure(self, serializer, render, instances, rounds):
+        timings = []
+
+        for i in range(rounds):
+            with Timer() as timer:
+                for instance in instances:
+                    render(serializer, instance)
+
+            timings.append(timer.elapsed / len(instances))
+
+        return timings
@@ -0,0 +1,110 @@
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand
+
+from ...factories import GameFactory
+from ...models import Roles
+from ...models.residents import Seer
+
+from ._benchmark import (
+    CommitCounter, Timer, no_transactions, percentile, test_database
+)
+
+
+def prepare_start():
+    game = GameFactory.create_start_ready_game()
+    return game.start
+
+
+def prepare_add_resident():
+    game = GameFactory.create_game()
+    return lambda: game.add_resident(Roles.VILLAGER)
+
+
+def prepare_turn_end():
+    game = GameFactory.create_start_ready_game()
+    game.start()
+    return game.active_turn.end
+
+
+def prepare_seer_action():
+    game = GameFactory.create_start_ready_game()
+    game.start()
+    game.add_resident(Roles.SEER)
+
+    seer = Seer.objects.get(game=game, role__role=Roles.SEER.value)
+    hut = game.huts.filter(is_visited=False).first()
+    player = GameFactory.start_night(game).current_player
+
+    return lambda: seer.action(player=player, target_hut=hut)
+
+
+OPERATIONS = (
+    ('Game.start', prepare_start),
+    ('Game.add_resident', prepare_add_resident),
+    ('Turn.end', prepare_turn_end),
+    ('Seer.action', prepare_seer_action),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the number of commits and the latency of multi-write game '
+        'operations when run in autocommit mode and in a single transaction'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help='Number of times each operation is run per mode'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        with test_database():
+            self.stdout.write(
+                '%-20s %-12s %8s %10s %10s %10s' % (
+                    'operation', 'mode', 'writes', 'commits', 'p50 ms',
+                    'mean ms'
+                )
+            )
+
+            for name, prepare in OPERATIONS:
+                for mode in ('autocommit', 'atomic'):
+                    writes, commits, timings = self.measure(
+                        prepare, iterations, autocommit=mode == 'autocommit'
+                    )
+                    self.stdout.write(
+                        '%-20s %-12s %8.1f %10.1f %10.3f %10.3f' % (
+                            name, mode,
+                            writes / iterations,
+                            commits / iterations,
+                            percentile(timings, 50) * 1000,
+                            sum(timings) / iterations * 1000
+                        )
+                    )
+
+    def measure(self, prepare, iterations, autocommit):
+        writes = commits = 0
+        timings = []
+
+        for i in range(iterations):
+            operation = prepare()
+
+            with ExitStack() as stack:
+                if autocommit:
+                    stack.enter_context(
+                        patch('django.db.transaction.atomic', no_transactions)
+                    )
+
+                counter = stack.enter_context(CommitCounter())
+                timer = stack.enter_context(Timer())
+                operation()
+
+            writes += counter.writes
+            commits += counter.commits
+            timings.append(timer.elapsed)
+
+        return writes, commits, timings
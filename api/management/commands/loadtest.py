@@ -0,0 +1,253 @@
+import asyncio
+import itertools
+import random
+import time
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+from ...models import Game, Roles
+
+from ._benchmark import percentile, test_database
+
+
+class LoadTest(object):
+    """
+    Simulates players going through whole games against the real API URLs.
+
+    Every simulated player is an asyncio task with its own test client.
+    Django itself is synchronous, so requests are handed to a thread pool
+    and `threads` bounds how many are served at once, much like the worker
+    threads of an application server.
+    """
+
+    def __init__(self, loop, threads, polls, think_time, ramp_up):
+        self.loop = loop
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.polls = polls
+        self.think_time = think_time
+        self.ramp_up = ramp_up
+
+        self.user_ids = itertools.count()
+        self.latencies = defaultdict(list)
+        self.service_times = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, endpoint, method, path, **kwargs):
+        """
+        Make a request and record its latency under `endpoint`. Returns the
+        response, or `None` if the request failed.
+
+        Latency is what the player sees, including the time spent waiting
+        for a free thread. The time spent actually serving the request is
+        recorded separately.
+        """
+        request = partial(getattr(client, method), path, **kwargs)
+
+        def serve():
+            start = time.perf_counter()
+            try:
+                return request()
+            finally:
+                self.service_times[endpoint].append(
+                    time.perf_counter() - start
+                )
+
+        start = time.perf_counter()
+        try:
+            response = await self.loop.run_in_executor(self.executor, serve)
+        except Exception:
+            response = None
+        elapsed = time.perf_counter() - start
+
+        self.latencies[endpoint].append(elapsed)
+
+        if response is None or response.status_code >= 400:
+            self.errors[endpoint] += 1
+            return None
+
+        return response
+
+    async def login(self):
+        username = 'loadtest_%d' % next(self.user_ids)
+
+        def create_client():
+            client = Client()
+            client.force_login(User.objects.create(username=username))
+            return client
+
+        try:
+            return await self.loop.run_in_executor(
+                self.executor, create_client
+            )
+        except Exception:
+            self.errors['login'] += 1
+            return None
+
+    async def play_game(self, size):
+        await asyncio.sleep(random.uniform(0, self.ramp_up))
+
+        clients = await asyncio.gather(*[self.login() for i in range(size)])
+        if None in clients:
+            return
+
+        owner = clients[0]
+
+        response = await self.call(
+            owner, 'POST /api/games/', 'post', '/api/games/'
+        )
+        if response is None:
+            return
+
+        game_url = '/api/games/%d/' % response.json()['id']
+
+        await asyncio.gather(*[
+            self.call(
+                client, 'POST /api/games/{id}/join/', 'post',
+                game_url + 'join/'
+            ) for client in clients[1:]
+        ])
+
+        for i in range(Game.RESIDENT_COUNT):
+            await self.call(
+                owner, 'POST /api/games/{id}/residents/', 'post',
+                game_url + 'residents/', data={'role': Roles.VILLAGER.value}
+            )
+
+        response = await self.call(
+            owner, 'POST /api/games/{id}/start/', 'post', game_url + 'start/'
+        )
+        if response is None:
+            return
+
+        await asyncio.gather(*[
+            self.poll(client, game_url) for client in clients
+        ])
+
+    async def poll(self, client, game_url):
+        since_number = 0
+
+        for i in range(self.polls):
+            await asyncio.sleep(random.uniform(0, 2 * self.think_time))
+
+            await self.call(
+                client, 'GET /api/games/{id}/me/', 'get', game_url + 'me/'
+            )
+
+            response = await self.call(
+                client, 'GET /api/games/{id}/turns/', 'get',
+                game_url + 'turns/', data={'since_number': since_number}
+            )
+            if response is not None and response.json():
+                since_number = response.json()[-1]['number']
+
+    def run(self, games, size):
+        tasks = [self.play_game(size) for i in range(games)]
+
+        start = time.perf_counter()
+        self.loop.run_until_complete(asyncio.gather(*tasks))
+        elapsed = time.perf_counter() - start
+
+        self.executor.shutdown(wait=True)
+
+        return elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate concurrent players creating, joining, starting and polling '
+        'games, and report the latency and throughput of every endpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=1000,
+            help='Number of simulated players'
+        )
+        parser.add_argument(
+            '--players-per-game', type=int, default=Game.MIN_PLAYERS,
+            help='Number of players in every game'
+        )
+        parser.add_argument(
+            '--polls', type=int, default=5,
+            help='Number of times every player polls their game once started'
+        )
+        parser.add_argument(
+            '--think-time', type=float, default=0.5,
+            help='Mean number of seconds players wait between polls'
+        )
+        parser.add_argument(
+            '--ramp-up', type=float, default=5.0,
+            help='Number of seconds over which games are started'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Number of requests served at once'
+        )
+
+    def handle(self, *args, **options):
+        size = options['players_per_game']
+        if not Game.MIN_PLAYERS <= size <= Game.MAX_PLAYERS:
+            self.stderr.write(
+                'Games must have between %d and %d players' % (
+                    Game.MIN_PLAYERS, Game.MAX_PLAYERS
+                )
+            )
+            return
+
+        games = max(1, options['users'] // size)
+
+        threads = options['threads']
+        if connection.vendor == 'sqlite' and threads > 1:
+            # SQLite locks whole tables on writes
+            self.stderr.write(
+                'SQLite does not support concurrent writes, using 1 thread'
+            )
+            threads = 1
+
+        with test_database():
+            load_test = LoadTest(
+                asyncio.get_event_loop(),
+                threads=threads,
+                polls=options['polls'],
+                think_time=options['think_time'],
+                ramp_up=options['ramp_up']
+            )
+            elapsed = load_test.run(games, size)
+
+        self.report(load_test, games * size, elapsed)
+
+    def report(self, load_test, users, elapsed):
+        self.stdout.write(
+            '%d simulated players in %.1fs\n' % (users, elapsed)
+        )
+
+        if load_test.errors['login']:
+            self.stdout.write(
+                '%d players failed to log in\n' % load_test.errors['login']
+            )
+
+        self.stdout.write(
+            '%-34s %8s %7s %8s %9s %9s %9s %9s' % (
+                'endpoint', 'requests', 'errors', 'req/s', 'p50 ms',
+                'p95 ms', 'p99 ms', 'serve ms'
+            )
+        )
+
+        for endpoint, latencies in sorted(load_test.latencies.items()):
+            self.stdout.write(
+                '%-34s %8d %7d %8.1f %9.2f %9.2f %9.2f %9.2f' % (
+                    endpoint, len(latencies), load_test.errors[endpoint],
+                    len(latencies) / elapsed,
+                    percentile(latencies, 50) * 1000,
+                    percentile(latencies, 95) * 1000,
+                    percentile(latencies, 99) * 1000,
+                    percentile(load_test.service_times[endpoint], 50) * 1000
+                )
+            )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from ...jobs import WorkerPool
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs queued by the API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of worker threads'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1,
+            help='Seconds to wait before polling again when the queue is empty'
+        )
+        parser.add_argument(
+            '--visibility-timeout', type=int, default=300,
+            help='Seconds after which running jobs are handed to another '
+                 'worker'
+        )
+
+    def handle(self, *args, **options):
+        pool = WorkerPool(
+            size=options['workers'],
+            poll_interval=options['poll_interval'],
+            visibility_timeout=options['visibility_timeout']
+        )
+        pool.start()
+
+        self.stdout.write('Started %d job workers' % options['workers'])
+        try:
+            pool.wait()
+        except KeyboardInterrupt:
+            pool.stop()
+            self.stdout.write('Job workers stopped')
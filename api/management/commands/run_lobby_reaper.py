@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from ...reaper import LobbyReaper
+
+
+class Command(BaseCommand):
+    help = 'Periodically end lobbies nobody has been active in for a while'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-idle', type=float, default=30,
+            help='Minutes without activity after which lobbies are ended'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=60,
+            help='Seconds to wait between runs'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of lobbies ended per UPDATE'
+        )
+        parser.add_argument(
+            '--once', action='store_true', default=False,
+            help='End the stale lobbies once and exit, e.g. from cron'
+        )
+
+    def handle(self, *args, **options):
+        reaper = LobbyReaper(
+            max_idle=timedelta(minutes=options['max_idle']),
+            batch_size=options['batch_size']
+        )
+
+        if options['once']:
+            self.stdout.write('Ended %d stale lobbies' % reaper.reap())
+            return
+
+        self.stdout.write('Lobby reaper started')
+        try:
+            reaper.run_forever(interval=options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Lobby reaper stopped')
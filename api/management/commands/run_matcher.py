@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from ...matchmaking import Matcher
+
+
+class Command(BaseCommand):
+    help = 'Continuously form games out of the matchmaking queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds to wait between runs'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of waiting tickets read at a time'
+        )
+        parser.add_argument(
+            '--once', action='store_true', default=False,
+            help='Form the games the queue allows once and exit'
+        )
+
+    def handle(self, *args, **options):
+        matcher = Matcher(batch_size=options['batch_size'])
+
+        if options['once']:
+            self.stdout.write('Formed %d games' % matcher.match())
+            return
+
+        self.stdout.write('Matcher started')
+        try:
+            matcher.run_forever(interval=options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Matcher stopped')
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...presence import get_tracker
+from ...scheduler import PhaseScheduler
+
+
+class Command(BaseCommand):
+    help = 'Automatically advance turn phases once their deadline passes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', type=float, default=30,
+            help='Seconds of upcoming deadlines loaded per database query'
+        )
+        parser.add_argument(
+            '--max-sleep', type=float, default=1,
+            help='Maximum number of seconds to sleep between ticks'
+        )
+        parser.add_argument(
+            '--end-abandoned', action='store_true', default=False,
+            help=(
+                'End games that none of their players are online for when '
+                'a phase deadline passes. Requires clients to send '
+                'heartbeats.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        presence = None
+        if options['end_abandoned']:
+            presence = get_tracker()
+
+            # Heartbeats are received by the API's processes, not this one
+            if not presence.is_shared():
+                raise CommandError(
+                    '--end-abandoned needs a PRESENCE_CACHE shared with the '
+                    'API processes, otherwise every game is abandoned'
+                )
+
+        scheduler = PhaseScheduler(
+            window=timedelta(seconds=options['window']),
+            presence=presence
+        )
+
+        self.stdout.write('Phase scheduler started')
+        try:
+            scheduler.run_forever(max_sleep=options['max_sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write('Phase scheduler stopped')
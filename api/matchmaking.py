@@ -0,0 +1,239 @@
+"""
+Automatic matchmaking.
+
+Users queue a `MatchTicket` with the number of players they want to play
+with and a resident preset (`POST /api/matchmaking/`). The matcher started
+with the `run_matcher` management command reads the waiting tickets in
+batches and turns every full group of tickets with the same preferences,
+oldest first, into a new lobby with its players and residents already in
+place, owned by whoever queued first.
+
+Each batch costs the same handful of queries whatever the number of games
+it forms: games, players, residents and huts are written with one bulk
+insert per shard, and tickets are updated with one UPDATE per few hundred
+tickets. Without sharding, game ids come from the database itself, which
+bulk inserts don't hand back in this version of Django, so games (only)
+are inserted one by one.
+"""
+import logging
+import time
+
+from datetime import datetime
+
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import Case, Value, When
+
+from .models import Game, Hut, MatchTicket, Player, Presets, Resident, Role
+from .sharding import allocate_ids, is_enabled, shard_for_game
+
+
+logger = logging.getLogger(__name__)
+
+
+class Matcher(object):
+    """
+    Forms games out of the waiting tickets, up to `batch_size` tickets at a
+    time.
+
+    Waiting tickets are counted by preferences first, so only the tickets
+    of groups that can fill a game are read and tickets that are still
+    waiting for others never hold up the rest of the queue.
+    """
+
+    def __init__(self, batch_size=1000, clock=datetime.now):
+        self.batch_size = batch_size
+        self.clock = clock
+
+    def match(self):
+        """
+        Form every game the waiting tickets allow. Returns the number of
+        games formed.
+        """
+        formed = 0
+        while True:
+            count = self.match_batch()
+            if not count:
+                return formed
+
+            formed += count
+
+    def match_batch(self):
+        now = self.clock()
+
+        # Tickets stay locked until their games are in place, so they are
+        # never matched twice or cancelled half-way
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            groups = self.group(self.get_tickets())
+            if not groups:
+                return 0
+
+            games = self.create_games(groups)
+            self.assign(games, groups, now)
+
+        return len(groups)
+
+    def get_tickets(self):
+        """
+        The oldest waiting tickets of every group of preferences that can
+        fill at least one game
+        """
+        waiting = MatchTicket.objects.using(DEFAULT_DB_ALIAS).filter(
+            game_id=None
+        )
+        counts = waiting.values_list('preset', 'player_count').annotate(
+            count=models.Count('id')
+        ).order_by('preset', 'player_count')
+
+        tickets = []
+        for preset, player_count, count in counts:
+            room = self.batch_size - len(tickets)
+            size = min(count, room) // player_count * player_count
+            if not size:
+                continue
+
+            tickets.extend(waiting.select_for_update().filter(
+                preset=preset, player_count=player_count
+            ).order_by('id')[:size])
+
+        return tickets
+
+    def group(self, tickets):
+        """
+        The lists of tickets that make up a game each
+        """
+        groups = []
+        waiting = {}
+        users = set()
+
+        for ticket in tickets:
+            # Users that somehow queued twice are only matched once a batch
+            if ticket.user_id in users:
+                continue
+            users.add(ticket.user_id)
+
+            key = (ticket.preset, ticket.player_count)
+            group = waiting.setdefault(key, [])
+            group.append(ticket)
+
+            if len(group) == ticket.player_count:
+                groups.append(group)
+                del waiting[key]
+
+        return groups
+
+    def create_games(self, groups):
+        """
+        Create a lobby for each group of tickets. Returns the games in the
+        same order as the groups.
+        """
+        if is_enabled():
+            games = [
+                Game(pk=pk) for pk in allocate_ids('game', len(groups))
+            ]
+        else:
+            games = [Game.objects.create() for group in groups]
+
+        shards = {}
+        for game, group in zip(games, groups):
+            shards.setdefault(shard_for_game(game.pk), []).append(
+                (game, group)
+            )
+
+        for alias, matches in shards.items():
+            with transaction.atomic(using=alias):
+                if is_enabled():
+                    Game.objects.using(alias).bulk_create(
+                        [game for game, group in matches]
+                    )
+                self.create_players(alias, matches)
+                self.create_residents(alias, matches)
+
+        return games
+
+    def create_players(self, alias, matches):
+        players = []
+        for game, group in matches:
+            for i, ticket in enumerate(group):
+                players.append(Player(
+                    game_id=game.pk,
+                    user_id=ticket.user_id,
+                    is_owner=i == 0,
+                    position=i + 1
+                ))
+
+        Player.objects.using(alias).bulk_create(players)
+
+    def create_residents(self, alias, matches):
+        roles = dict(
+            (role.role, role) for role in Role.objects.using(alias)
+        )
+
+        residents = []
+        for game, group in matches:
+            preset = Presets(group[0].preset)
+            for role in preset.get_roles():
+                residents.append(
+                    Resident(game_id=game.pk, role=roles[role.value])
+                )
+        Resident.objects.using(alias).bulk_create(residents)
+
+        # Bulk inserts don't set the residents' ids, which their huts need
+        created = Resident.objects.using(alias).filter(
+            game_id__in=[game.pk for game, group in matches]
+        ).values_list('id', 'game_id')
+
+        Hut.objects.using(alias).bulk_create([
+            Hut(game_id=game_id, resident_id=resident_id, position=0)
+            for resident_id, game_id in created
+        ])
+
+    def assign(self, games, groups, now):
+        """
+        Record the game each ticket was matched into
+        """
+        connection = connections[DEFAULT_DB_ALIAS]
+        # Each ticket takes up to three query parameters
+        chunk_size = connection.ops.bulk_batch_size(
+            ['pk', 'pk', 'game_id'], [t for group in groups for t in group]
+        )
+
+        chunk, size = [], 0
+        for game, group in zip(games, groups):
+            if chunk and size + len(group) > chunk_size:
+                self.assign_chunk(chunk, now)
+                chunk, size = [], 0
+
+            chunk.append((game, group))
+            size += len(group)
+
+        self.assign_chunk(chunk, now)
+
+    def assign_chunk(self, chunk, now):
+        ticket_ids = [t.pk for game, group in chunk for t in group]
+
+        MatchTicket.objects.using(DEFAULT_DB_ALIAS).filter(
+            pk__in=ticket_ids
+        ).update(
+            game_id=Case(
+                *[
+                    When(
+                        pk__in=[t.pk for t in group], then=Value(game.pk)
+                    )
+                    for game, group in chunk
+                ],
+                output_field=models.BigIntegerField()
+            ),
+            time_matched=now
+        )
+
+    def run_forever(self, interval=1.0):
+        while True:
+            try:
+                formed = self.match()
+            except Exception:
+                logger.exception('Unable to match waiting players')
+            else:
+                if formed:
+                    logger.info('Formed %d games', formed)
+
+            time.sleep(interval)
@@ -36,8 +36,9 @@ def create_roles(app, schema):
         Roles.WOLF_CUB: Teams.WEREWOLF.value,
     }
 
+    # Roles are reference data needed on every database (e.g. game shards)
     for role in Roles:
-        Role.objects.create(
+        Role.objects.using(schema.connection.alias).create(
             role=role.value,
             name=Roles.get_choice_label(role.name),
             team=role_teams.get(role, Teams.VILLAGER.value),
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-19 17:18
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_auto_20160817_0445'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedAction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time_created', models.DateTimeField(auto_now_add=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='queued_actions', to='api.Player')),
+                ('resident', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.Resident')),
+                ('target_hut', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.Hut')),
+                ('target_player', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.Player')),
+                ('turn', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='queued_actions', to='api.Turn')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='queuedaction',
+            unique_together=set([('turn', 'resident')]),
+        ),
+    ]
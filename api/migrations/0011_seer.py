@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-19 17:19
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_queuedaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Seer',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+            },
+            bases=('api.resident',),
+        ),
+    ]
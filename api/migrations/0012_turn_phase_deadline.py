@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-19 17:19
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_seer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='turn',
+            name='phase_deadline',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-19 17:52
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_turn_game_number_index'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='player',
+            index_together=set([('user', 'time_withdrawn')]),
+        ),
+    ]
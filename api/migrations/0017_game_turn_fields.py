@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-19 17:54
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_active_turns(apps, schema_editor):
+    Game = apps.get_model('api', 'Game')
+    Turn = apps.get_model('api', 'Turn')
+
+    db = schema_editor.connection.alias
+    turns = Turn.objects.using(db).filter(
+        is_active=True, game__time_ended=None
+    ).select_related('current_player')
+
+    for turn in turns:
+        user_id = None
+        if turn.current_player is not None:
+            user_id = turn.current_player.user_id
+
+        Game.objects.using(db).filter(pk=turn.game_id).update(
+            current_player_user_id=user_id,
+            current_phase=turn.current_phase,
+            turn_number=turn.number
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0016_player_user_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='current_phase',
+            field=models.IntegerField(blank=True, choices=[(0, 'Initial'), (1, 'Day'), (2, 'Voting'), (3, 'Night')], default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='current_player_user',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='turn_number',
+            field=models.IntegerField(blank=True, default=None, null=True),
+        ),
+        migrations.RunPython(copy_active_turns, migrations.RunPython.noop),
+    ]
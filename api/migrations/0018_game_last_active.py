@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-19 18:05
+from __future__ import unicode_literals
+
+import datetime
+from django.db import migrations, models
+
+
+def backfill_last_active(apps, schema_editor):
+    # Existing lobbies were last active when they were created, as far as
+    # anyone knows
+    Game = apps.get_model('api', 'Game')
+    Game.objects.using(schema_editor.connection.alias).update(
+        time_last_active=models.F('time_created')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_game_turn_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='time_last_active',
+            field=models.DateTimeField(default=datetime.datetime.now),
+        ),
+        migrations.RunPython(
+            backfill_last_active, migrations.RunPython.noop
+        ),
+        migrations.AlterIndexTogether(
+            name='game',
+            index_together=set([('time_ended', 'time_started', 'time_last_active')]),
+        ),
+    ]
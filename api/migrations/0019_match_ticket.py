@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-19 18:09
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0018_game_last_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchTicket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player_count', models.PositiveSmallIntegerField()),
+                ('preset', models.CharField(choices=[('basic', 'Basic'), ('classic', 'Classic'), ('chaos', 'Chaos')], max_length=20)),
+                ('game_id', models.BigIntegerField(blank=True, default=None, null=True)),
+                ('time_created', models.DateTimeField(auto_now_add=True)),
+                ('time_matched', models.DateTimeField(blank=True, default=None, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='matchticket',
+            index_together=set([('game_id', 'preset', 'player_count', 'id')]),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-19 18:53
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def drop_extra_actions(apps, schema_editor):
+    # Players used to be able to act through several residents a turn. Only
+    # the first action they queued is kept.
+    QueuedAction = apps.get_model('api', 'QueuedAction')
+    actions = QueuedAction.objects.using(schema_editor.connection.alias)
+
+    first_ids = actions.values('turn', 'player').annotate(
+        first_id=models.Min('id')
+    ).values_list('first_id', flat=True)
+    actions.exclude(id__in=list(first_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_match_ticket'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_extra_actions, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='queuedaction',
+            unique_together=set([('turn', 'player'), ('turn', 'resident')]),
+        ),
+    ]
@@ -12,9 +12,15 @@ from .inquisition import Inquisition
 from .role import Role, Roles
 from .resident import Resident
 from .hut import Hut
+from .queued_action import QueuedAction
+
+from .job import Job, JobStatus
+from .id_sequence import IdSequence
+from .match_ticket import MatchTicket, Presets
 
 __all__ = [
     Teams, Phases,
     Game, Player, Turn, Action, ActionTarget, Vote, Inquisition,
-    Role, Roles, Resident, Hut,
+    Role, Roles, Resident, Hut, QueuedAction,
+    Job, JobStatus, IdSequence, MatchTicket, Presets,
 ]
@@ -3,12 +3,15 @@ import math
 from datetime import datetime
 from random import shuffle
 
-from django.db import models
+from django.contrib.auth.models import User
+from django.db import models, transaction
 from django.core.exceptions import ObjectDoesNotExist
 
 from rest_framework import status
 
 from ..exceptions import APIException, APIExceptionCode
+from ..jobs import enqueue
+from ..sharding import allocate_ids, is_enabled, shard_for_game
 
 from .team import Teams
 from .phase import Phases
@@ -28,16 +31,89 @@ class Game(models.Model):
     time_created = models.DateTimeField(auto_now_add=True)
     time_started = models.DateTimeField(blank=True, null=True, default=None)
     time_ended = models.DateTimeField(blank=True, null=True, default=None)
+    # Last time players joined, left or changed the residents of the lobby
+    time_last_active = models.DateTimeField(default=datetime.now)
+
+    # Copied from the active turn whenever it is saved (see `Turn.save`) so
+    # that players can check whether it's their move from the game's row
+    # alone
+    current_player_user = models.ForeignKey(
+        User,
+        blank=True, null=True, default=None, on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    current_phase = models.IntegerField(
+        choices=Phases.choices(), blank=True, null=True, default=None
+    )
+    turn_number = models.IntegerField(blank=True, null=True, default=None)
+
+    TURN_FIELDS = ('current_player_user', 'current_phase', 'turn_number')
+    SEPARATE_FIELDS = TURN_FIELDS + ('time_last_active', )
+
+    class Meta:
+        # Open lobbies are looked up by their last activity (see
+        # `api.reaper`)
+        index_together = (('time_ended', 'time_started', 'time_last_active'), )
+
+    def save(self, *args, **kwargs):
+        if is_enabled():
+            # The game's id decides which shard it and its data live on
+            kwargs['using'] = shard_for_game(self.allocate_id())
+
+        if not self._state.adding and 'update_fields' not in kwargs:
+            # The turn fields are only written by turns and the last activity
+            # by `touch`, so that saving a game loaded before they changed
+            # doesn't revert them
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in Game.SEPARATE_FIELDS
+            ]
+
+        super(Game, self).save(*args, **kwargs)
+
+    def allocate_id(self):
+        """
+        Sharded games get their id before being saved since the id decides
+        which shard the game is saved to. Returns `None` when not sharded.
+        """
+        if self.pk is None and is_enabled():
+            self.pk = allocate_ids('game')[0]
+        return self.pk
 
     @property
     def owner(self):
+        # Views prefetch the owner into `prefetched_owners` when they know
+        # it is going to be serialized
+        if hasattr(self, 'prefetched_owners'):
+            owners = self.prefetched_owners
+            return owners[0] if owners else None
         return self.players.get(is_owner=True)
 
     @property
     def active_turn(self):
+        if hasattr(self, 'prefetched_active_turns'):
+            turns = self.prefetched_active_turns
+            return turns[0] if turns else None
+
         # Were using `filter` and `first` instead of `get` since there are
         # games without any active turns yet (e.g. hasn't started)
-        return self.turns.filter(is_active=True).first()
+        return self.turns.select_related('current_player').filter(
+            is_active=True
+        ).first()
+
+    def touch(self):
+        """
+        Record activity in the lobby without saving the rest of the game
+        """
+        self.time_last_active = datetime.now()
+        Game.objects.using(self._state.db).filter(pk=self.pk).update(
+            time_last_active=self.time_last_active
+        )
+
+    def is_users_move(self, user):
+        if self.current_player_user_id is None:
+            return False
+        return self.current_player_user_id == user.id
 
     def has_started(self):
         if not self.time_started:
@@ -50,50 +126,62 @@ class Game(models.Model):
         return True
 
     def join(self, user):
-        if self.has_started():
-            raise APIException(
-                'Unable to join game. Game has already started',
-                APIExceptionCode.GAME_ALREADY_STARTED,
-                http_code=status.HTTP_400_BAD_REQUEST
-            )
+        db = self._state.db
+        with transaction.atomic(using=db):
+            # Locked so that the lobby isn't started or ended (e.g. by the
+            # reaper) while the player joins. The instance may be stale.
+            self.time_started, self.time_ended = Game.objects.using(
+                db
+            ).select_for_update().values_list(
+                'time_started', 'time_ended'
+            ).get(pk=self.pk)
+
+            if self.has_started():
+                raise APIException(
+                    'Unable to join game. Game has already started',
+                    APIExceptionCode.GAME_ALREADY_STARTED,
+                    http_code=status.HTTP_400_BAD_REQUEST
+                )
 
-        if self.has_ended():
-            raise APIException(
-                'Unable to join game. Game has already ended',
-                APIExceptionCode.GAME_ALREADY_ENDED,
-                http_code=status.HTTP_400_BAD_REQUEST
-            )
+            if self.has_ended():
+                raise APIException(
+                    'Unable to join game. Game has already ended',
+                    APIExceptionCode.GAME_ALREADY_ENDED,
+                    http_code=status.HTTP_400_BAD_REQUEST
+                )
 
-        player = None
-        try:
-            player = self.get_player(username=user.username)
-        except ObjectDoesNotExist:
-            pass
-        else:
-            if not player.has_left():
+            player = None
+            try:
+                player = self.get_player(username=user.username)
+            except ObjectDoesNotExist:
+                pass
+            else:
+                if not player.has_left():
+                    raise APIException(
+                        'You have already joined this game',
+                        APIExceptionCode.PLAYER_ALREADY_JOINED,
+                        http_code=status.HTTP_400_BAD_REQUEST
+                    )
+
+            player_count = self.players.filter(time_withdrawn=None).count()
+            if player_count >= Game.MAX_PLAYERS:
                 raise APIException(
-                    'You have already joined this game',
-                    APIExceptionCode.PLAYER_ALREADY_JOINED,
+                    'Max number of players (%s) reached' % Game.MAX_PLAYERS,
+                    APIExceptionCode.GAME_MAX_PLAYERS_REACHED,
                     http_code=status.HTTP_400_BAD_REQUEST
                 )
 
-        player_count = self.players.filter(time_withdrawn=None).count()
-        if player_count >= Game.MAX_PLAYERS:
-            raise APIException(
-                'Max number of players (%s) reached' % Game.MAX_PLAYERS,
-                APIExceptionCode.GAME_MAX_PLAYERS_REACHED,
-                http_code=status.HTTP_400_BAD_REQUEST
-            )
+            if player and player.has_left():
+                player.time_withdrawn = None
+                player.save()
+            else:
+                player = self.players.create(
+                    user=user,
+                    team=Teams.VILLAGER.value,
+                    position=player_count + 1
+                )
 
-        if player and player.has_left():
-            player.time_withdrawn = None
-            player.save()
-        else:
-            player = self.players.create(
-                user=user,
-                team=Teams.VILLAGER.value,
-                position=player_count + 1
-            )
+            self.touch()
 
     def get_player(self, username):
         return self.players.get(user__username=username)
@@ -102,12 +190,19 @@ class Game(models.Model):
         active_players = self.players.filter(time_withdrawn=None)
         player_position = active_players.aggregate(models.Max('position'))
         return active_players.get(
-            position=(player.position + 1) % player_position['position__max']
+            # Positions start at 1
+            position=player.position % player_position['position__max'] + 1
         )
 
     def end(self):
         self.time_ended = datetime.now()
-        self.save()
+        # Nobody has a move left to make
+        for name in Game.TURN_FIELDS:
+            setattr(self, name, None)
+
+        self.save(update_fields=('time_ended', ) + Game.TURN_FIELDS)
+
+        enqueue('game_ended', using=self._state.db, game_id=self.id)
 
     def start(self):
         if self.has_started():
@@ -141,18 +236,24 @@ class Game(models.Model):
                 http_code=status.HTTP_400_BAD_REQUEST
             )
 
-        self.initialize_huts()
-        grand_inquisitor = self.initialize_players(players)
+        # Hut, player and turn allocation are committed together so that a
+        # failure half-way through never leaves a partially started game
+        with transaction.atomic(using=self._state.db):
+            self.initialize_huts()
+            grand_inquisitor = self.initialize_players(players)
+
+            self.turns.create(
+                number=1,
+                current_phase=Phases.INITIAL.value,
+                phase_deadline=Phases.INITIAL.get_deadline(),
+                grand_inquisitor=grand_inquisitor,
+                current_player=grand_inquisitor
+            )
 
-        self.turns.create(
-            number=1,
-            current_phase=Phases.INITIAL.value,
-            grand_inquisitor=grand_inquisitor,
-            current_player=grand_inquisitor
-        )
+            self.time_started = datetime.now()
+            self.save()
 
-        self.time_started = datetime.now()
-        self.save()
+            enqueue('game_started', using=self._state.db, game_id=self.id)
 
     def initialize_players(self, players=None):
         if players is None:
@@ -188,7 +289,7 @@ class Game(models.Model):
             hut.save()
 
     def add_resident(self, role_data):
-        role = Role.objects.get(role=role_data.value)
+        role = Role.objects.using(self._state.db).get(role=role_data.value)
 
         role_count = self.residents.filter(role=role).count()
 
@@ -201,11 +302,13 @@ class Game(models.Model):
                 http_code=status.HTTP_400_BAD_REQUEST
             )
 
-        resident = self.residents.create(role=role)
-        self.huts.create(
-            position=0,
-            resident=resident
-        )
+        with transaction.atomic(using=self._state.db):
+            resident = self.residents.create(role=role)
+            self.huts.create(
+                position=0,
+                resident=resident
+            )
+            self.touch()
         return resident
 
     @staticmethod
@@ -0,0 +1,9 @@
+from django.db import models
+
+
+class IdSequence(models.Model):
+    """
+    A named sequence of ids that can be allocated in blocks
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
@@ -0,0 +1,35 @@
+from django.db import models
+
+from .choice_enum import ChoiceEnum
+
+
+class JobStatus(ChoiceEnum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class Job(models.Model):
+    """
+    A unit of non-critical work deferred to the background job workers
+    """
+    MAX_ATTEMPTS = 3
+
+    name = models.CharField(max_length=100)
+    payload = models.TextField(default='{}')
+
+    status = models.CharField(
+        max_length=10,
+        choices=JobStatus.choices(),
+        default=JobStatus.PENDING.value
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, null=True, default=None)
+
+    time_created = models.DateTimeField(auto_now_add=True)
+    time_started = models.DateTimeField(blank=True, null=True, default=None)
+    time_finished = models.DateTimeField(blank=True, null=True, default=None)
+
+    class Meta:
+        index_together = (('status', 'id'), )
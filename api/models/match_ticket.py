@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from .choice_enum import ChoiceEnum
+from .role import Roles
+
+
+class Presets(ChoiceEnum):
+    BASIC = 'basic'
+    CLASSIC = 'classic'
+    CHAOS = 'chaos'
+
+    def get_roles(self):
+        """
+        The roles of the residents of games made with this preset
+        """
+        return PRESET_ROLES[self]
+
+
+# Every preset has `Game.RESIDENT_COUNT` residents and stays within the
+# roles' `max_count`
+PRESET_ROLES = {
+    Presets.BASIC: [Roles.WEREWOLF] * 2 + [Roles.SEER] + [Roles.VILLAGER] * 9,
+    Presets.CLASSIC: [Roles.WEREWOLF] * 3 + [
+        Roles.SEER, Roles.BODYGUARD, Roles.HUNTER, Roles.MAYOR, Roles.MINION,
+    ] + [Roles.VILLAGER] * 4,
+    Presets.CHAOS: [Roles.WEREWOLF] * 2 + [
+        Roles.WOLF_CUB, Roles.MINION, Roles.SORCERER, Roles.SEER,
+        Roles.APPRENTICE_SEER, Roles.WITCH, Roles.TROUBLEMAKER, Roles.CURSED,
+        Roles.PRINCE, Roles.HUNTER,
+    ],
+}
+
+
+class MatchTicket(models.Model):
+    """
+    A user waiting to be matched into a new game (see `api.matchmaking`)
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, related_name='+'
+    )
+
+    player_count = models.PositiveSmallIntegerField()
+    preset = models.CharField(max_length=20, choices=Presets.choices())
+
+    # Games may live on another shard, so only their id is kept
+    game_id = models.BigIntegerField(blank=True, null=True, default=None)
+
+    time_created = models.DateTimeField(auto_now_add=True)
+    time_matched = models.DateTimeField(blank=True, null=True, default=None)
+
+    class Meta:
+        # The matcher counts the waiting tickets by preferences and reads
+        # them oldest first
+        index_together = (('game_id', 'preset', 'player_count', 'id'), )
@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 from .choice_enum import ChoiceEnum
 
 
@@ -6,3 +8,30 @@ class Phases(ChoiceEnum):
     DAY = 1
     VOTING = 2
     NIGHT = 3
+
+    def get_next_phase(self):
+        """
+        The phase that follows this one in the same turn, or `None` if the
+        turn ends with this phase
+        """
+        return PHASE_TRANSITIONS[self]
+
+    def get_deadline(self, start=None):
+        if start is None:
+            start = datetime.now()
+        return start + PHASE_DURATIONS[self]
+
+
+PHASE_TRANSITIONS = {
+    Phases.INITIAL: Phases.DAY,
+    Phases.DAY: Phases.VOTING,
+    Phases.VOTING: Phases.NIGHT,
+    Phases.NIGHT: None,
+}
+
+PHASE_DURATIONS = {
+    Phases.INITIAL: timedelta(minutes=1),
+    Phases.DAY: timedelta(minutes=3),
+    Phases.VOTING: timedelta(minutes=1),
+    Phases.NIGHT: timedelta(minutes=1),
+}
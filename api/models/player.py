@@ -42,11 +42,23 @@ class Player(models.Model):
     time_created = models.DateTimeField(auto_now_add=True)
     time_withdrawn = models.DateTimeField(blank=True, null=True, default=None)
 
+    class Meta:
+        # Users look up the games they are still playing in
+        index_together = (('user', 'time_withdrawn'), )
+
     def has_left(self):
         if not self.time_withdrawn:
             return False
         return True
 
+    def get_teammates(self):
+        """
+        Every player on the same team in the game, including this one
+        """
+        return Player.objects.using(self._state.db).filter(
+            game_id=self.game_id, team=self.team
+        ).order_by('position')
+
     def leave_game(self):
         if self.has_left():
             raise APIException(
@@ -71,3 +83,5 @@ class Player(models.Model):
 
         self.time_withdrawn = datetime.now()
         self.save()
+
+        self.game.touch()
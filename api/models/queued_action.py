@@ -0,0 +1,138 @@
+from itertools import groupby
+
+from django.db import models, transaction
+
+from ..role_actions import get_handler
+
+from .action import Action
+from .action_target import ActionTarget
+from .hut import Hut
+from .player import Player
+from .role import Roles
+from .turn import Turn
+
+
+class QueuedActionManager(models.Manager):
+    # Night actions are resolved in this order regardless of when they were
+    # submitted: protections first, then attacks, then information roles.
+    # Roles not listed here are resolved last.
+    RESOLUTION_ORDER = (
+        Roles.BODYGUARD,
+        Roles.WEREWOLF,
+        Roles.WOLF_CUB,
+        Roles.WITCH,
+        Roles.SEER,
+        Roles.APPRENTICE_SEER,
+        Roles.SORCERER,
+    )
+
+    def get_resolution_key(self, queued_action):
+        role = Roles(queued_action.resident.role.role)
+        try:
+            priority = self.RESOLUTION_ORDER.index(role)
+        except ValueError:
+            priority = len(self.RESOLUTION_ORDER)
+
+        return (priority, queued_action.time_created, queued_action.id)
+
+    def resolve(self, turn):
+        """
+        Resolve every action queued for the turn in a single ordered pass.
+
+        The resulting `Action` and `ActionTarget` rows are bulk inserted and
+        the queue for the turn is cleared.
+        """
+        db = turn._state.db
+
+        with transaction.atomic(using=db):
+            queued_actions = sorted(
+                self.filter(turn=turn).select_related('resident__role'),
+                key=self.get_resolution_key
+            )
+
+            if not queued_actions:
+                return []
+
+            actions = [
+                Action(
+                    turn=turn,
+                    player_id=queued.player_id,
+                    resident_id=queued.resident_id
+                ) for queued in queued_actions
+            ]
+            Action.objects.using(db).bulk_create(actions)
+
+            if any(action.pk is None for action in actions):
+                # Most backends do not return primary keys from bulk inserts,
+                # so the actions are read back by their turn and resident,
+                # which queued actions are unique by
+                created = dict(
+                    (action.resident_id, action)
+                    for action in Action.objects.using(db).filter(
+                        turn=turn,
+                        resident_id__in=[q.resident_id for q in queued_actions]
+                    ).order_by('id')
+                )
+                actions = [created[q.resident_id] for q in queued_actions]
+
+            ActionTarget.objects.using(db).bulk_create([
+                ActionTarget(
+                    action=action,
+                    hut_id=queued.target_hut_id,
+                    player_id=queued.target_player_id
+                )
+                for queued, action in zip(queued_actions, actions)
+                if queued.target_hut_id or queued.target_player_id
+            ])
+
+            # Queued actions are already sorted by role so each role's
+            # handler gets to apply its effects once, in resolution order
+            for role, group in groupby(
+                    queued_actions, key=lambda q: q.resident.role.role):
+                handler = get_handler(role)
+                if handler is not None:
+                    handler.resolve(list(group))
+
+            self.filter(id__in=[q.id for q in queued_actions]).delete()
+
+        return actions
+
+
+class QueuedAction(models.Model):
+    """
+    An action submitted during a turn that has not been resolved yet
+    """
+    objects = QueuedActionManager()
+
+    turn = models.ForeignKey(
+        Turn, on_delete=models.DO_NOTHING, related_name='queued_actions'
+    )
+    player = models.ForeignKey(
+        Player, on_delete=models.DO_NOTHING, related_name='queued_actions'
+    )
+    resident = models.ForeignKey(
+        'Resident', on_delete=models.DO_NOTHING, related_name='+'
+    )
+    target_hut = models.ForeignKey(
+        Hut,
+        on_delete=models.DO_NOTHING,
+        blank=True,
+        null=True,
+        default=None,
+        related_name='+'
+    )
+    target_player = models.ForeignKey(
+        Player,
+        on_delete=models.DO_NOTHING,
+        blank=True,
+        null=True,
+        default=None,
+        related_name='+'
+    )
+
+    time_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Each resident acts once a turn, and each player acts through a
+        # single resident
+        unique_together = (('turn', 'resident'), ('turn', 'player'))
@@ -1,10 +1,12 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from rest_framework import status
 
 from .game import Game
+from .phase import Phases
 from .role import Role
 
 from ..exceptions import APIException, APIExceptionCode
+from ..role_actions import get_handler
 
 
 class Resident(models.Model):
@@ -17,10 +19,83 @@ class Resident(models.Model):
 
     time_eliminated = models.DateTimeField(blank=True, null=True, default=None)
 
-    def action(self, *args, **kwargs):
+    def action(self, player=None, target_hut=None, target_player=None):
         if bool(self.time_eliminated):
             raise APIException(
                 'Eliminated roles cannot perform any further actions',
                 APIExceptionCode.ACTION_INVALID_ACTOR,
                 http_code=status.HTTP_400_BAD_REQUEST
             )
+
+        handler = get_handler(self.role.role)
+        if handler is None:
+            raise APIException(
+                '%s residents do not have any actions' % self.role.name,
+                APIExceptionCode.ACTION_INVALID_ACTOR,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        turn = self.game.active_turn
+        if turn is None:
+            raise APIException(
+                'Actions can only be performed once the game has started',
+                APIExceptionCode.GAME_NOT_YET_STARTED,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        if turn.current_phase != Phases.NIGHT.value:
+            raise APIException(
+                'Actions may only be performed at night',
+                APIExceptionCode.TURN_INVALID_PHASE,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        if player is None or player.pk != turn.current_player_id:
+            raise APIException(
+                'Only the current player may perform actions',
+                APIExceptionCode.ACTION_INVALID_ACTOR,
+                http_code=status.HTTP_403_FORBIDDEN
+            )
+
+        # The current player holds the resident they first act through for
+        # the rest of the turn. Concurrent requests are caught by
+        # `queue_action`, this only spares the handler the work.
+        held = turn.queued_actions.filter(player=player).exclude(
+            resident=self
+        )
+        if held.exists():
+            raise self.already_acted()
+
+        return handler.perform(
+            self, player, turn,
+            target_hut=target_hut, target_player=target_player
+        )
+
+    def queue_action(self, player, turn, target_hut=None, target_player=None):
+        try:
+            # Queued actions are unique per turn and resident, and per turn
+            # and player. The savepoint keeps the surrounding transaction
+            # usable when a concurrent request queued an action first.
+            with transaction.atomic(using=turn._state.db):
+                return turn.queued_actions.create(
+                    player=player,
+                    resident=self,
+                    target_hut=target_hut,
+                    target_player=target_player
+                )
+        except IntegrityError:
+            if not turn.queued_actions.filter(resident=self).exists():
+                raise self.already_acted()
+
+            raise APIException(
+                'This resident has already performed an action this turn',
+                APIExceptionCode.ACTION_ALREADY_QUEUED,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    def already_acted(self):
+        return APIException(
+            'You may only act through one resident per turn',
+            APIExceptionCode.ACTION_INVALID_ACTOR,
+            http_code=status.HTTP_403_FORBIDDEN
+        )
@@ -1,7 +1,31 @@
 from rest_framework import status
 
 from ...exceptions import APIException, APIExceptionCode
-from ...models import Resident, Roles
+from ...models import Hut, Resident, Roles
+from ...role_actions import RoleAction, register
+
+
+@register(Roles.SEER)
+class SeerAction(RoleAction):
+    def perform(self, resident, player, turn, target_hut=None,
+                target_player=None):
+        if target_hut is None or target_hut.is_visited:
+            raise APIException(
+                'Seers can only target unvisited huts',
+                APIExceptionCode.ACTION_INVALID_TARGET,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        # The hut is only marked as visited once the turn's actions are
+        # resolved, but the Seer learns the resident's identity right away
+        resident.queue_action(player, turn, target_hut=target_hut)
+
+        return target_hut.resident
+
+    def resolve(self, queued_actions):
+        Hut.objects.using(queued_actions[0]._state.db).filter(
+            id__in=[q.target_hut_id for q in queued_actions]
+        ).update(is_visited=True)
 
 
 class Seer(Resident):
@@ -9,8 +33,6 @@ class Seer(Resident):
         proxy = True
 
     def action(self, player, target_hut):
-        super(self.__class__, self).action()
-
         if self.role.role != Roles.SEER.value:
             raise APIException(
                 'Only Seers may perform this action',
@@ -18,20 +40,4 @@ class Seer(Resident):
                 http_code=status.HTTP_400_BAD_REQUEST
             )
 
-        if target_hut.is_visited:
-            raise APIException(
-                'Seers can only target visited huts',
-                APIExceptionCode.ACTION_INVALID_TARGET,
-                http_code=status.HTTP_400_BAD_REQUEST
-            )
-
-        action = self.game.active_turn.actions.create(
-            player=player, resident=self
-        )
-
-        action.targets.create(hut=target_hut)
-
-        target_hut.is_visited = True
-        target_hut.save()
-
-        return target_hut.resident
+        return super(Seer, self).action(player, target_hut=target_hut)
@@ -1,4 +1,6 @@
-from django.db import models
+from datetime import datetime
+
+from django.db import models, transaction
 
 from rest_framework import status
 
@@ -7,6 +9,7 @@ from .phase import Phases
 from .player import Player
 
 from ..exceptions import APIException, APIExceptionCode
+from ..jobs import enqueue
 
 
 class Turn(models.Model):
@@ -23,6 +26,11 @@ class Turn(models.Model):
         choices=Phases.choices(),
         blank=True, null=True, default=Phases.DAY.value
     )
+    # When the current phase is automatically advanced. Cleared once the
+    # turn ends so only active turns are picked up by the phase scheduler.
+    phase_deadline = models.DateTimeField(
+        blank=True, null=True, default=None, db_index=True
+    )
     current_player = models.ForeignKey(
         Player,
         blank=True, null=True, default=None, on_delete=models.SET_NULL,
@@ -31,6 +39,61 @@ class Turn(models.Model):
 
     time_created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Turn history is read in ranges of turn numbers per game
+        index_together = (('game', 'number'), )
+
+    def save(self, *args, **kwargs):
+        super(Turn, self).save(*args, **kwargs)
+
+        values = dict.fromkeys((
+            'current_player_user_id', 'current_phase', 'turn_number'
+        ))
+
+        if self.is_active:
+            values.update(
+                current_player_user_id=self.get_current_player_user_id(),
+                current_phase=self.current_phase,
+                turn_number=self.number
+            )
+            # Nobody has a move left once the game has ended
+            games = Game.objects.filter(pk=self.game_id, time_ended=None)
+        else:
+            # The next turn may have been saved already
+            games = Game.objects.filter(
+                pk=self.game_id, turn_number=self.number
+            )
+
+        games.using(self._state.db).update(**values)
+
+        # Keep the game this turn was loaded with up to date as well
+        game = getattr(self, Turn.game.field.get_cache_name(), None)
+        if game is None:
+            return
+
+        if game.has_ended():
+            return
+
+        if self.is_active or game.turn_number == self.number:
+            for name, value in values.items():
+                setattr(game, name, value)
+
+    def get_current_player_user_id(self):
+        if self.current_player_id is None:
+            return None
+
+        # Turns loaded with `select_related('current_player')` (e.g. the
+        # game's `active_turn`) already have the player
+        player = getattr(
+            self, Turn.current_player.field.get_cache_name(), None
+        )
+        if player is not None and player.pk == self.current_player_id:
+            return player.user_id
+
+        return Player.objects.using(self._state.db).filter(
+            pk=self.current_player_id
+        ).values_list('user_id', flat=True).first()
+
     def end(self):
         if not self.is_active:
             raise APIException(
@@ -39,16 +102,101 @@ class Turn(models.Model):
                 http_code=status.HTTP_400_BAD_REQUEST
             )
 
-        grand_inquisitor = self.game.get_next_player(self.grand_inquisitor)
+        with transaction.atomic(using=self._state.db):
+            # The turn may have been ended since it was loaded, e.g. by the
+            # phase scheduler, which locks it the same way
+            locked = Turn.objects.using(self._state.db).select_for_update(
+            ).filter(pk=self.pk, is_active=True).values_list(
+                'number', flat=True
+            ).first()
+            if locked is None:
+                self.is_active = False
+                raise APIException(
+                    'Cannot end a turn that has already ended',
+                    APIExceptionCode.TURN_ALREADY_ENDED,
+                    http_code=status.HTTP_400_BAD_REQUEST
+                )
+            self.number = locked
 
-        self.is_active = False
-        self.save()
+            grand_inquisitor = self.game.get_next_player(
+                self.grand_inquisitor
+            )
 
-        new_turn = self.game.turns.create(
-            number=self.number + 1,
-            grand_inquisitor=grand_inquisitor,
-            current_phase=Phases.DAY.value,
-            current_player=grand_inquisitor
-        )
+            self.queued_actions.resolve(self)
+
+            self.is_active = False
+            self.phase_deadline = None
+            self.save()
+
+            new_turn = self.game.turns.create(
+                number=self.number + 1,
+                grand_inquisitor=grand_inquisitor,
+                current_phase=Phases.DAY.value,
+                phase_deadline=Phases.DAY.get_deadline(),
+                current_player=grand_inquisitor
+            )
+
+            enqueue('turn_ended', using=self._state.db, turn_id=self.id)
 
         return new_turn
+
+    def cast_vote(self, player, hut):
+        """
+        Vote for a hut during the voting phase. Players may change their
+        vote, which withdraws the one they cast before.
+        """
+        if not self.is_active:
+            raise APIException(
+                'Cannot vote on a turn that has already ended',
+                APIExceptionCode.TURN_ALREADY_ENDED,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        if self.current_phase != Phases.VOTING.value:
+            raise APIException(
+                'Votes may only be cast during the voting phase',
+                APIExceptionCode.TURN_INVALID_PHASE,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        if player.game_id != self.game_id or player.has_left():
+            raise APIException(
+                'Only participants of the game may vote',
+                APIExceptionCode.VOTE_INVALID_VOTER,
+                http_code=status.HTTP_403_FORBIDDEN
+            )
+
+        if hut.game_id != self.game_id or hut.time_eliminated:
+            raise APIException(
+                'Votes may only be cast for huts still in the game',
+                APIExceptionCode.VOTE_INVALID_TARGET,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic(using=self._state.db):
+            self.votes.filter(player=player, time_removed=None).update(
+                time_removed=datetime.now()
+            )
+            return self.votes.create(player=player, hut=hut)
+
+    def advance_phase(self):
+        """
+        Move the turn to its next phase. Advancing past the last phase of the
+        turn ends it, in which case the newly created turn is returned.
+        """
+        if not self.is_active:
+            raise APIException(
+                'Cannot advance a turn that has already ended',
+                APIExceptionCode.TURN_ALREADY_ENDED,
+                http_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        next_phase = Phases(self.current_phase).get_next_phase()
+        if next_phase is None:
+            return self.end()
+
+        self.current_phase = next_phase.value
+        self.phase_deadline = next_phase.get_deadline()
+        self.save()
+
+        return self
@@ -0,0 +1,89 @@
+"""
+JSON Patch (RFC 6902) documents describing the changes between two versions
+of a JSON document.
+
+Objects are compared key by key. Lists of the same length are compared item
+by item, otherwise they're replaced as a whole, which keeps patches small
+for the common case of one item changing (e.g. a hut getting a vote).
+"""
+
+
+def escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def make_patch(old, new, path=''):
+    """
+    The list of operations that turn `old` into `new`
+    """
+    if old == new:
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        operations = []
+
+        for key in old:
+            if key not in new:
+                operations.append(
+                    {'op': 'remove', 'path': '%s/%s' % (path, escape(key))}
+                )
+
+        for key, value in new.items():
+            key_path = '%s/%s' % (path, escape(key))
+            if key not in old:
+                operations.append(
+                    {'op': 'add', 'path': key_path, 'value': value}
+                )
+            else:
+                operations.extend(make_patch(old[key], value, key_path))
+
+        return operations
+
+    same_length = isinstance(old, list) and isinstance(new, list) and (
+        len(old) == len(new)
+    )
+    if same_length:
+        operations = []
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            operations.extend(
+                make_patch(old_item, new_item, '%s/%d' % (path, i))
+            )
+        return operations
+
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+
+def apply_patch(document, operations):
+    """
+    Apply the `add`, `remove` and `replace` operations made by `make_patch`
+    to `document`, in place. Returns the patched document.
+    """
+    for operation in operations:
+        if not operation['path']:
+            document = operation['value']
+            continue
+
+        tokens = [unescape(t) for t in operation['path'].split('/')[1:]]
+
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token) if isinstance(parent, list) else token]
+
+        key = tokens[-1]
+        if isinstance(parent, list):
+            key = len(parent) if key == '-' else int(key)
+
+        if operation['op'] == 'remove':
+            del parent[key]
+        elif operation['op'] == 'add' and isinstance(parent, list):
+            parent.insert(key, operation['value'])
+        elif operation['op'] in ('add', 'replace'):
+            parent[key] = operation['value']
+        else:
+            raise ValueError('Unsupported operation: %s' % operation['op'])
+
+    return document
@@ -0,0 +1,124 @@
+"""
+Tracks which players are connected to their games from the heartbeats
+their clients send.
+
+Heartbeats are kept in memory by the process that receives them and only
+written through to the shared store (the `PRESENCE_CACHE`) once every
+`PRESENCE_WRITE_INTERVAL` seconds per player, so they never cost a
+database write. Players count as online for `PRESENCE_TTL` seconds after
+their last heartbeat.
+
+A local memory cache is only shared by the threads of a single process, so
+other processes (e.g. the phase scheduler) would see every player as
+offline. The presence cache has to be one that every process reaches.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def get_cache_key(game_id, player_id):
+    return 'presence:%s:%s' % (game_id, player_id)
+
+
+class PresenceTracker(object):
+    def __init__(self, ttl=None, write_interval=None, clock=time.time,
+                 cache_alias=None):
+        if ttl is None:
+            ttl = getattr(settings, 'PRESENCE_TTL', 60)
+        if write_interval is None:
+            write_interval = getattr(settings, 'PRESENCE_WRITE_INTERVAL', 15)
+        if cache_alias is None:
+            cache_alias = getattr(settings, 'PRESENCE_CACHE', 'default')
+
+        self.ttl = ttl
+        self.write_interval = write_interval
+        self.clock = clock
+        self.cache_alias = cache_alias
+
+        self._lock = threading.Lock()
+        # Last heartbeat received by this process, and last written to the
+        # shared store, by (game id, player id)
+        self._seen = {}
+        self._written = {}
+        self._pruned_at = clock()
+
+    @property
+    def cache(self):
+        # Cache connections belong to the thread using them
+        return caches[self.cache_alias]
+
+    def is_shared(self):
+        """
+        Whether other processes see the heartbeats received by this one
+        """
+        return not isinstance(self.cache, LocMemCache)
+
+    def heartbeat(self, game_id, player_id):
+        now = self.clock()
+        key = (game_id, player_id)
+
+        with self._lock:
+            self._seen[key] = now
+            self.prune(now)
+
+            written = self._written.get(key)
+            if written is not None and now - written < self.write_interval:
+                return
+            self._written[key] = now
+
+        self.cache.set(get_cache_key(game_id, player_id), now, self.ttl)
+
+    def prune(self, now):
+        # Heartbeats of players that went away are dropped at most once per
+        # TTL, which keeps heartbeats O(1)
+        if now - self._pruned_at < self.ttl:
+            return
+
+        for key, seen in list(self._seen.items()):
+            if now - seen >= self.ttl:
+                del self._seen[key]
+                self._written.pop(key, None)
+
+        self._pruned_at = now
+
+    def get_online(self, game_id, player_ids):
+        """
+        The ids of the given players of the game that are online
+        """
+        now = self.clock()
+
+        online = set()
+        unknown = {}
+        for player_id in player_ids:
+            seen = self._seen.get((game_id, player_id))
+            if seen is not None and now - seen < self.ttl:
+                online.add(player_id)
+            else:
+                unknown[get_cache_key(game_id, player_id)] = player_id
+
+        # Players may have sent their heartbeats to other processes
+        if unknown:
+            for key, seen in self.cache.get_many(list(unknown)).items():
+                if now - seen < self.ttl:
+                    online.add(unknown[key])
+
+        return online
+
+    def is_online(self, game_id, player_id):
+        return player_id in self.get_online(game_id, [player_id])
+
+
+_tracker = None
+
+
+def get_tracker():
+    global _tracker
+
+    if _tracker is None:
+        _tracker = PresenceTracker()
+
+    return _tracker
@@ -0,0 +1,95 @@
+import logging
+import time
+
+from datetime import datetime, timedelta
+
+from django.db import transaction
+
+from .jobs import enqueue_many
+from .models import Game
+from .sharding import all_databases
+
+
+logger = logging.getLogger(__name__)
+
+
+class LobbyReaper(object):
+    """
+    Ends lobbies (games that never started) that nobody has joined, left or
+    changed the residents of for `max_idle`. Lobbies everyone has left are
+    ended `max_idle` after the last player left.
+
+    Stale lobbies are found with a range query on the indexed
+    `(time_ended, time_started, time_last_active)` columns and ended in
+    batches of `batch_size`, with one UPDATE per batch.
+    """
+
+    def __init__(self, max_idle=timedelta(minutes=30), batch_size=500,
+                 clock=datetime.now):
+        self.max_idle = max_idle
+        self.batch_size = batch_size
+        self.clock = clock
+
+    def reap(self):
+        """
+        End every stale lobby. Returns the number of lobbies ended.
+        """
+        now = self.clock()
+        cutoff = now - self.max_idle
+
+        ended = 0
+        for alias in all_databases():
+            while True:
+                count = self.reap_batch(alias, cutoff, now)
+                ended += count
+
+                if count < self.batch_size:
+                    break
+
+        return ended
+
+    def get_stale_ids(self, alias, cutoff):
+        return list(Game.objects.using(alias).select_for_update().filter(
+            time_ended=None,
+            time_started=None,
+            time_last_active__lt=cutoff
+        ).values_list('id', flat=True)[:self.batch_size])
+
+    def reap_batch(self, alias, cutoff, now):
+        with transaction.atomic(using=alias):
+            # Locked so that nobody joins a lobby while it is being ended
+            game_ids = self.get_stale_ids(alias, cutoff)
+            if not game_ids:
+                return 0
+
+            # Lobbies are only ended if they are still stale, in case the
+            # database doesn't lock rows (e.g. SQLite)
+            ended = Game.objects.using(alias).filter(
+                pk__in=game_ids,
+                time_ended=None,
+                time_started=None,
+                time_last_active__lt=cutoff
+            ).update(time_ended=now)
+
+            if ended < len(game_ids):
+                game_ids = list(Game.objects.using(alias).filter(
+                    pk__in=game_ids, time_ended=now
+                ).values_list('id', flat=True))
+
+            enqueue_many(
+                'game_ended', [{'game_id': i} for i in game_ids], using=alias
+            )
+
+        return len(game_ids)
+
+    def run_forever(self, interval=60):
+        while True:
+            try:
+                ended = self.reap()
+            except Exception:
+                logger.exception('Unable to end stale lobbies')
+            else:
+                if ended:
+                    logger.info('Ended %d stale lobbies', ended)
+
+            time.sleep(interval)
@@ -0,0 +1,117 @@
+"""
+Compact binary renderer for clients that poll the API heavily.
+
+Responses are encoded with MessagePack and the string enums in the payload
+(teams, roles and phases) are replaced by small integers. Clients opt in
+with `Accept: application/msgpack` or `?format=msgpack`; everyone else keeps
+getting JSON. JSON Patch responses are encoded the same way, by the field
+each operation's path points to. `msgpack` is an optional dependency and
+the renderer is only enabled in the settings when it is installed.
+"""
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from rest_framework.renderers import BaseRenderer
+
+from .models import Phases, Roles, Teams
+from .patch import unescape
+
+
+# Codes are part of the wire format. Never renumber them; new members get
+# the next free code.
+TEAM_CODES = {
+    Teams.VILLAGER: 0,
+    Teams.WEREWOLF: 1,
+}
+
+ROLE_CODES = {
+    Roles.VILLAGER: 0,
+    Roles.WEREWOLF: 1,
+    Roles.SEER: 2,
+    Roles.APPRENTICE_SEER: 3,
+    Roles.BODYGUARD: 4,
+    Roles.CURSED: 5,
+    Roles.HUNTER: 6,
+    Roles.MASON: 7,
+    Roles.MAYOR: 8,
+    Roles.MINION: 9,
+    Roles.PRINCE: 10,
+    Roles.SORCERER: 11,
+    Roles.TROUBLEMAKER: 12,
+    Roles.WITCH: 13,
+    Roles.WOLF_CUB: 14,
+}
+
+# Phases are already numbered
+PHASE_CODES = {phase: phase.value for phase in Phases}
+
+
+def _by_value(codes):
+    return {member.value: code for member, code in codes.items()}
+
+
+def _by_name(codes):
+    return {member.name: code for member, code in codes.items()}
+
+
+# Serialized field name => serialized enum value => code
+FIELD_CODES = {
+    'team': _by_value(TEAM_CODES),
+    'winning_team': _by_value(TEAM_CODES),
+    'role': _by_value(ROLE_CODES),
+    'current_phase': _by_name(PHASE_CODES),
+}
+
+
+def encode_enums(data):
+    if isinstance(data, dict):
+        encoded = {}
+        for key, value in data.items():
+            codes = FIELD_CODES.get(key, {})
+            if isinstance(value, str) and value in codes:
+                encoded[key] = codes[value]
+            else:
+                encoded[key] = encode_enums(value)
+        return encoded
+
+    if isinstance(data, (list, tuple)):
+        return [encode_enums(item) for item in data]
+
+    return data
+
+
+def encode_patch(operations):
+    encoded = []
+    for operation in operations:
+        if 'value' in operation:
+            value = operation['value']
+            field = unescape(operation['path'].rsplit('/', 1)[-1])
+            codes = FIELD_CODES.get(field, {})
+            if isinstance(value, str) and value in codes:
+                value = codes[value]
+            else:
+                value = encode_enums(value)
+            operation = dict(operation, value=value)
+        encoded.append(operation)
+    return encoded
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        response = (renderer_context or {}).get('response')
+        if response is not None and response.get('IM') == 'json-patch':
+            data = encode_patch(data)
+        else:
+            data = encode_enums(data)
+
+        return msgpack.packb(data, use_bin_type=True)
@@ -0,0 +1,41 @@
+"""
+Registry of the actions that residents can perform, keyed by `Roles` value.
+
+Handlers are registered at import time with the `register` decorator (see
+`api.models.residents`) so dispatching an action only needs the resident's
+role value and never has to look up a proxy model.
+"""
+
+_handlers = {}
+
+
+class RoleAction(object):
+    """
+    Base class for role action handlers.
+
+    `perform` validates and queues an action for the turn and returns
+    whatever the acting player learns immediately (if anything). `resolve`
+    applies the effects of the turn's queued actions for this role once the
+    turn ends.
+    """
+    role = None
+
+    def perform(self, resident, player, turn, target_hut=None,
+                target_player=None):
+        raise NotImplementedError
+
+    def resolve(self, queued_actions):
+        pass
+
+
+def register(role):
+    def decorator(handler_class):
+        handler_class.role = role
+        _handlers[role.value] = handler_class()
+        return handler_class
+
+    return decorator
+
+
+def get_handler(role_value):
+    return _handlers.get(role_value)
@@ -0,0 +1,148 @@
+import heapq
+import logging
+import time
+
+from datetime import datetime, timedelta
+
+from django.db import transaction
+
+from .models import Turn
+from .sharding import all_databases
+
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseScheduler(object):
+    """
+    Advances the phase of active turns once their `phase_deadline` passes.
+
+    Instead of scanning every game on each tick, upcoming deadlines are
+    loaded one window at a time with a range query on the indexed
+    `phase_deadline` column and kept in a heap, so each tick only looks at
+    the turns that are actually due.
+
+    Deadlines that change after being loaded (e.g. a turn ended early by its
+    players) are handled lazily: the turn's row is re-checked before
+    advancing and stale heap entries are simply dropped.
+
+    Turn ids are only unique within a shard, so turns are tracked by their
+    database alias and id.
+
+    When given a `presence` tracker (see `api.presence`), games that none
+    of their players are online for when a deadline passes are considered
+    abandoned and ended instead of being advanced.
+    """
+
+    def __init__(self, window=timedelta(seconds=30), clock=datetime.now,
+                 presence=None):
+        self.window = window
+        self.clock = clock
+        self.presence = presence
+
+        self._heap = []
+        self._deadlines = {}
+        self._loaded_until = None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def schedule(self, alias, turn_id, deadline):
+        key = (alias, turn_id)
+        if self._deadlines.get(key) == deadline:
+            return
+
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, alias, turn_id))
+
+    def load(self, now):
+        horizon = now + self.window
+
+        for alias in all_databases():
+            upcoming = Turn.objects.using(alias).filter(
+                phase_deadline__lte=horizon
+            ).values_list('id', 'phase_deadline')
+
+            for turn_id, deadline in upcoming:
+                self.schedule(alias, turn_id, deadline)
+
+        self._loaded_until = horizon
+
+    def run_pending(self):
+        """
+        Advance every turn whose deadline has passed. Returns the number of
+        turns that were advanced.
+        """
+        now = self.clock()
+
+        if self._loaded_until is None or now >= self._loaded_until:
+            self.load(now)
+
+        advanced = 0
+        while self._heap and self._heap[0][0] <= now:
+            deadline, alias, turn_id = heapq.heappop(self._heap)
+
+            key = (alias, turn_id)
+            if self._deadlines.get(key) != deadline:
+                continue
+            del self._deadlines[key]
+
+            turn = self.advance(alias, turn_id, now)
+            if turn is None:
+                continue
+
+            advanced += 1
+            if turn.phase_deadline <= self._loaded_until:
+                self.schedule(alias, turn.id, turn.phase_deadline)
+
+        return advanced
+
+    def advance(self, alias, turn_id, now):
+        with transaction.atomic(using=alias):
+            try:
+                turns = Turn.objects.using(alias).select_for_update()
+                turn = turns.select_related('game').get(pk=turn_id)
+            except Turn.DoesNotExist:
+                return None
+
+            # The turn may have moved on since its deadline was loaded
+            if turn.phase_deadline is None or turn.phase_deadline > now:
+                return None
+
+            if turn.game.has_ended():
+                turn.phase_deadline = None
+                turn.save()
+                return None
+
+            if self.is_abandoned(turn.game):
+                turn.game.end()
+                turn.phase_deadline = None
+                turn.save()
+                return None
+
+            return turn.advance_phase()
+
+    def is_abandoned(self, game):
+        if self.presence is None:
+            return False
+
+        player_ids = game.players.filter(
+            time_withdrawn=None
+        ).values_list('id', flat=True)
+        return not self.presence.get_online(game.pk, player_ids)
+
+    def get_next_wakeup(self):
+        wakeups = [self._loaded_until]
+        if self._heap:
+            wakeups.append(self._heap[0][0])
+        return min(w for w in wakeups if w is not None)
+
+    def run_forever(self, max_sleep=1.0):
+        while True:
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception('Unable to advance turn phases')
+
+            delay = (self.get_next_wakeup() - self.clock()).total_seconds()
+            time.sleep(min(max(delay, 0), max_sleep))
@@ -1,15 +1,32 @@
-from .models import Game, Hut, Phases, Player, Resident, Role, Teams, Turn
+from collections import OrderedDict
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist
+
+from .models import (
+    Game, Hut, MatchTicket, Phases, Player, QueuedAction, Resident, Role,
+    Turn
+)
 
 from rest_framework import serializers
-from rest_framework.fields import SkipField
+from rest_framework.fields import Field, SkipField
 
 
 class DynamicFieldsModelSerializer(serializers.ModelSerializer):
     """
     A ModelSerializer that takes an additional `fields` argument that
     controls which fields should be displayed.
+
+    Instances are rendered from a precompiled list of field accessors rather
+    than going through every readable field's `get_attribute`. Fields backed
+    by a plain model column are read with an `attrgetter`; everything else
+    goes through the field as usual. Accessor lists are compiled once per
+    serializer class, field set and set of hidden fields (see
+    `get_hidden_fields`).
     """
 
+    _accessor_cache = {}
+
     def __init__(self, *args, **kwargs):
         # Don't pass the 'fields' arg up to the superclass
         fields = kwargs.pop('fields', None)
@@ -24,23 +41,91 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
             for field_name in existing - allowed:
                 self.fields.pop(field_name)
 
-    def filter_fields(self, instance, fields):
-        return fields
+        self._render_plans = {}
 
-    def to_representation(self, instance):
-        ret = {}
-        fields = self.filter_fields(instance, self._readable_fields)
+    def get_hidden_fields(self, instance):
+        """
+        Names of the fields that shouldn't be shown for `instance`. The
+        result is used as a cache key so it should be a hashable, sorted
+        collection (e.g. a tuple).
+        """
+        return ()
+
+    @classmethod
+    def compile_accessor(cls, field):
+        """
+        A fast getter for `field`, or `None` if the field's own
+        `get_attribute` has to be used
+        """
+        if field.source == '*':
+            return lambda instance: instance
+
+        if type(field).get_attribute is not Field.get_attribute:
+            return None
+
+        if len(field.source_attrs) != 1:
+            return None
+
+        try:
+            model_field = cls.Meta.model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            return None
+
+        # Relations may raise `ObjectDoesNotExist` and need the slow path
+        if not model_field.concrete or model_field.is_relation:
+            return None
+
+        return attrgetter(model_field.attname)
+
+    def get_accessors(self, hidden):
+        field_names = tuple(
+            name for name, field in self.fields.items()
+            if not field.write_only and name not in hidden
+        )
+
+        key = (type(self), field_names, hidden)
+        accessors = self._accessor_cache.get(key)
+
+        if accessors is None:
+            accessors = tuple(
+                (name, self.compile_accessor(self.fields[name]))
+                for name in field_names
+            )
+            self._accessor_cache[key] = accessors
 
-        for field in fields:
-            try:
-                attribute = field.get_attribute(instance)
-            except SkipField:
-                continue
+        return accessors
+
+    def get_render_plan(self, hidden):
+        # Accessors are shared by every serializer of the same class, but
+        # fields are bound to this serializer (and its context)
+        plan = self._render_plans.get(hidden)
+
+        if plan is None:
+            plan = [
+                (name, getter, self.fields[name])
+                for name, getter in self.get_accessors(hidden)
+            ]
+            self._render_plans[hidden] = plan
+
+        return plan
+
+    def to_representation(self, instance):
+        ret = OrderedDict()
+        plan = self.get_render_plan(self.get_hidden_fields(instance))
+
+        for field_name, getter, field in plan:
+            if getter is None:
+                try:
+                    attribute = field.get_attribute(instance)
+                except SkipField:
+                    continue
+            else:
+                attribute = getter(instance)
 
             if attribute is None:
-                ret[field.field_name] = None
+                ret[field_name] = None
             else:
-                ret[field.field_name] = field.to_representation(attribute)
+                ret[field_name] = field.to_representation(attribute)
 
         return ret
 
@@ -52,38 +137,41 @@ class RoleSerializer(serializers.ModelSerializer):
 
 
 class PlayerSerializer(DynamicFieldsModelSerializer):
+    """
+    Public player data, rendered the same for every viewer. Teams are
+    private and are only available from the team channel (see
+    `TeamSerializer`).
+
+    Whether players are online is only shown by views that pass the ids of
+    the players that are as `online_players` in the context.
+    """
     user = serializers.ReadOnlyField(source='user.username')
+    is_online = serializers.SerializerMethodField()
 
     class Meta:
         model = Player
-        fields = ('id', 'user', 'position', 'team')
+        fields = ('id', 'user', 'position', 'is_online')
         read_only_fields = (
             'user',
-            'team',
             'position',
         )
         depth = 2
 
-    def filter_fields(self, instance, fields):
-        is_werewolf_player = False
-        if 'request' in self.context:
-            try:
-                player = instance.game.get_player(
-                    self.context['request'].user.username
-                )
-            except Player.DoesNotExist:
-                pass
-            else:
-                if player.team == Teams.WEREWOLF.value:
-                    is_werewolf_player = True
+    def get_hidden_fields(self, instance):
+        if 'online_players' in self.context:
+            return ()
+        return ('is_online', )
+
+    def get_is_online(self, obj):
+        return obj.id in self.context['online_players']
+
 
-        return [
-            field for field in fields
-            if field.field_name != 'team' or is_werewolf_player
-        ]
+class TeamSerializer(serializers.Serializer):
+    team = serializers.CharField(read_only=True)
+    members = PlayerSerializer(read_only=True, many=True)
 
 
-class ResidentSerializer(serializers.ModelSerializer):
+class ResidentSerializer(DynamicFieldsModelSerializer):
     role = serializers.ReadOnlyField(source='role.role')
 
     class Meta:
@@ -95,10 +183,43 @@ class ResidentSerializer(serializers.ModelSerializer):
 class HutSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Hut
-        fields = ('position', 'time_eliminated', 'resident', 'votes')
+        fields = ('id', 'position', 'time_eliminated', 'resident', 'votes')
         read_only_fields = ('position', 'time_eliminated', 'resident', 'votes')
 
 
+class TurnSerializer(DynamicFieldsModelSerializer):
+
+    current_phase = serializers.SerializerMethodField()
+
+    current_player = PlayerSerializer(
+        read_only=True, fields=('id', 'user', 'position')
+    )
+
+    game = serializers.ReadOnlyField(source='game.id')
+
+    grand_inquisitor = PlayerSerializer(
+        read_only=True, fields=('id', 'user', 'position')
+    )
+
+    class Meta:
+        model = Turn
+        fields = (
+            'id', 'game', 'number', 'is_active', 'grand_inquisitor',
+            'current_phase', 'current_player'
+        )
+
+    def get_current_phase(self, obj):
+        return Phases(obj.current_phase).name
+
+
+class QueuedActionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QueuedAction
+        fields = (
+            'id', 'resident', 'target_hut', 'target_player', 'time_created'
+        )
+
+
 class GameSerializer(DynamicFieldsModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.user.username')
 
@@ -112,6 +233,7 @@ class GameSerializer(DynamicFieldsModelSerializer):
         many=True,
         fields=('id', 'position', 'time_eliminated', 'votes')
     )
+    active_turn = TurnSerializer(read_only=True)
 
     class Meta:
         model = Game
@@ -128,34 +250,52 @@ class GameSerializer(DynamicFieldsModelSerializer):
         )
         depth = 1
 
+    # Game lists only show fields that don't need related model data
+    list_fields = ('id', 'owner', 'time_created', 'time_started', 'time_ended')
+
     @classmethod
     def many_init(cls, *args, **kwargs):
-        kwargs['fields'] = (
-            'id', 'owner', 'time_created', 'time_started', 'time_ended'
-        )
+        kwargs.setdefault('fields', cls.list_fields)
         return super(GameSerializer, cls).many_init(*args, **kwargs)
 
 
-class TurnSerializer(DynamicFieldsModelSerializer):
-
+class UserGameSerializer(serializers.ModelSerializer):
+    """
+    A summary of one of the requesting user's games
+    """
     current_phase = serializers.SerializerMethodField()
+    is_my_turn = serializers.SerializerMethodField()
 
-    current_player = PlayerSerializer(
-        read_only=True, fields=('id', 'user', 'position')
-    )
+    class Meta:
+        model = Game
+        fields = (
+            'id', 'winning_team', 'time_created', 'time_started',
+            'time_ended', 'turn_number', 'current_phase', 'is_my_turn'
+        )
 
-    game = serializers.ReadOnlyField(source='game.id')
+    def get_current_phase(self, obj):
+        if obj.current_phase is None:
+            return None
+        return Phases(obj.current_phase).name
+
+    def get_is_my_turn(self, obj):
+        return obj.is_users_move(self.context['request'].user)
 
-    grand_inquisitor = PlayerSerializer(
-        read_only=True, fields=('id', 'user', 'position')
-    )
 
+class MatchTicketSerializer(serializers.ModelSerializer):
     class Meta:
-        model = Turn
+        model = MatchTicket
         fields = (
-            'id', 'game', 'number', 'is_active', 'grand_inquisitor',
-            'current_phase', 'current_player'
+            'id', 'player_count', 'preset', 'game_id', 'time_created',
+            'time_matched'
         )
+        read_only_fields = ('game_id', 'time_matched')
 
-    def get_current_phase(self, obj):
-        return Phases(obj.current_phase).name
+    def validate_player_count(self, value):
+        if not Game.MIN_PLAYERS <= value <= Game.MAX_PLAYERS:
+            raise serializers.ValidationError(
+                'Games have between %d and %d players' % (
+                    Game.MIN_PLAYERS, Game.MAX_PLAYERS
+                )
+            )
+        return value
@@ -0,0 +1,188 @@
+"""
+Horizontal sharding of game data by game id.
+
+Every per-game row (players, residents, huts, turns, actions, ...) lives on
+the same shard as its game, picked with `shard_for_game`. Game ids are
+allocated from a sequence on the `default` database so they are unique
+across shards (the sequence starts after the games created before sharding
+was enabled), and the shard of any game can be derived from the id alone
+(e.g. the `game_id` in a URL).
+
+Sharding is enabled by listing database aliases in `DATABASE_SHARDS`. Every
+shard gets the full schema, including the reference data seeded by
+migrations (roles), and users are copied to every shard when saved so that
+players can still be joined to their users. Sessions, users, jobs,
+matchmaking tickets and the id sequence itself are only ever read from and
+written to `default`.
+
+Game data is always read from its shard when sharding is enabled, so read
+replicas (see `werewolf.db`) are only used without shards.
+"""
+import heapq
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max
+
+from .models.id_sequence import IdSequence
+
+
+def get_shards():
+    return list(getattr(settings, 'DATABASE_SHARDS', None) or [])
+
+
+def is_enabled():
+    return bool(get_shards())
+
+
+def shard_for_game(game_id):
+    shards = get_shards()
+    if not shards:
+        return DEFAULT_DB_ALIAS
+    return shards[int(game_id) % len(shards)]
+
+
+def group_by_shard(game_ids):
+    """
+    The given game ids grouped by the alias of the shard they live on
+    """
+    groups = {}
+    for game_id in game_ids:
+        groups.setdefault(shard_for_game(game_id), []).append(game_id)
+    return groups
+
+
+def using_shard(queryset, alias):
+    """
+    `queryset` on the shard `alias`. Without sharding, the database is left
+    to the routers, so that reads can still go to a replica.
+    """
+    if not is_enabled():
+        return queryset
+    return queryset.using(alias)
+
+
+def all_databases():
+    return get_shards() or [DEFAULT_DB_ALIAS]
+
+
+# Sequences that take over the ids of an existing table, which they start
+# after the highest id of
+SEQUENCE_MODELS = {
+    'game': 'api.Game',
+}
+
+
+def initial_value(name):
+    """
+    The first id of a new sequence. Sequences that take over a table's ids
+    start after every id already in use, whichever database it is on.
+    """
+    label = SEQUENCE_MODELS.get(name)
+    if label is None:
+        return 1
+
+    model = apps.get_model(label)
+    aliases = set(all_databases()) | {DEFAULT_DB_ALIAS}
+
+    highest = [
+        model.objects.using(alias).aggregate(highest=Max('pk'))['highest']
+        for alias in aliases
+    ]
+    return max(h or 0 for h in highest) + 1
+
+
+def allocate_ids(name, count=1):
+    """
+    Reserve a block of `count` consecutive ids from the named sequence
+    """
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        sequences = IdSequence.objects.using(
+            DEFAULT_DB_ALIAS
+        ).select_for_update()
+
+        try:
+            sequence = sequences.get(name=name)
+        except IdSequence.DoesNotExist:
+            sequence, created = sequences.get_or_create(
+                name=name, defaults={'next_value': initial_value(name)}
+            )
+
+        start = sequence.next_value
+        sequence.next_value += count
+        sequence.save(using=DEFAULT_DB_ALIAS)
+
+    return list(range(start, start + count))
+
+
+def replicate_user(sender, instance, raw=False, using=None, **kwargs):
+    """
+    Copy users saved on the default database over to every shard
+    """
+    if not is_enabled() or using != DEFAULT_DB_ALIAS:
+        return
+
+    for alias in get_shards():
+        if alias != DEFAULT_DB_ALIAS:
+            instance.save_base(using=alias, raw=True)
+
+    instance._state.db = using
+
+
+def fan_out(queryset, key):
+    """
+    Run the same query on every shard and merge the results. Each shard's
+    results must already be sorted by `key`.
+    """
+    results = [
+        list(using_shard(queryset, alias)) for alias in all_databases()
+    ]
+    return list(heapq.merge(*results, key=key))
+
+
+class ShardRouter(object):
+    # Models that only ever live on the default database
+    GLOBAL_MODELS = ('auth.user', 'sessions.session', 'api.job',
+                     'api.idsequence', 'api.matchticket')
+
+    def get_game_id(self, instance):
+        if instance._meta.label_lower == 'api.game':
+            return instance.pk
+
+        return getattr(instance, 'game_id', None)
+
+    def db_for_model(self, model, **hints):
+        if not is_enabled():
+            return None
+
+        if model._meta.label_lower in self.GLOBAL_MODELS:
+            return DEFAULT_DB_ALIAS
+
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+
+        game_id = self.get_game_id(instance)
+        if game_id is None:
+            # e.g. a related lookup from a turn or a role. Django falls back
+            # to the database the instance was loaded from.
+            return None
+
+        return shard_for_game(game_id)
+
+    def db_for_read(self, model, **hints):
+        return self.db_for_model(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_model(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not is_enabled():
+            return None
+
+        # Users and roles are replicated to every shard
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,48 @@
+"""
+Cached snapshots of rendered game documents, keyed by version.
+
+A version is a hash of the document itself, so every client that has seen
+the same data has the same version, whoever they are. Snapshots are kept in
+the cache for `GAME_SNAPSHOT_TIMEOUT` seconds so that clients can be sent
+only what changed since the version they have (see `api.patch`).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def get_cache_key(game_id, version):
+    return 'game-snapshot:%s:%s' % (game_id, version)
+
+
+def freeze(data):
+    """
+    The plain JSON version of serializer `data` (dates rendered as strings
+    and so on) along with its version
+    """
+    content = json.dumps(
+        data, cls=JSONEncoder, sort_keys=True, separators=(',', ':')
+    )
+    version = hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    return json.loads(content), version
+
+
+def store(game_id, version, document):
+    # Documents never change for a given version
+    cache.add(
+        get_cache_key(game_id, version), document,
+        getattr(settings, 'GAME_SNAPSHOT_TIMEOUT', 300)
+    )
+
+
+def load(game_id, version):
+    """
+    The document of the given version, or `None` if it isn't cached (any
+    more)
+    """
+    return cache.get(get_cache_key(game_id, version))
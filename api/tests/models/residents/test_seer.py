@@ -3,7 +3,7 @@ from django.test import TestCase
 
 from ... import GameTestHelper
 from ....exceptions import APIException, APIExceptionCode
-from ....models import Roles
+from ....models import Hut, Roles
 from ....models.residents import Seer
 
 
@@ -17,6 +17,7 @@ class SeerTest(TestCase):
         game.start()
 
         game.add_resident(Roles.SEER)
+        player = GameTestHelper.start_night(game).current_player
 
         seer = Seer.objects.filter(
             game=game, role__role=Roles.SEER.value
@@ -26,18 +27,20 @@ class SeerTest(TestCase):
             role__role=Roles.VILLAGER.value
         ).first()
 
-        resident = seer.action(player=game.owner, target_hut=villager.hut)
+        resident = seer.action(player=player, target_hut=villager.hut)
         self.assertEquals(villager, resident)
 
     def test_action_mark_hut_as_visited(self):
         """
         Test that the Seer action will mark the target hut as visited
+        once the turn's actions are resolved
         """
 
         game = GameTestHelper.create_start_ready_game()
         game.start()
 
         game.add_resident(Roles.SEER)
+        player = GameTestHelper.start_night(game).current_player
 
         seer = Seer.objects.filter(
             game=game, role__role=Roles.SEER.value
@@ -47,8 +50,37 @@ class SeerTest(TestCase):
             role__role=Roles.VILLAGER.value
         ).first()
 
-        seer.action(player=game.owner, target_hut=villager.hut)
-        self.assertTrue(villager.hut.is_visited)
+        seer.action(player=player, target_hut=villager.hut)
+        self.assertFalse(Hut.objects.get(pk=villager.hut.pk).is_visited)
+
+        game.active_turn.end()
+        self.assertTrue(Hut.objects.get(pk=villager.hut.pk).is_visited)
+
+    def test_action_twice_in_one_turn(self):
+        """
+        Test that the Seer may only perform one action per turn
+        """
+
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        game.add_resident(Roles.SEER)
+        player = GameTestHelper.start_night(game).current_player
+
+        seer = Seer.objects.filter(
+            game=game, role__role=Roles.SEER.value
+        ).first()
+
+        villagers = game.residents.filter(role__role=Roles.VILLAGER.value)
+
+        seer.action(player=player, target_hut=villagers[0].hut)
+
+        with self.assertRaises(APIException) as ex:
+            seer.action(player=player, target_hut=villagers[1].hut)
+
+        self.assertEquals(
+            ex.exception.code, APIExceptionCode.ACTION_ALREADY_QUEUED
+        )
 
     def test_action_already_visited_target(self):
         """
@@ -59,6 +91,7 @@ class SeerTest(TestCase):
         game.start()
 
         game.add_resident(Roles.SEER)
+        player = GameTestHelper.start_night(game).current_player
 
         seer = Seer.objects.filter(
             game=game, role__role=Roles.SEER.value
@@ -70,7 +103,7 @@ class SeerTest(TestCase):
         villager.hut.is_visited = True
 
         with self.assertRaises(APIException) as ex:
-            seer.action(player=game.owner, target_hut=villager.hut)
+            seer.action(player=player, target_hut=villager.hut)
 
         self.assertEquals(
             ex.exception.code, APIExceptionCode.ACTION_INVALID_TARGET
@@ -85,6 +118,7 @@ class SeerTest(TestCase):
         game.start()
 
         game.add_resident(Roles.SEER)
+        player = GameTestHelper.start_night(game).current_player
 
         seer = Seer.objects.filter(
             game=game, role__role=Roles.VILLAGER.value
@@ -95,7 +129,89 @@ class SeerTest(TestCase):
         ).first()
 
         with self.assertRaises(APIException) as ex:
-            seer.action(player=game.owner, target_hut=villager.hut)
+            seer.action(player=player, target_hut=villager.hut)
+
+        self.assertEquals(
+            ex.exception.code, APIExceptionCode.ACTION_INVALID_ACTOR
+        )
+
+    def test_action_not_current_player(self):
+        """
+        Test that only the turn's current player may perform the action
+        """
+
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        game.add_resident(Roles.SEER)
+        turn = GameTestHelper.start_night(game)
+        other = game.players.exclude(pk=turn.current_player_id).first()
+
+        seer = Seer.objects.filter(
+            game=game, role__role=Roles.SEER.value
+        ).first()
+
+        villager = game.residents.filter(
+            role__role=Roles.VILLAGER.value
+        ).first()
+
+        with self.assertRaises(APIException) as ex:
+            seer.action(player=other, target_hut=villager.hut)
+
+        self.assertEquals(
+            ex.exception.code, APIExceptionCode.ACTION_INVALID_ACTOR
+        )
+        self.assertFalse(turn.queued_actions.exists())
+
+    def test_action_wrong_phase(self):
+        """
+        Test that the action can only be performed at night
+        """
+
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        game.add_resident(Roles.SEER)
+
+        seer = Seer.objects.filter(
+            game=game, role__role=Roles.SEER.value
+        ).first()
+
+        villager = game.residents.filter(
+            role__role=Roles.VILLAGER.value
+        ).first()
+
+        with self.assertRaises(APIException) as ex:
+            seer.action(
+                player=game.active_turn.current_player,
+                target_hut=villager.hut
+            )
+
+        self.assertEquals(
+            ex.exception.code, APIExceptionCode.TURN_INVALID_PHASE
+        )
+
+    def test_action_other_resident(self):
+        """
+        Test that players may only act through the resident they hold for
+        the turn
+        """
+
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        game.add_resident(Roles.SEER)
+        player = GameTestHelper.start_night(game).current_player
+
+        seer = Seer.objects.filter(
+            game=game, role__role=Roles.SEER.value
+        ).first()
+        villagers = game.residents.filter(role__role=Roles.VILLAGER.value)
+
+        villagers[0].queue_action(player, game.active_turn)
+
+        with self.assertRaises(APIException) as ex:
+            seer.action(player=player, target_hut=villagers[1].hut)
 
         self.assertEquals(
             ex.exception.code, APIExceptionCode.ACTION_INVALID_ACTOR
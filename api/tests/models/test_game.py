@@ -1,4 +1,5 @@
 from datetime import datetime
+from unittest.mock import patch
 
 from django.contrib.auth.models import User
 from django.test import TestCase
@@ -61,6 +62,23 @@ class GameTest(TestCase):
             APIExceptionCode.GAME_ALREADY_ENDED
         )
 
+    def test_join_game_ended_meanwhile(self):
+        """
+        Test that users cannot join lobbies that were ended after they were
+        loaded (e.g. by the lobby reaper)
+        """
+        game = GameTestHelper.create_game()
+        Game.objects.filter(pk=game.pk).update(time_ended=datetime.now())
+
+        with self.assertRaises(APIException) as error:
+            game.join(User.objects.create(username='other_user'))
+
+        self.assertEquals(
+            error.exception.code,
+            APIExceptionCode.GAME_ALREADY_ENDED
+        )
+        self.assertEquals(game.players.count(), 1)
+
     def test_join(self):
         """
         Test that users can successfully join games
@@ -75,6 +93,38 @@ class GameTest(TestCase):
         self.assertEquals(game.players.count(), 2)
         self.assertEquals(game.get_player('player').user, user)
 
+    def test_join_touches_game(self):
+        """
+        Test that joining a lobby counts as activity in it
+        """
+        game = GameTestHelper.create_game()
+        Game.objects.filter(pk=game.pk).update(
+            time_last_active=datetime(2000, 1, 1)
+        )
+
+        game.join(GameTestHelper.create_user())
+
+        self.assertGreater(
+            Game.objects.get(pk=game.pk).time_last_active,
+            datetime(2000, 1, 1)
+        )
+
+    def test_save_keeps_last_active(self):
+        """
+        Test that saving a game loaded before the last activity doesn't
+        revert it
+        """
+        game = GameTestHelper.create_game()
+        stale = Game.objects.get(pk=game.pk)
+        game.touch()
+
+        stale.save()
+
+        self.assertEquals(
+            Game.objects.get(pk=game.pk).time_last_active,
+            game.time_last_active
+        )
+
     def test_join_already_joined(self):
         """
         Test that users cannot join the same game twice (unless they left)
@@ -348,6 +398,88 @@ class GameTest(TestCase):
             active_turn.grand_inquisitor
         )
 
+    def test_start_turn_fields(self):
+        """
+        Test that starting a game copies the first turn onto the game
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        for game in (game, Game.objects.get(pk=game.pk)):
+            self.assertEquals(game.turn_number, 1)
+            self.assertEquals(game.current_phase, Phases.INITIAL.value)
+            self.assertEquals(
+                game.current_player_user_id, turn.current_player.user_id
+            )
+            self.assertTrue(game.is_users_move(turn.current_player.user))
+
+    def test_turn_fields_follow_turns(self):
+        """
+        Test that the game's turn fields follow phase and turn changes
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        turn.advance_phase()
+
+        game.refresh_from_db()
+        self.assertEquals(game.current_phase, Phases.DAY.value)
+
+        new_turn = turn.end()
+
+        game.refresh_from_db()
+        self.assertEquals(game.turn_number, new_turn.number)
+        self.assertEquals(
+            game.current_player_user_id, new_turn.current_player.user_id
+        )
+
+    def test_save_keeps_turn_fields(self):
+        """
+        Test that saving a game loaded before a turn change doesn't revert
+        the game's turn fields
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        stale = Game.objects.get(pk=game.pk)
+        new_turn = game.active_turn.end()
+
+        stale.save()
+
+        game.refresh_from_db()
+        self.assertEquals(game.turn_number, new_turn.number)
+
+    def test_end_turn_fields(self):
+        """
+        Test that nobody has a move left once the game has ended
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        game.end()
+
+        game.refresh_from_db()
+        self.assertIsNone(game.turn_number)
+        self.assertIsNone(game.current_phase)
+        self.assertIsNone(game.current_player_user_id)
+
+    def test_start_rolled_back_on_failure(self):
+        """
+        Test that a failed start does not leave the game half-started
+        """
+        game = GameTestHelper.create_start_ready_game()
+
+        with patch.object(Game, 'initialize_players', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                game.start()
+
+        game = Game.objects.get(pk=game.pk)
+        self.assertFalse(game.has_started())
+        self.assertIsNone(game.active_turn)
+        for hut in game.huts.all():
+            self.assertEquals(hut.position, 0)
+
     def test_get_team_allocation(self):
         expected_team_allocations = [
             # (size, (villager, werewolf))
@@ -383,6 +515,30 @@ class GameTest(TestCase):
         game.end()
         self.assertTrue(game.has_ended())
 
+    @patch('api.models.game.enqueue')
+    def test_start_enqueue_job(self, enqueue):
+        """
+        Test that starting a game queues its background job
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        enqueue.assert_called_once_with(
+            'game_started', using='default', game_id=game.id
+        )
+
+    @patch('api.models.game.enqueue')
+    def test_end_enqueue_job(self, enqueue):
+        """
+        Test that ending a game queues its background job
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.end()
+
+        enqueue.assert_called_once_with(
+            'game_ended', using='default', game_id=game.id
+        )
+
     def test_end_game_not_started(self):
         """
         Test that games can be ended even if it hasn't started
@@ -444,6 +600,21 @@ class GameTest(TestCase):
             game.players.get(position=2)
         )
 
+    def test_get_next_player_before_last_player(self):
+        """
+        Test that the player before the last one is followed by the last one
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        last_position = game.players.count()
+        self.assertEquals(
+            game.get_next_player(
+                game.players.get(position=last_position - 1)
+            ),
+            game.players.get(position=last_position)
+        )
+
     def test_get_next_player_after_last_player(self):
         """
         Test that the 'next' player loops around the back to first player
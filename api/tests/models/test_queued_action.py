@@ -0,0 +1,149 @@
+from unittest.mock import patch
+
+from django.db import transaction
+from django.db.models.query import QuerySet
+from django.test import TestCase
+
+from .. import GameTestHelper
+
+from ...exceptions import APIException, APIExceptionCode
+from ...models import Action, Game, QueuedAction, Roles
+
+
+class QueuedActionTest(TestCase):
+    def test_resolve(self):
+        """
+        Test that resolving a turn turns queued actions into actions
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        resident = game.residents.first()
+        target = game.huts.last()
+
+        resident.queue_action(game.owner, turn, target_hut=target)
+
+        actions = QueuedAction.objects.resolve(turn)
+
+        self.assertEquals(len(actions), 1)
+        self.assertEquals(actions[0].resident_id, resident.id)
+        self.assertEquals(actions[0].targets.get().hut, target)
+        self.assertFalse(turn.queued_actions.exists())
+
+    def test_resolve_concurrent_actions(self):
+        """
+        Test that actions inserted concurrently for the same turn are not
+        mistaken for the resolved ones
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        resident, other = game.residents.all()[:2]
+        resident.queue_action(game.owner, turn)
+
+        bulk_create = QuerySet.bulk_create
+
+        def racing_bulk_create(queryset, objs, *args, **kwargs):
+            created = bulk_create(queryset, objs, *args, **kwargs)
+            if queryset.model is Action:
+                Action.objects.create(
+                    turn=turn, player=game.owner, resident=other
+                )
+            return created
+
+        with patch.object(QuerySet, 'bulk_create', racing_bulk_create):
+            actions = QueuedAction.objects.resolve(turn)
+
+        self.assertEquals(len(actions), 1)
+        self.assertEquals(actions[0].resident_id, resident.id)
+
+    def test_queue_duplicate(self):
+        """
+        Test that queueing a resident's action twice in a turn is rejected
+        without breaking the surrounding transaction
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        resident = game.residents.first()
+
+        with transaction.atomic():
+            resident.queue_action(game.owner, turn)
+
+            with self.assertRaises(APIException) as ex:
+                resident.queue_action(game.owner, turn)
+
+            self.assertEquals(
+                ex.exception.code, APIExceptionCode.ACTION_ALREADY_QUEUED
+            )
+            self.assertEquals(turn.queued_actions.count(), 1)
+
+    def test_queue_second_resident(self):
+        """
+        Test that players can't queue actions through a second resident in
+        a turn, even when the first action is queued concurrently
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        resident, other = game.residents.all()[:2]
+
+        with transaction.atomic():
+            resident.queue_action(game.owner, turn)
+
+            with self.assertRaises(APIException) as ex:
+                other.queue_action(game.owner, turn)
+
+            self.assertEquals(
+                ex.exception.code, APIExceptionCode.ACTION_INVALID_ACTOR
+            )
+            self.assertEquals(turn.queued_actions.count(), 1)
+
+    def test_resolve_order(self):
+        """
+        Test that queued actions are resolved in role order, not submit order
+        """
+        game = GameTestHelper.create_game()
+        for role in (Roles.SEER, Roles.WEREWOLF, Roles.BODYGUARD):
+            game.add_resident(role)
+        for i in range(Game.RESIDENT_COUNT - 3):
+            game.add_resident(Roles.VILLAGER)
+
+        for i in range(Game.MIN_PLAYERS - 1):
+            game.join(GameTestHelper.create_user())
+        game.start()
+
+        turn = game.active_turn
+        players = game.players.all()
+        for player, role in zip(
+                players, (Roles.SEER, Roles.WEREWOLF, Roles.BODYGUARD)):
+            resident = game.residents.get(role__role=role.value)
+            resident.queue_action(player, turn)
+
+        QueuedAction.objects.resolve(turn)
+
+        self.assertEquals(
+            [
+                a.resident.role.role
+                for a in Action.objects.filter(turn=turn).order_by('id')
+            ],
+            [
+                Roles.BODYGUARD.value,
+                Roles.WEREWOLF.value,
+                Roles.SEER.value
+            ]
+        )
+
+    def test_resolve_without_actions(self):
+        """
+        Test that resolving a turn without queued actions does nothing
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        self.assertEquals(QueuedAction.objects.resolve(game.active_turn), [])
+        self.assertFalse(Action.objects.exists())
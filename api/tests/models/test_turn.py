@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 
 from .. import GameTestHelper
@@ -46,3 +48,165 @@ class PlayerTest(TestCase):
         )
 
         self.assertEquals(game.active_turn.number, current_turn.number + 1)
+
+    def test_end_ended_meanwhile(self):
+        """
+        Test that turns ended since they were loaded are not ended again
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        current_turn = game.active_turn
+        stale_turn = game.turns.get(pk=current_turn.pk)
+        current_turn.end()
+
+        with self.assertRaises(APIException) as error:
+            stale_turn.end()
+
+        self.assertEquals(
+            error.exception.code, APIExceptionCode.TURN_ALREADY_ENDED
+        )
+        self.assertEquals(game.turns.filter(is_active=True).count(), 1)
+        self.assertEquals(game.active_turn.number, current_turn.number + 1)
+
+    def test_end_rolled_back_on_failure(self):
+        """
+        Test that a turn stays active if the next turn could not be created
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        current_turn = game.active_turn
+
+        with patch('django.db.models.QuerySet.create', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                current_turn.end()
+
+        self.assertEquals(game.active_turn, current_turn)
+        self.assertTrue(game.active_turn.is_active)
+
+    def test_advance_phase(self):
+        """
+        Test that phases advance in order within the same turn
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        for phase in (Phases.DAY, Phases.VOTING, Phases.NIGHT):
+            self.assertEquals(turn.advance_phase(), turn)
+            self.assertEquals(turn.current_phase, phase.value)
+            self.assertIsNotNone(turn.phase_deadline)
+
+    def test_advance_phase_last_phase(self):
+        """
+        Test that advancing past the night ends the turn
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        turn.current_phase = Phases.NIGHT.value
+
+        new_turn = turn.advance_phase()
+
+        self.assertFalse(turn.is_active)
+        self.assertIsNone(turn.phase_deadline)
+        self.assertEquals(new_turn.number, turn.number + 1)
+        self.assertEquals(new_turn.current_phase, Phases.DAY.value)
+        self.assertEquals(game.active_turn, new_turn)
+
+    def test_advance_phase_already_ended(self):
+        """
+        Test that turns that have ended cannot be advanced
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        turn.end()
+
+        with self.assertRaises(APIException) as error:
+            turn.advance_phase()
+
+        self.assertEquals(
+            error.exception.code, APIExceptionCode.TURN_ALREADY_ENDED
+        )
+
+    def start_voting(self):
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        turn.current_phase = Phases.VOTING.value
+        turn.save()
+
+        return game, turn
+
+    def test_cast_vote(self):
+        """
+        Test that players can vote for a hut during the voting phase
+        """
+        game, turn = self.start_voting()
+        player = game.owner
+        hut = game.huts.first()
+
+        vote = turn.cast_vote(player, hut)
+
+        self.assertEquals(vote.hut, hut)
+        self.assertEquals(vote.player, player)
+        self.assertEquals(list(turn.votes.all()), [vote])
+
+    def test_cast_vote_changed(self):
+        """
+        Test that voting again withdraws the player's previous vote
+        """
+        game, turn = self.start_voting()
+        player = game.owner
+        first, second = game.huts.all()[:2]
+
+        previous = turn.cast_vote(player, first)
+        vote = turn.cast_vote(player, second)
+
+        self.assertEquals(
+            list(turn.votes.filter(time_removed=None)), [vote]
+        )
+        previous.refresh_from_db()
+        self.assertIsNotNone(previous.time_removed)
+
+    def test_cast_vote_invalid_phase(self):
+        """
+        Test that votes can only be cast during the voting phase
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        with self.assertRaises(APIException) as error:
+            game.active_turn.cast_vote(game.owner, game.huts.first())
+
+        self.assertEquals(
+            error.exception.code, APIExceptionCode.TURN_INVALID_PHASE
+        )
+
+    def test_cast_vote_other_game(self):
+        """
+        Test that players and huts of other games are rejected
+        """
+        game, turn = self.start_voting()
+        other = GameTestHelper.create_start_ready_game()
+        other.start()
+
+        with self.assertRaises(APIException) as error:
+            turn.cast_vote(other.owner, game.huts.first())
+
+        self.assertEquals(
+            error.exception.code, APIExceptionCode.VOTE_INVALID_VOTER
+        )
+
+        with self.assertRaises(APIException) as error:
+            turn.cast_vote(game.owner, other.huts.first())
+
+        self.assertEquals(
+            error.exception.code, APIExceptionCode.VOTE_INVALID_TARGET
+        )
+        self.assertFalse(turn.votes.exists())
@@ -0,0 +1,241 @@
+import asyncio
+import json
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.core.wsgi import get_wsgi_application
+from django.test import Client, TransactionTestCase
+
+from werewolf.asgi_handler import ASGIHandler
+
+from . import GameTestHelper
+from .. import async_views
+
+
+class ASGIHandlerTest(TransactionTestCase):
+    # Keep the roles created by migrations
+    serialized_rollback = True
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.handler = ASGIHandler(get_wsgi_application())
+
+    def tearDown(self):
+        self.handler.executor.shutdown(wait=True)
+        self.loop.close()
+
+    def login(self, user):
+        client = Client()
+        client.force_login(user)
+        return client.cookies['sessionid'].value
+
+    def request(self, *args, **kwargs):
+        return self.loop.run_until_complete(self.fetch(*args, **kwargs))
+
+    async def fetch(self, path, query_string=b'', session=None, method='GET',
+                    body=b'', headers=()):
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': query_string,
+            'server': ('testserver', 80),
+            'headers': [(b'host', b'testserver')] + list(headers),
+        }
+        if session:
+            scope['headers'].append(
+                (b'cookie', ('sessionid=%s' % session).encode())
+            )
+
+        messages = [{'type': 'http.request', 'body': body}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await self.handler(scope, receive, send)
+
+        start, body = sent
+        return start['status'], dict(start['headers']), body['body']
+
+    def test_request(self):
+        """
+        Test that requests are served by the Django application
+        """
+        game = GameTestHelper.create_game()
+        session = self.login(game.owner.user)
+
+        status, headers, body = self.request(
+            '/api/games/%d/' % game.id, session=session
+        )
+
+        self.assertEquals(status, 200)
+        self.assertEquals(headers[b'content-type'], b'application/json')
+        self.assertEquals(json.loads(body.decode())['id'], game.id)
+
+    def test_request_unauthenticated(self):
+        """
+        Test that authentication still applies
+        """
+        game = GameTestHelper.create_game()
+
+        status, headers, body = self.request('/api/games/%d/' % game.id)
+
+        self.assertEquals(status, 403)
+
+    def test_post(self):
+        """
+        Test that request bodies are passed along
+        """
+        game = GameTestHelper.create_game()
+        session = self.login(game.owner.user)
+
+        token = 'a' * 32
+        status, headers, body = self.request(
+            '/api/games/%d/residents/' % game.id, session=session,
+            method='POST', body=b'{"role": "seer"}', headers=[
+                (b'content-type', b'application/json'),
+                (b'cookie', ('csrftoken=%s' % token).encode()),
+                (b'x-csrftoken', token.encode()),
+            ]
+        )
+
+        self.assertEquals(status, 201)
+        self.assertEquals(json.loads(body.decode())['role'], 'seer')
+
+    def test_lifespan(self):
+        """
+        Test that the handler takes part in the server's lifespan
+        """
+        messages = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        self.loop.run_until_complete(
+            self.handler({'type': 'lifespan'}, receive, send)
+        )
+
+        self.assertEquals(
+            sent,
+            ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+
+    @patch.object(async_views, 'POLL_INTERVAL', 0.01)
+    def test_turn_history_wait(self):
+        """
+        Test that clients waiting for new turns get them once they show up
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        session = self.login(game.owner.user)
+
+        # SQLite tables are locked while written to, so the turn is ended on
+        # the same thread the waiting request polls from
+        self.handler.executor.shutdown(wait=True)
+        self.handler = ASGIHandler(
+            get_wsgi_application(), executor=ThreadPoolExecutor(max_workers=1)
+        )
+
+        def end_turn():
+            game.active_turn.end()
+            return True
+
+        async def end_turn_later():
+            await asyncio.sleep(0.05)
+            await self.handler.run_in_thread(end_turn)
+
+        self.loop.create_task(end_turn_later())
+        status, headers, body = self.request(
+            '/api/games/%d/turns/' % game.id,
+            query_string=b'since_number=1&wait=5', session=session
+        )
+
+        self.assertEquals(status, 200)
+        self.assertEquals(
+            [t['number'] for t in json.loads(body.decode())], [2]
+        )
+
+    @patch.object(async_views, 'POLL_INTERVAL', 0.01)
+    def test_turn_history_wait_timeout(self):
+        """
+        Test that clients get an empty list when nothing happens in time
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        session = self.login(game.owner.user)
+
+        status, headers, body = self.request(
+            '/api/games/%d/turns/' % game.id,
+            query_string=b'since_number=1&wait=0.05', session=session
+        )
+
+        self.assertEquals(status, 200)
+        self.assertEquals(json.loads(body.decode()), [])
+
+    @patch.object(async_views, 'POLL_INTERVAL', 0.01)
+    def test_turn_history_wait_batched(self):
+        """
+        Test that waiting clients are polled for together, on connections
+        that are kept open
+        """
+        games = []
+        for i in range(2):
+            game = GameTestHelper.create_start_ready_game()
+            game.start()
+            games.append((game, self.login(game.owner.user)))
+
+        latest_turn_numbers = async_views.latest_turn_numbers
+        polled = []
+
+        def poll(game_ids):
+            polled.append(sorted(int(game_id) for game_id in game_ids))
+            return latest_turn_numbers(game_ids)
+
+        async def wait_all():
+            return await asyncio.gather(*[
+                self.fetch(
+                    '/api/games/%d/turns/' % game.id,
+                    query_string=b'since_number=1&wait=0.1', session=session
+                )
+                for game, session in games
+            ])
+
+        with patch.object(async_views, 'latest_turn_numbers', poll), \
+                patch.object(async_views, 'close_old_connections') as close:
+            responses = self.loop.run_until_complete(wait_all())
+
+        self.assertEquals([r[0] for r in responses], [200, 200])
+        self.assertFalse(close.called)
+
+        # Each client checks once on its own before waiting, and then both
+        # games are checked by the same query
+        game_ids = sorted(game.id for game, session in games)
+        for game_id in game_ids:
+            self.assertIn([game_id], polled)
+        self.assertIn(game_ids, polled)
+
+    def test_turn_history_wait_forbidden(self):
+        """
+        Test that only participants get to wait for turns
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        session = self.login(GameTestHelper.create_user())
+
+        status, headers, body = self.request(
+            '/api/games/%d/turns/' % game.id,
+            query_string=b'since_number=1&wait=5', session=session
+        )
+
+        self.assertEquals(status, 403)
@@ -0,0 +1,82 @@
+from unittest.mock import Mock
+
+from django.test import SimpleTestCase
+
+from werewolf.pool import ConnectionPool
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        self.now = 0
+        self.pool = ConnectionPool(
+            max_size=2,
+            max_lifetime=100,
+            health_check_interval=10,
+            clock=lambda: self.now
+        )
+
+    def test_reuse_released_connection(self):
+        """
+        Test that released connections are handed out again
+        """
+        conn = self.pool.acquire(Mock)
+        self.pool.release(conn)
+
+        self.assertIs(self.pool.acquire(Mock), conn)
+        self.assertTrue(conn.rollback.called)
+        self.assertFalse(conn.close.called)
+
+    def test_max_size(self):
+        """
+        Test that connections released into a full pool are closed
+        """
+        conns = [self.pool.acquire(Mock) for i in range(3)]
+        for conn in conns:
+            self.pool.release(conn)
+
+        self.assertEquals(len(self.pool), 2)
+        self.assertTrue(conns[2].close.called)
+
+    def test_max_lifetime(self):
+        """
+        Test that connections are retired once past their lifetime
+        """
+        conn = self.pool.acquire(Mock)
+        self.pool.release(conn)
+
+        self.now = 100
+        self.assertIsNot(self.pool.acquire(Mock), conn)
+        self.assertTrue(conn.close.called)
+
+    def test_health_check(self):
+        """
+        Test that connections idle for too long are checked before reuse
+        """
+        conn = self.pool.acquire(Mock)
+        self.pool.release(conn)
+
+        self.now = 10
+        self.assertIs(self.pool.acquire(Mock), conn)
+        conn.cursor.return_value.execute.assert_called_once_with('SELECT 1')
+
+    def test_failed_health_check(self):
+        """
+        Test that connections failing their health check are discarded
+        """
+        conn = self.pool.acquire(Mock)
+        conn.cursor.side_effect = Exception
+        self.pool.release(conn)
+
+        self.now = 10
+        self.assertIsNot(self.pool.acquire(Mock), conn)
+        self.assertTrue(conn.close.called)
+
+    def test_release_discard(self):
+        """
+        Test that connections with errors are never returned to the pool
+        """
+        conn = self.pool.acquire(Mock)
+        self.pool.release(conn, discard=True)
+
+        self.assertEquals(len(self.pool), 0)
+        self.assertTrue(conn.close.called)
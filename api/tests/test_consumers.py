@@ -0,0 +1,389 @@
+import asyncio
+import json
+
+from django.core.wsgi import get_wsgi_application
+from django.test import Client, TransactionTestCase, override_settings
+
+from werewolf.asgi_handler import ASGIHandler
+
+from . import GameTestHelper
+from ..models import Phases, Teams
+
+
+class WebSocket(object):
+    """
+    A client connection to the handler, driven from the test's event loop
+    """
+
+    def __init__(self, handler, path, session=None,
+                 origin='http://testserver'):
+        scope = {'type': 'websocket', 'path': path, 'headers': []}
+        if origin:
+            scope['headers'].append((b'origin', origin.encode()))
+        if session:
+            scope['headers'].append(
+                (b'cookie', ('sessionid=%s' % session).encode())
+            )
+
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+
+        self.incoming.put_nowait({'type': 'websocket.connect'})
+        self.task = asyncio.ensure_future(
+            handler(scope, self.incoming.get, self.outgoing.put)
+        )
+
+    async def receive(self):
+        return await asyncio.wait_for(self.outgoing.get(), 5)
+
+    async def receive_json(self):
+        message = await self.receive()
+        return json.loads(message['text'])
+
+    def send_json(self, message):
+        self.incoming.put_nowait({
+            'type': 'websocket.receive', 'text': json.dumps(message)
+        })
+
+    async def close(self):
+        self.incoming.put_nowait({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(self.task, 5)
+
+
+class GameConsumerTest(TransactionTestCase):
+    # Keep the roles created by migrations
+    serialized_rollback = True
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.handler = ASGIHandler(get_wsgi_application())
+
+    def tearDown(self):
+        self.handler.executor.shutdown(wait=True)
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def login(self, user):
+        client = Client()
+        client.force_login(user)
+        return client.cookies['sessionid'].value
+
+    def start_voting(self):
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        turn.current_phase = Phases.VOTING.value
+        turn.save()
+
+        return game
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_unauthenticated(self):
+        """
+        Test that connections without a session are rejected
+        """
+        game = GameTestHelper.create_game()
+
+        async def connect():
+            socket = WebSocket(self.handler, '/ws/games/%d/' % game.id)
+            return await socket.receive()
+
+        message = self.run_async(connect())
+
+        self.assertEquals(message['type'], 'websocket.close')
+        self.assertEquals(message['code'], 4003)
+
+    def test_not_participant(self):
+        """
+        Test that only players of the game may connect
+        """
+        game = GameTestHelper.create_game()
+        session = self.login(GameTestHelper.create_user())
+
+        async def connect():
+            socket = WebSocket(
+                self.handler, '/ws/games/%d/' % game.id, session
+            )
+            return await socket.receive()
+
+        message = self.run_async(connect())
+
+        self.assertEquals(message['type'], 'websocket.close')
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_origin(self):
+        """
+        Test that only pages served by the allowed hosts may connect
+        """
+        game = GameTestHelper.create_game()
+        session = self.login(game.owner.user)
+
+        async def connect(origin):
+            socket = WebSocket(
+                self.handler, '/ws/games/%d/' % game.id, session,
+                origin=origin
+            )
+            message = await socket.receive()
+            if message['type'] == 'websocket.accept':
+                await socket.receive_json()
+                await socket.close()
+            return message
+
+        for origin in ('https://evil.example.com', 'null', None):
+            message = self.run_async(connect(origin))
+            self.assertEquals(message['type'], 'websocket.close')
+            self.assertEquals(message['code'], 4003)
+
+        message = self.run_async(connect('https://testserver:8443'))
+        self.assertEquals(message['type'], 'websocket.accept')
+
+        with self.settings(WEBSOCKET_ALLOWED_ORIGINS=['.example.com']):
+            message = self.run_async(connect('https://app.example.com'))
+            self.assertEquals(message['type'], 'websocket.accept')
+
+            message = self.run_async(connect('http://testserver'))
+            self.assertEquals(message['type'], 'websocket.close')
+
+    def test_unknown_path(self):
+        """
+        Test that connections to unknown paths are rejected
+        """
+        async def connect():
+            socket = WebSocket(self.handler, '/ws/unknown/')
+            return await socket.receive()
+
+        message = self.run_async(connect())
+
+        self.assertEquals(message['type'], 'websocket.close')
+
+    def test_state(self):
+        """
+        Test that players get the public state of the game once connected
+        """
+        game = self.start_voting()
+        session = self.login(game.owner.user)
+
+        async def connect():
+            socket = WebSocket(
+                self.handler, '/ws/games/%d/' % game.id, session
+            )
+            accept = await socket.receive()
+            state = await socket.receive_json()
+            await socket.close()
+            return accept, state
+
+        accept, state = self.run_async(connect())
+
+        self.assertEquals(accept['type'], 'websocket.accept')
+        self.assertEquals(state['type'], 'state')
+        self.assertEquals(state['state']['id'], game.id)
+        for player in state['state']['players']:
+            self.assertNotIn('team', player)
+
+    def test_team(self):
+        """
+        Test that only werewolves get their team and each other's messages
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        werewolf = game.players.filter(team=Teams.WEREWOLF.value).first()
+        villager = game.players.filter(team=Teams.VILLAGER.value).first()
+        path = '/ws/games/%d/' % game.id
+
+        async def play():
+            wolf = WebSocket(self.handler, path, self.login(werewolf.user))
+            other = WebSocket(self.handler, path, self.login(villager.user))
+
+            await wolf.receive()
+            await wolf.receive_json()
+            team = await wolf.receive_json()
+
+            await other.receive()
+            await other.receive_json()
+
+            other.send_json({'type': 'team_message', 'text': 'hello'})
+            rejected = await other.receive_json()
+
+            wolf.send_json({'type': 'team_message', 'text': 'tonight'})
+            reply = await wolf.receive_json()
+            message = await wolf.receive_json()
+
+            await wolf.close()
+            await other.close()
+            return team, rejected, message, reply, other.outgoing.empty()
+
+        team, rejected, message, reply, empty = self.run_async(play())
+
+        self.assertEquals(team['type'], 'team')
+        self.assertEquals(
+            [p['id'] for p in team['members']], [werewolf.id]
+        )
+        self.assertEquals(rejected['type'], 'error')
+        self.assertEquals(message, {
+            'type': 'team.message', 'player': werewolf.id, 'text': 'tonight'
+        })
+        self.assertEquals(reply['type'], 'ok')
+        self.assertTrue(empty)
+
+    def test_vote_broadcast(self):
+        """
+        Test that a vote is acknowledged to the voter and the resulting
+        changes are sent to every connected player
+        """
+        game = self.start_voting()
+        # Werewolves would also get their team when connecting
+        voter, other = game.players.filter(team=Teams.VILLAGER.value)[:2]
+        hut = game.huts.first()
+        path = '/ws/games/%d/' % game.id
+
+        async def play():
+            first = WebSocket(self.handler, path, self.login(voter.user))
+            second = WebSocket(self.handler, path, self.login(other.user))
+            for socket in (first, second):
+                await socket.receive()
+                await socket.receive_json()
+
+            first.send_json({'type': 'vote', 'hut': hut.id, 'id': 1})
+
+            # The diff is published as the vote commits, so it may reach the
+            # voter before the reply does
+            messages = [
+                await first.receive_json(), await first.receive_json()
+            ]
+            reply = next(m for m in messages if m['type'] == 'ok')
+            diffs = [
+                next(m for m in messages if m['type'] == 'state.diff'),
+                await second.receive_json()
+            ]
+
+            await first.close()
+            await second.close()
+            return reply, diffs
+
+        reply, diffs = self.run_async(play())
+
+        self.assertEquals(reply, {'type': 'ok', 'id': 1})
+        self.assertEquals(diffs[0], diffs[1])
+        self.assertEquals(diffs[0]['type'], 'state.diff')
+        self.assertEquals(list(diffs[0]['changes']), ['huts'])
+
+        votes = next(
+            h['votes'] for h in diffs[0]['changes']['huts']
+            if h['id'] == hut.id
+        )
+        self.assertEquals(len(votes), 1)
+        self.assertEquals(game.active_turn.votes.get().player, voter)
+
+    def test_rest_broadcast(self):
+        """
+        Test that changes made through the REST API are sent to connected
+        players
+        """
+        game = GameTestHelper.create_game()
+        user = GameTestHelper.create_user()
+
+        client = Client()
+        client.force_login(user)
+
+        def join():
+            return client.post('/api/games/%d/join/' % game.id).status_code
+
+        async def play():
+            socket = WebSocket(
+                self.handler, '/ws/games/%d/' % game.id,
+                self.login(game.owner.user)
+            )
+            await socket.receive()
+            await socket.receive_json()
+
+            status = await self.handler.run_in_thread(join)
+            diff = await socket.receive_json()
+
+            await socket.close()
+            return status, diff
+
+        status, diff = self.run_async(play())
+
+        self.assertEquals(status, 200)
+        self.assertEquals(diff['type'], 'state.diff')
+        self.assertEquals(list(diff['changes']), ['players'])
+        self.assertIn(
+            user.username,
+            [p['user'] for p in diff['changes']['players']]
+        )
+
+    def test_turn_end_broadcast(self):
+        """
+        Test that turns ended outside of any connection (e.g. by the phase
+        scheduler) are sent to connected players once, as they commit
+        """
+        game = self.start_voting()
+        player = game.players.filter(team=Teams.VILLAGER.value).first()
+        turn = game.active_turn
+
+        async def play():
+            socket = WebSocket(
+                self.handler, '/ws/games/%d/' % game.id,
+                self.login(player.user)
+            )
+            await socket.receive()
+            await socket.receive_json()
+
+            await self.handler.run_in_thread(turn.end)
+            diff = await socket.receive_json()
+
+            await socket.close()
+            return diff, socket.outgoing.empty()
+
+        diff, empty = self.run_async(play())
+
+        self.assertEquals(diff['type'], 'state.diff')
+        self.assertEquals(
+            diff['changes']['active_turn']['number'], turn.number + 1
+        )
+        self.assertTrue(empty)
+
+    def test_error(self):
+        """
+        Test that rejected commands are answered with an error and nothing
+        is broadcast
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        # Werewolves would also get their team when connecting
+        player = game.players.filter(
+            is_owner=False, team=Teams.VILLAGER.value
+        ).first()
+
+        async def play():
+            socket = WebSocket(
+                self.handler, '/ws/games/%d/' % game.id,
+                self.login(player.user)
+            )
+            await socket.receive()
+            await socket.receive_json()
+
+            socket.send_json({'type': 'vote', 'hut': game.huts.first().id})
+            vote = await socket.receive_json()
+
+            socket.send_json({'type': 'end_turn'})
+            end_turn = await socket.receive_json()
+
+            socket.send_json({'type': 'vote'})
+            invalid = await socket.receive_json()
+
+            await socket.close()
+            return vote, end_turn, invalid, socket.outgoing.empty()
+
+        vote, end_turn, invalid, empty = self.run_async(play())
+
+        self.assertEquals(vote['type'], 'error')
+        self.assertEquals(vote['code'], 3001)
+        self.assertEquals(end_turn['type'], 'error')
+        self.assertEquals(invalid['type'], 'error')
+        self.assertTrue(empty)
@@ -0,0 +1,149 @@
+import json
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from ..jobs import JobWorker, enqueue, enqueue_many, register
+from ..models import Job, JobStatus
+
+
+@register('test_job')
+def run_test_job(value):
+    if value == 'fail':
+        raise ValueError(value)
+
+
+class EnqueueTest(TransactionTestCase):
+    def test_enqueue_after_commit(self):
+        """
+        Test that jobs are only queued once the transaction commits
+        """
+        with transaction.atomic():
+            enqueue('test_job', value=1)
+            self.assertFalse(Job.objects.exists())
+
+        job = Job.objects.get()
+        self.assertEquals(job.name, 'test_job')
+        self.assertEquals(json.loads(job.payload), {'value': 1})
+        self.assertEquals(job.status, JobStatus.PENDING.value)
+
+    def test_enqueue_rolled_back(self):
+        """
+        Test that jobs are dropped if the transaction is rolled back
+        """
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                enqueue('test_job', value=1)
+                raise ValueError
+
+        self.assertFalse(Job.objects.exists())
+
+    def test_enqueue_many(self):
+        """
+        Test that several jobs are queued at once after the transaction
+        commits
+        """
+        with transaction.atomic():
+            enqueue_many('test_job', [{'value': 1}, {'value': 2}])
+            self.assertFalse(Job.objects.exists())
+
+        self.assertEquals(
+            sorted(json.loads(j.payload)['value'] for j in Job.objects.all()),
+            [1, 2]
+        )
+
+
+class JobWorkerTest(TestCase):
+    def create_job(self, value):
+        return Job.objects.create(
+            name='test_job', payload=json.dumps({'value': value})
+        )
+
+    def test_run_once(self):
+        """
+        Test that workers run pending jobs and mark them as done
+        """
+        job = self.create_job('ok')
+
+        self.assertTrue(JobWorker().run_once())
+
+        job = Job.objects.get(pk=job.pk)
+        self.assertEquals(job.status, JobStatus.DONE.value)
+        self.assertEquals(job.attempts, 1)
+        self.assertIsNotNone(job.time_finished)
+
+    def test_run_once_empty_queue(self):
+        """
+        Test that workers do nothing when there are no pending jobs
+        """
+        self.assertFalse(JobWorker().run_once())
+
+    def test_claim_already_claimed(self):
+        """
+        Test that jobs claimed by another worker are not run again
+        """
+        job = self.create_job('ok')
+
+        worker = JobWorker()
+        self.assertEquals(worker.claim(), job)
+        self.assertIsNone(worker.claim())
+
+    def test_claim_abandoned(self):
+        """
+        Test that jobs left running past the visibility timeout are claimed
+        again while they have attempts left
+        """
+        job = self.create_job('ok')
+
+        worker = JobWorker(visibility_timeout=60)
+        self.assertEquals(worker.claim(), job)
+        self.assertIsNone(worker.claim())
+
+        # The worker running the job died without finishing it
+        Job.objects.filter(pk=job.pk).update(
+            time_started=datetime.now() - timedelta(seconds=61)
+        )
+
+        job = worker.claim()
+        self.assertEquals(job.status, JobStatus.RUNNING.value)
+        self.assertEquals(job.attempts, 2)
+
+        worker.run(job)
+        job = Job.objects.get(pk=job.pk)
+        self.assertEquals(job.status, JobStatus.DONE.value)
+
+    def test_claim_abandoned_without_attempts(self):
+        """
+        Test that abandoned jobs are not claimed again once they are out of
+        attempts
+        """
+        job = self.create_job('ok')
+        Job.objects.filter(pk=job.pk).update(
+            status=JobStatus.RUNNING.value,
+            attempts=Job.MAX_ATTEMPTS,
+            time_started=datetime.now() - timedelta(seconds=61)
+        )
+
+        self.assertIsNone(JobWorker(visibility_timeout=60).claim())
+
+    @patch('api.jobs.logger')
+    def test_run_failing_job(self, logger):
+        """
+        Test that failing jobs are retried up to their maximum attempts
+        """
+        job = self.create_job('fail')
+        worker = JobWorker()
+
+        for i in range(Job.MAX_ATTEMPTS - 1):
+            worker.run_once()
+            job = Job.objects.get(pk=job.pk)
+            self.assertEquals(job.status, JobStatus.PENDING.value)
+
+        worker.run_once()
+        job = Job.objects.get(pk=job.pk)
+        self.assertEquals(job.status, JobStatus.FAILED.value)
+        self.assertEquals(job.attempts, Job.MAX_ATTEMPTS)
+        self.assertIn('fail', job.error)
@@ -0,0 +1,116 @@
+from django.test import TestCase, override_settings
+
+from . import GameTestHelper
+
+from ..matchmaking import Matcher
+from ..models import Game, MatchTicket, Presets, Role
+
+
+class MatcherTest(TestCase):
+    def queue(self, count, player_count=3, preset=Presets.BASIC):
+        return [
+            MatchTicket.objects.create(
+                user=GameTestHelper.create_user(),
+                player_count=player_count,
+                preset=preset.value
+            )
+            for i in range(count)
+        ]
+
+    def test_match(self):
+        """
+        Test that a full group of tickets is turned into a lobby that is
+        ready to start
+        """
+        tickets = self.queue(3)
+
+        self.assertEquals(Matcher().match(), 1)
+
+        tickets = [MatchTicket.objects.get(pk=t.pk) for t in tickets]
+        game = Game.objects.get(pk=tickets[0].game_id)
+        for ticket in tickets:
+            self.assertEquals(ticket.game_id, game.pk)
+            self.assertIsNotNone(ticket.time_matched)
+
+        players = list(game.players.order_by('position'))
+        self.assertEquals(
+            [p.user_id for p in players], [t.user_id for t in tickets]
+        )
+        self.assertEquals(game.owner.user_id, tickets[0].user_id)
+
+        self.assertEquals(
+            sorted(r.role.role for r in game.residents.all()),
+            sorted(r.value for r in Presets.BASIC.get_roles())
+        )
+        self.assertEquals(game.huts.count(), Game.RESIDENT_COUNT)
+
+        game.start()
+        self.assertTrue(game.has_started())
+
+    def test_incomplete_group(self):
+        """
+        Test that tickets are left waiting until their group is full
+        """
+        tickets = self.queue(2)
+
+        self.assertEquals(Matcher().match(), 0)
+        self.assertFalse(Game.objects.exists())
+
+        self.queue(1)
+
+        self.assertEquals(Matcher().match(), 1)
+        self.assertIsNotNone(MatchTicket.objects.get(pk=tickets[0].pk).game_id)
+
+    def test_group_by_preferences(self):
+        """
+        Test that only tickets with the same preferences are matched
+        together
+        """
+        self.queue(2, preset=Presets.BASIC)
+        self.queue(2, preset=Presets.CHAOS)
+        self.queue(2, player_count=4)
+
+        self.assertEquals(Matcher().match(), 0)
+
+    def test_batches(self):
+        """
+        Test that every game the queue allows is formed, whatever the batch
+        size
+        """
+        self.queue(7)
+        self.queue(4, player_count=4, preset=Presets.CLASSIC)
+
+        self.assertEquals(Matcher(batch_size=4).match(), 3)
+        self.assertEquals(MatchTicket.objects.filter(game_id=None).count(), 1)
+
+    def test_presets(self):
+        """
+        Test that every preset makes games with a valid set of residents
+        """
+        for preset in Presets:
+            roles = preset.get_roles()
+            self.assertEquals(len(roles), Game.RESIDENT_COUNT)
+
+            for role in set(roles):
+                max_count = Role.objects.get(role=role.value).max_count
+                if max_count is not None:
+                    self.assertLessEqual(roles.count(role), max_count)
+
+    @override_settings(DATABASE_SHARDS=['default'])
+    def test_match_sharded(self):
+        """
+        Test that sharded games get their ids from the game sequence
+        """
+        tickets = self.queue(6)
+
+        self.assertEquals(Matcher().match(), 2)
+
+        game_ids = set(
+            MatchTicket.objects.filter(
+                pk__in=[t.pk for t in tickets]
+            ).values_list('game_id', flat=True)
+        )
+        self.assertEquals(game_ids, {1, 2})
+        for game in Game.objects.filter(pk__in=game_ids):
+            self.assertEquals(game.players.count(), 3)
+            self.assertEquals(game.huts.count(), Game.RESIDENT_COUNT)
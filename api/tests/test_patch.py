@@ -0,0 +1,76 @@
+import copy
+
+from django.test import TestCase
+
+from ..patch import apply_patch, make_patch
+
+
+class PatchTest(TestCase):
+    def assertPatches(self, old, new):
+        patch = make_patch(old, new)
+        self.assertEquals(apply_patch(copy.deepcopy(old), patch), new)
+        return patch
+
+    def test_unchanged(self):
+        """
+        Test that equal documents need no operations
+        """
+        document = {'a': [1, {'b': 2}]}
+        self.assertEquals(make_patch(document, copy.deepcopy(document)), [])
+
+    def test_objects(self):
+        """
+        Test that only the changed keys of objects are patched
+        """
+        patch = self.assertPatches(
+            {'id': 1, 'time_started': None, 'owner': 'user1'},
+            {'id': 1, 'time_started': '2016-01-01', 'winning_team': None}
+        )
+
+        self.assertEquals(patch, [
+            {'op': 'remove', 'path': '/owner'},
+            {'op': 'replace', 'path': '/time_started', 'value': '2016-01-01'},
+            {'op': 'add', 'path': '/winning_team', 'value': None},
+        ])
+
+    def test_lists(self):
+        """
+        Test that lists of the same length are patched item by item
+        """
+        patch = self.assertPatches(
+            {'huts': [{'id': 1, 'votes': []}, {'id': 2, 'votes': []}]},
+            {'huts': [{'id': 1, 'votes': []}, {'id': 2, 'votes': [3]}]}
+        )
+
+        self.assertEquals(patch, [
+            {'op': 'replace', 'path': '/huts/1/votes', 'value': [3]},
+        ])
+
+    def test_lists_resized(self):
+        """
+        Test that lists that changed size are replaced
+        """
+        patch = self.assertPatches(
+            {'players': [{'id': 1}]}, {'players': [{'id': 1}, {'id': 2}]}
+        )
+
+        self.assertEquals(patch, [{
+            'op': 'replace', 'path': '/players',
+            'value': [{'id': 1}, {'id': 2}]
+        }])
+
+    def test_escaped_keys(self):
+        """
+        Test that keys with slashes and tildes are escaped in paths
+        """
+        patch = self.assertPatches({'a/b': 1, 'c~d': 2}, {'a/b': 2, 'c~d': 3})
+
+        self.assertEquals(
+            sorted(op['path'] for op in patch), ['/a~1b', '/c~0d']
+        )
+
+    def test_root(self):
+        """
+        Test that documents of different types are replaced whole
+        """
+        self.assertPatches({'a': 1}, [1, 2])
@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from ..presence import PresenceTracker
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class PresenceTrackerTest(TestCase):
+    def setUp(self):
+        caches[settings.PRESENCE_CACHE].clear()
+        self.clock = Clock()
+        self.tracker = PresenceTracker(
+            ttl=60, write_interval=15, clock=self.clock
+        )
+
+    def test_heartbeat(self):
+        """
+        Test that players are online after a heartbeat until the TTL passes
+        """
+        self.tracker.heartbeat(1, 2)
+
+        self.assertTrue(self.tracker.is_online(1, 2))
+        self.assertFalse(self.tracker.is_online(1, 3))
+        self.assertFalse(self.tracker.is_online(2, 2))
+
+        self.clock.now += 60
+        self.assertFalse(self.tracker.is_online(1, 2))
+
+    def test_shared(self):
+        """
+        Test that heartbeats received by other processes are seen through
+        the shared store
+        """
+        other = PresenceTracker(ttl=60, write_interval=15, clock=self.clock)
+        other.heartbeat(1, 2)
+
+        self.assertEquals(self.tracker.get_online(1, [2, 3]), {2})
+
+    def test_shared_cache(self):
+        """
+        Test that heartbeats reach trackers that have their own connection
+        to a shared cache, like those of other processes
+        """
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+
+        cache = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }
+        with override_settings(CACHES={'api': cache, 'scheduler': cache}):
+            api = PresenceTracker(
+                ttl=60, write_interval=15, clock=self.clock, cache_alias='api'
+            )
+            scheduler = PresenceTracker(
+                ttl=60, write_interval=15, clock=self.clock,
+                cache_alias='scheduler'
+            )
+            self.assertIsNot(api.cache, scheduler.cache)
+            self.assertTrue(scheduler.is_shared())
+
+            api.heartbeat(1, 2)
+
+            self.assertEquals(scheduler.get_online(1, [2, 3]), {2})
+
+    def test_local_cache(self):
+        """
+        Test that local memory caches are not shared across processes
+        """
+        with override_settings(CACHES={'presence': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            self.assertFalse(PresenceTracker().is_shared())
+
+    def test_writes_throttled(self):
+        """
+        Test that heartbeats are written to the shared store at most once
+        per interval
+        """
+        with patch.object(self.tracker.cache, 'set') as cache_set:
+            for i in range(10):
+                self.tracker.heartbeat(1, 2)
+                self.clock.now += 1
+
+            self.assertEquals(cache_set.call_count, 1)
+
+            self.clock.now += 5
+            self.tracker.heartbeat(1, 2)
+
+            self.assertEquals(cache_set.call_count, 2)
+
+    def test_prune(self):
+        """
+        Test that heartbeats of players that went away are dropped
+        """
+        self.tracker.heartbeat(1, 2)
+
+        self.clock.now += 60
+        self.tracker.heartbeat(1, 3)
+
+        self.assertEquals(list(self.tracker._seen), [(1, 3)])
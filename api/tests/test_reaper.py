@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from . import GameTestHelper
+
+from ..models import Game
+from ..reaper import LobbyReaper
+
+
+@patch('api.reaper.enqueue_many')
+class LobbyReaperTest(TestCase):
+    def create_reaper(self, minutes, **kwargs):
+        # A reaper running `minutes` from now
+        now = datetime.now() + timedelta(minutes=minutes)
+        return LobbyReaper(
+            max_idle=timedelta(minutes=30), clock=lambda: now, **kwargs
+        )
+
+    def test_reap_stale_lobby(self, enqueue_many):
+        """
+        Test that lobbies nobody has been active in are ended and a
+        `game_ended` job is queued for them
+        """
+        game = GameTestHelper.create_game()
+
+        self.assertEquals(self.create_reaper(31).reap(), 1)
+
+        self.assertIsNotNone(Game.objects.get(pk=game.pk).time_ended)
+        enqueue_many.assert_called_once_with(
+            'game_ended', [{'game_id': game.pk}], using='default'
+        )
+
+    def test_skip_active_lobby(self, enqueue_many):
+        """
+        Test that lobbies with recent activity are left alone
+        """
+        game = GameTestHelper.create_game()
+
+        self.assertEquals(self.create_reaper(29).reap(), 0)
+
+        self.assertIsNone(Game.objects.get(pk=game.pk).time_ended)
+        self.assertFalse(enqueue_many.called)
+
+    def test_skip_started_game(self, enqueue_many):
+        """
+        Test that games that have started are never reaped
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        self.assertEquals(self.create_reaper(60).reap(), 0)
+        self.assertIsNone(Game.objects.get(pk=game.pk).time_ended)
+
+    def test_reap_empty_lobby(self, enqueue_many):
+        """
+        Test that lobbies everyone has left are reaped once nobody has
+        been active for long enough
+        """
+        game = GameTestHelper.create_game()
+        game.players.get().leave_game()
+
+        self.assertEquals(self.create_reaper(29).reap(), 0)
+        self.assertEquals(self.create_reaper(31).reap(), 1)
+
+    def test_joined_while_reaping(self, enqueue_many):
+        """
+        Test that lobbies joined after being picked as stale are not ended
+        """
+        games = [GameTestHelper.create_game() for i in range(2)]
+        reaper = self.create_reaper(31)
+        get_stale_ids = reaper.get_stale_ids
+
+        def join_after_select(alias, cutoff):
+            game_ids = get_stale_ids(alias, cutoff)
+            Game.objects.filter(pk=games[0].pk).update(
+                time_last_active=reaper.clock()
+            )
+            return game_ids
+
+        reaper.get_stale_ids = join_after_select
+
+        self.assertEquals(reaper.reap(), 1)
+
+        self.assertIsNone(Game.objects.get(pk=games[0].pk).time_ended)
+        self.assertIsNotNone(Game.objects.get(pk=games[1].pk).time_ended)
+        enqueue_many.assert_called_once_with(
+            'game_ended', [{'game_id': games[1].pk}], using='default'
+        )
+
+    def test_batches(self, enqueue_many):
+        """
+        Test that stale lobbies are ended in batches
+        """
+        games = [GameTestHelper.create_game() for i in range(5)]
+
+        self.assertEquals(self.create_reaper(31, batch_size=2).reap(), 5)
+
+        self.assertEquals(enqueue_many.call_count, 3)
+        self.assertFalse(
+            Game.objects.filter(
+                pk__in=[g.pk for g in games], time_ended=None
+            ).exists()
+        )
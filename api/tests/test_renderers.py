@@ -0,0 +1,156 @@
+import json
+import unittest
+
+from django.test import Client, TestCase
+
+from . import GameTestHelper
+from ..models import Phases, Roles, Teams
+from ..patch import apply_patch
+from ..renderers import (
+    PHASE_CODES, ROLE_CODES, TEAM_CODES, MessagePackRenderer, encode_enums,
+    encode_patch, msgpack
+)
+
+
+class EncodeEnumsTest(TestCase):
+    def test_codes(self):
+        """
+        Test that every enum member has a unique code
+        """
+        for enum, codes in ((Teams, TEAM_CODES), (Roles, ROLE_CODES),
+                            (Phases, PHASE_CODES)):
+            self.assertEquals(set(codes), set(enum))
+            self.assertEquals(len(set(codes.values())), len(codes))
+
+    def test_encode(self):
+        """
+        Test that enum fields are replaced by their codes
+        """
+        data = {
+            'winning_team': 'werewolf',
+            'players': [{'id': 1, 'team': 'villager'}],
+            'residents': [{'id': 2, 'role': 'seer'}],
+            'active_turn': {'current_phase': 'VOTING'},
+        }
+
+        self.assertEquals(encode_enums(data), {
+            'winning_team': 1,
+            'players': [{'id': 1, 'team': 0}],
+            'residents': [{'id': 2, 'role': 2}],
+            'active_turn': {'current_phase': 2},
+        })
+
+    def test_encode_other_values(self):
+        """
+        Test that unknown and missing enum values are left alone
+        """
+        data = {'team': None, 'role': 'unknown', 'name': 'seer'}
+        self.assertEquals(encode_enums(data), data)
+
+    def test_encode_patch(self):
+        """
+        Test that patch values are encoded by the field their path points to
+        """
+        operations = [
+            {'op': 'replace', 'path': '/active_turn/current_phase',
+             'value': 'NIGHT'},
+            {'op': 'add', 'path': '/players/0', 'value': {'team': 'werewolf'}},
+            {'op': 'replace', 'path': '/name', 'value': 'seer'},
+            {'op': 'remove', 'path': '/winning_team'},
+        ]
+
+        self.assertEquals(encode_patch(operations), [
+            {'op': 'replace', 'path': '/active_turn/current_phase',
+             'value': 3},
+            {'op': 'add', 'path': '/players/0', 'value': {'team': 1}},
+            {'op': 'replace', 'path': '/name', 'value': 'seer'},
+            {'op': 'remove', 'path': '/winning_team'},
+        ])
+
+
+@unittest.skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackRendererTest(TestCase, GameTestHelper):
+    def test_render(self):
+        """
+        Test that data is rendered as MessagePack
+        """
+        content = MessagePackRenderer().render({'id': 1, 'team': 'werewolf'})
+        self.assertEquals(
+            msgpack.unpackb(content, raw=False), {'id': 1, 'team': 1}
+        )
+
+    def test_render_empty(self):
+        """
+        Test that empty responses have no content
+        """
+        self.assertEquals(MessagePackRenderer().render(None), b'')
+
+    def test_negotiate(self):
+        """
+        Test that clients get MessagePack by asking for it
+        """
+        game = self.create_start_ready_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        url = '/api/games/%d/' % game.id
+        response = client.get(url, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEquals(response['Content-Type'], 'application/msgpack')
+
+        data = msgpack.unpackb(response.content, raw=False)
+        self.assertEquals(data['id'], game.id)
+        self.assertEquals(data['residents'][0]['role'], 0)
+        self.assertLess(
+            len(response.content), len(client.get(url).content)
+        )
+
+    def test_negotiate_patch(self):
+        """
+        Test that patches sent as MessagePack apply to MessagePack documents
+        """
+        game = self.create_start_ready_game()
+        game.start()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        url = '/api/games/%d/' % game.id
+        response = client.get(url, HTTP_ACCEPT='application/msgpack')
+        previous = msgpack.unpackb(response.content, raw=False)
+        version = response['ETag'].strip('"')
+
+        self.start_night(game)
+
+        response = client.get(
+            url, {'since_version': version}, HTTP_ACCEPT='application/msgpack'
+        )
+
+        self.assertEquals(response['IM'], 'json-patch')
+
+        patched = apply_patch(
+            previous, msgpack.unpackb(response.content, raw=False)
+        )
+        current = client.get(url, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEquals(
+            patched, msgpack.unpackb(current.content, raw=False)
+        )
+        self.assertEquals(patched['active_turn']['current_phase'], 3)
+
+    def test_negotiate_default(self):
+        """
+        Test that clients get JSON unless they ask for MessagePack
+        """
+        game = self.create_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/%d/' % game.id)
+
+        self.assertEquals(response['Content-Type'], 'application/json')
+        self.assertEquals(
+            json.loads(response.content.decode())['id'], game.id
+        )
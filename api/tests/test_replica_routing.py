@@ -0,0 +1,186 @@
+import time
+
+from datetime import datetime
+
+from django.contrib.sessions.models import Session
+from django.db import connections
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from werewolf.db import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware
+
+from . import GameTestHelper
+from ..models import Game
+from ..views import GameViewSet
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TestCase):
+    def setUp(self):
+        self.request = RequestFactory()
+        self.router = ReplicaRouter()
+        self.middleware = ReplicaRoutingMiddleware()
+        self.view = GameViewSet.as_view({'get': 'retrieve'})
+
+    def route(self, request, view=None):
+        self.middleware.process_view(request, view or self.view, (), {})
+        db = self.router.db_for_read(Game)
+        self.middleware.process_response(request, HttpResponse())
+        return db
+
+    def test_safe_request(self):
+        """
+        Test that safe requests read from a replica
+        """
+        self.assertEquals(self.route(self.request.get('/')), 'replica')
+
+    def test_safe_request_reset(self):
+        """
+        Test that replica routing doesn't leak past the end of the request
+        """
+        self.route(self.request.get('/'))
+        self.assertIsNone(self.router.db_for_read(Game))
+
+    def test_unsafe_request(self):
+        """
+        Test that unsafe requests only use the primary
+        """
+        self.assertIsNone(self.route(self.request.post('/')))
+
+    def test_view_without_replica(self):
+        """
+        Test that views need to opt in to replica routing
+        """
+        def view(request):
+            pass
+
+        self.assertIsNone(self.route(self.request.get('/'), view=view))
+
+    def test_pinned_after_write(self):
+        """
+        Test that clients read from the primary shortly after a write
+        """
+        request = self.request.post('/')
+        self.middleware.process_view(request, self.view, (), {})
+        response = self.middleware.process_response(request, HttpResponse())
+
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        request = self.request.get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        self.assertIsNone(self.route(request))
+
+    def test_pin_expired(self):
+        """
+        Test that clients go back to the replicas once their pin expires
+        """
+        request = self.request.get('/')
+        request.COOKIES[PIN_COOKIE] = str(time.time() - 1)
+        self.assertEquals(self.route(request), 'replica')
+
+    def test_write(self):
+        """
+        Test that writes always go to the primary
+        """
+        self.middleware.process_view(self.request.get('/'), self.view, (), {})
+        self.assertEquals(self.router.db_for_write(Game), 'default')
+
+    def test_allow_migrate(self):
+        """
+        Test that replicas are never migrated directly
+        """
+        self.assertFalse(self.router.allow_migrate('replica', 'api'))
+        self.assertIsNone(self.router.allow_migrate('default', 'api'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaDatabaseTest(TestCase):
+    multi_db = True
+
+    def setUp(self):
+        self.request = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware()
+        self.view = GameViewSet.as_view({'get': 'retrieve'})
+
+        # The replica lags behind and has yet to receive the second game
+        self.game = Game.objects.create()
+        Game.objects.using('replica').create(pk=self.game.pk)
+        Game.objects.create()
+
+    def read(self, request):
+        self.middleware.process_view(request, self.view, (), {})
+        try:
+            return list(Game.objects.values_list('id', flat=True))
+        finally:
+            self.middleware.process_response(request, HttpResponse())
+
+    def test_read_replica(self):
+        """
+        Test that safe requests read their rows from the replica database
+        """
+        self.assertEquals(self.read(self.request.get('/')), [self.game.pk])
+
+    def test_read_pinned(self):
+        """
+        Test that pinned clients read their rows from the primary database
+        """
+        request = self.request.get('/')
+        request.COOKIES[PIN_COOKIE] = str(time.time() + 5)
+
+        self.assertEquals(len(self.read(request)), 2)
+
+    def test_write_replica_instance(self):
+        """
+        Test that rows read from the replica are saved to the primary
+        """
+        request = self.request.get('/')
+        self.middleware.process_view(request, self.view, (), {})
+        try:
+            game = Game.objects.get(pk=self.game.pk)
+            self.assertEquals(game._state.db, 'replica')
+
+            game.time_started = datetime.now()
+            game.save()
+        finally:
+            self.middleware.process_response(request, HttpResponse())
+
+        self.assertIsNotNone(Game.objects.get(pk=self.game.pk).time_started)
+        self.assertIsNone(
+            Game.objects.using('replica').get(pk=self.game.pk).time_started
+        )
+
+    def replicate(self, *instances):
+        for instance in instances:
+            instance.save_base(using='replica', raw=True, force_insert=True)
+
+    def test_game_requests(self):
+        """
+        Test that game requests read every row, the game's included, from
+        the replica
+        """
+        game = GameTestHelper.create_game()
+        owner = game.owner
+
+        client = Client()
+        client.force_login(owner.user)
+        session = Session.objects.get()
+
+        self.replicate(owner.user, session, game, owner)
+
+        paths = (
+            '/api/games/%d/' % game.pk,
+            '/api/games/',
+            '/api/games/%d/players/' % game.pk,
+        )
+        for path in paths:
+            with CaptureQueriesContext(connections['default']) as primary, \
+                    CaptureQueriesContext(connections['replica']) as replica:
+                response = client.get(path)
+
+            self.assertEquals(response.status_code, 200)
+            self.assertFalse(primary.captured_queries)
+            self.assertTrue(any(
+                'FROM "api_game"' in q['sql']
+                for q in replica.captured_queries
+            ))
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from . import GameTestHelper
+
+from ..models import Game, Phases, Turn
+from ..presence import PresenceTracker
+from ..scheduler import PhaseScheduler
+
+
+class PhaseSchedulerTest(TestCase):
+    def setUp(self):
+        caches[settings.PRESENCE_CACHE].clear()
+
+    def create_started_game(self):
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        return game
+
+    def test_advance_expired_phase(self):
+        """
+        Test that turns are advanced once their phase deadline has passed
+        """
+        game = self.create_started_game()
+        turn = game.active_turn
+
+        now = turn.phase_deadline + timedelta(seconds=1)
+        scheduler = PhaseScheduler(clock=lambda: now)
+
+        self.assertEquals(scheduler.run_pending(), 1)
+
+        turn = Turn.objects.get(pk=turn.pk)
+        self.assertEquals(turn.current_phase, Phases.DAY.value)
+        self.assertGreater(turn.phase_deadline, now)
+
+    def test_skip_pending_phase(self):
+        """
+        Test that turns whose deadline hasn't passed yet are left alone
+        """
+        game = self.create_started_game()
+        turn = game.active_turn
+
+        now = turn.phase_deadline - timedelta(seconds=1)
+        scheduler = PhaseScheduler(clock=lambda: now)
+
+        self.assertEquals(scheduler.run_pending(), 0)
+        self.assertEquals(len(scheduler), 1)
+        self.assertEquals(
+            Turn.objects.get(pk=turn.pk).current_phase, Phases.INITIAL.value
+        )
+
+    def test_skip_stale_deadline(self):
+        """
+        Test that turns that moved on after being loaded are not advanced
+        """
+        game = self.create_started_game()
+        turn = game.active_turn
+
+        deadline = turn.phase_deadline
+        now = deadline - timedelta(seconds=1)
+        scheduler = PhaseScheduler(clock=lambda: now)
+        scheduler.run_pending()
+
+        # Players ended the turn before the deadline
+        new_turn = turn.end()
+
+        now = deadline + timedelta(seconds=1)
+        scheduler.clock = lambda: now
+        self.assertEquals(scheduler.run_pending(), 0)
+        self.assertEquals(
+            Turn.objects.get(pk=new_turn.pk).current_phase, Phases.DAY.value
+        )
+
+    def test_skip_ended_games(self):
+        """
+        Test that turns of ended games are never advanced
+        """
+        game = self.create_started_game()
+        turn = game.active_turn
+        game.end()
+
+        now = turn.phase_deadline + timedelta(seconds=1)
+        scheduler = PhaseScheduler(clock=lambda: now)
+
+        self.assertEquals(scheduler.run_pending(), 0)
+        self.assertIsNone(Turn.objects.get(pk=turn.pk).phase_deadline)
+
+    def test_advance_within_window(self):
+        """
+        Test that deadlines set while advancing are scheduled without
+        another database load if they fall within the loaded window
+        """
+        game = self.create_started_game()
+        turn = game.active_turn
+
+        now = turn.phase_deadline + timedelta(seconds=1)
+        scheduler = PhaseScheduler(
+            window=timedelta(hours=1), clock=lambda: now
+        )
+        scheduler.run_pending()
+
+        self.assertEquals(len(scheduler), 1)
+        self.assertIsInstance(scheduler.get_next_wakeup(), datetime)
+
+    def test_end_abandoned(self):
+        """
+        Test that games nobody is online for are ended instead of advanced
+        """
+        game = self.create_started_game()
+        turn = game.active_turn
+
+        now = turn.phase_deadline + timedelta(seconds=1)
+        presence = PresenceTracker()
+        scheduler = PhaseScheduler(clock=lambda: now, presence=presence)
+
+        self.assertEquals(scheduler.run_pending(), 0)
+
+        turn = Turn.objects.get(pk=turn.pk)
+        self.assertEquals(turn.current_phase, Phases.INITIAL.value)
+        self.assertIsNone(turn.phase_deadline)
+        self.assertTrue(Game.objects.get(pk=game.pk).has_ended())
+
+    def test_advance_online(self):
+        """
+        Test that games with a player online are advanced as usual
+        """
+        game = self.create_started_game()
+        turn = game.active_turn
+
+        now = turn.phase_deadline + timedelta(seconds=1)
+        presence = PresenceTracker()
+        presence.heartbeat(game.pk, game.owner.pk)
+        scheduler = PhaseScheduler(clock=lambda: now, presence=presence)
+
+        self.assertEquals(scheduler.run_pending(), 1)
+        self.assertEquals(
+            Turn.objects.get(pk=turn.pk).current_phase, Phases.DAY.value
+        )
+
+    def test_end_abandoned_local_cache(self):
+        """
+        Test that the scheduler refuses to end abandoned games when it can't
+        see the heartbeats received by other processes
+        """
+        with self.assertRaises(CommandError):
+            call_command('run_phase_scheduler', end_abandoned=True)
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+
+from django.test import RequestFactory, TestCase
+
+from rest_framework import serializers
+
+from . import GameTestHelper
+from ..models import Teams
+from ..serializers import HutSerializer, PlayerSerializer, TurnSerializer
+
+
+class DynamicFieldsModelSerializerTest(TestCase, GameTestHelper):
+    def setUp(self):
+        self.request = RequestFactory()
+
+    def assertSameRepresentation(self, serializer, instance):
+        representation = serializer.to_representation(instance)
+
+        self.assertIsInstance(representation, OrderedDict)
+        self.assertEquals(
+            list(representation.items()),
+            list(serializers.ModelSerializer.to_representation(
+                serializer, instance
+            ).items())
+        )
+
+    def test_same_representation(self):
+        """
+        Test that the compiled path renders the same data as the generic one
+        """
+        game = self.create_start_ready_game()
+        game.start()
+
+        self.assertSameRepresentation(
+            HutSerializer(), game.huts.first()
+        )
+        self.assertSameRepresentation(
+            TurnSerializer(), game.active_turn
+        )
+        self.assertSameRepresentation(
+            PlayerSerializer(fields=('id', 'user', 'position')),
+            game.owner
+        )
+
+    def test_accessors(self):
+        """
+        Test that only plain model columns get fast accessors
+        """
+        accessors = dict(TurnSerializer().get_accessors(()))
+
+        self.assertIsNotNone(accessors['number'])
+        self.assertIsNotNone(accessors['current_phase'])
+        self.assertIsNone(accessors['current_player'])
+        self.assertIsNone(accessors['game'])
+
+    def test_accessors_cached(self):
+        """
+        Test that accessors are compiled once per class, fields and hidden
+        fields
+        """
+        first = PlayerSerializer().get_accessors(('position', ))
+
+        self.assertIs(PlayerSerializer().get_accessors(('position', )), first)
+        self.assertIsNot(PlayerSerializer().get_accessors(()), first)
+        self.assertIsNot(
+            PlayerSerializer(fields=('id', )).get_accessors(('position', )),
+            first
+        )
+        self.assertNotIn('position', dict(first))
+
+    def test_viewer_independent(self):
+        """
+        Test that players are rendered the same for every viewer, werewolves
+        included
+        """
+        game = self.create_start_ready_game()
+        game.start()
+
+        werewolf = game.players.filter(team=Teams.WEREWOLF.value).first()
+        other = game.players.exclude(pk=werewolf.pk).first()
+
+        request = self.request.get('/')
+        request.user = werewolf.user
+
+        self.assertEquals(
+            PlayerSerializer(other, context={'request': request}).data,
+            PlayerSerializer(other).data
+        )
+        self.assertNotIn('team', PlayerSerializer(other).data)
@@ -0,0 +1,259 @@
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+
+from . import GameTestHelper
+from ..models import Game, IdSequence, Job, Player, Role
+from ..sharding import (
+    ShardRouter, allocate_ids, fan_out, group_by_shard, shard_for_game
+)
+
+
+class ShardForGameTest(TestCase):
+    def test_not_sharded(self):
+        """
+        Test that every game lives on the default database without shards
+        """
+        self.assertEquals(shard_for_game(1), 'default')
+        self.assertEquals(shard_for_game(2), 'default')
+
+    @override_settings(DATABASE_SHARDS=['shard_0', 'shard_1'])
+    def test_sharded(self):
+        """
+        Test that games are spread across the shards by id
+        """
+        self.assertEquals(shard_for_game(1), 'shard_1')
+        self.assertEquals(shard_for_game(2), 'shard_0')
+        self.assertEquals(shard_for_game('3'), 'shard_1')
+
+    @override_settings(DATABASE_SHARDS=['shard_0', 'shard_1'])
+    def test_invalid_id(self):
+        """
+        Test that non numeric game ids are rejected
+        """
+        with self.assertRaises(ValueError):
+            shard_for_game('abc')
+
+    @override_settings(DATABASE_SHARDS=['shard_0', 'shard_1'])
+    def test_group_by_shard(self):
+        """
+        Test that game ids are grouped by their shard in order
+        """
+        self.assertEquals(group_by_shard([1, 2, 3, 4]), {
+            'shard_0': [2, 4],
+            'shard_1': [1, 3],
+        })
+
+
+class AllocateIdsTest(TestCase):
+    def test_allocate(self):
+        """
+        Test that ids are allocated in consecutive blocks
+        """
+        self.assertEquals(allocate_ids('game'), [1])
+        self.assertEquals(allocate_ids('game', 3), [2, 3, 4])
+        self.assertEquals(allocate_ids('game'), [5])
+
+    def test_separate_sequences(self):
+        """
+        Test that every sequence is allocated independently
+        """
+        allocate_ids('game', 10)
+        self.assertEquals(allocate_ids('ticket'), [1])
+
+    @override_settings(DATABASE_SHARDS=['default'])
+    def test_game_id(self):
+        """
+        Test that sharded games get their id from the game sequence
+        """
+        allocate_ids('game', 41)
+
+        game = Game.objects.create()
+        self.assertEquals(game.pk, 42)
+        self.assertEquals(
+            IdSequence.objects.get(name='game').next_value, 43
+        )
+
+    @override_settings(DATABASE_SHARDS=['default'])
+    def test_seed_from_games(self):
+        """
+        Test that the game sequence starts after the games created before
+        sharding was enabled
+        """
+        with self.settings(DATABASE_SHARDS=[]):
+            games = [Game.objects.create() for i in range(3)]
+
+        game = Game.objects.create()
+        self.assertEquals(game.pk, games[-1].pk + 1)
+
+    def test_game_id_not_sharded(self):
+        """
+        Test that games use the database's own ids without shards
+        """
+        Game.objects.create()
+        self.assertFalse(IdSequence.objects.exists())
+
+
+@override_settings(DATABASE_SHARDS=['shard_0', 'shard_1'])
+class ShardRouterTest(TestCase):
+    def setUp(self):
+        self.router = ShardRouter()
+
+    def test_game(self):
+        """
+        Test that games are routed by their own id
+        """
+        self.assertEquals(
+            self.router.db_for_write(Game, instance=Game(pk=3)), 'shard_1'
+        )
+
+    def test_game_data(self):
+        """
+        Test that per-game rows are routed to their game's shard
+        """
+        self.assertEquals(
+            self.router.db_for_read(Player, instance=Player(game_id=4)),
+            'shard_0'
+        )
+
+    def test_related_lookup(self):
+        """
+        Test that lookups through a game are routed to the game's shard
+        """
+        self.assertEquals(
+            self.router.db_for_read(Player, instance=Game(pk=5)), 'shard_1'
+        )
+
+    def test_global_models(self):
+        """
+        Test that users and jobs only live on the default database
+        """
+        self.assertEquals(
+            self.router.db_for_read(User, instance=Player(game_id=5)),
+            'default'
+        )
+        self.assertEquals(self.router.db_for_write(Job), 'default')
+
+    def test_no_hints(self):
+        """
+        Test that lookups without a game fall back to Django's default
+        """
+        self.assertIsNone(self.router.db_for_read(Game))
+        self.assertIsNone(self.router.db_for_read(Role, instance=Role()))
+
+    @override_settings(DATABASE_SHARDS=[])
+    def test_not_sharded(self):
+        """
+        Test that the router stays out of the way without shards
+        """
+        self.assertIsNone(self.router.db_for_write(User))
+        self.assertIsNone(
+            self.router.db_for_read(Player, instance=Player(game_id=4))
+        )
+
+
+class FanOutTest(TestCase):
+    def test_merge(self):
+        """
+        Test that results from every shard are merged in order
+        """
+        class FakeQuerySet(object):
+            def using(self, alias):
+                return {'shard_0': [1, 4, 6], 'shard_1': [2, 3, 5]}[alias]
+
+        with self.settings(DATABASE_SHARDS=['shard_0', 'shard_1']):
+            self.assertEquals(
+                fan_out(FakeQuerySet(), key=lambda x: x), [1, 2, 3, 4, 5, 6]
+            )
+
+
+@override_settings(DATABASE_SHARDS=['default'])
+class ShardedViewsTest(TestCase, GameTestHelper):
+    def setUp(self):
+        self.client = Client()
+        self.user = self.create_user()
+        self.client.force_login(self.user)
+
+    def test_create_game(self):
+        """
+        Test that games created through the API are allocated an id
+        """
+        allocate_ids('game', 9)
+
+        response = self.client.post('/api/games/')
+
+        self.assertEquals(response.status_code, 201)
+        self.assertEquals(response.data['id'], 10)
+
+    def test_list_games(self):
+        """
+        Test that lobbies are listed from every shard
+        """
+        games = [self.create_game(owner=self.user) for i in range(3)]
+
+        response = self.client.get('/api/games/')
+
+        self.assertEquals(
+            [g['id'] for g in response.data], [g.id for g in games]
+        )
+
+
+@override_settings(DATABASE_SHARDS=['default', 'shard_1'])
+class ShardedDatabasesTest(TestCase, GameTestHelper):
+    multi_db = True
+
+    def setUp(self):
+        self.client = Client()
+        self.user = self.create_user()
+        self.client.force_login(self.user)
+
+    def test_create_game(self):
+        """
+        Test that games and their players are written to their game's shard
+        """
+        ids = [self.client.post('/api/games/').data['id'] for i in range(2)]
+        self.assertEquals(ids, [1, 2])
+
+        self.assertEquals(
+            list(Game.objects.using('shard_1').values_list('id', flat=True)),
+            [1]
+        )
+        self.assertEquals(
+            list(Game.objects.using('default').values_list('id', flat=True)),
+            [2]
+        )
+        self.assertEquals(
+            list(Player.objects.using('shard_1').values_list(
+                'game_id', flat=True
+            )),
+            [1]
+        )
+        self.assertEquals(
+            list(Player.objects.using('default').values_list(
+                'game_id', flat=True
+            )),
+            [2]
+        )
+
+    def test_get_game(self):
+        """
+        Test that games are read from their own shard
+        """
+        game = self.create_game(owner=self.user)
+        self.assertEquals(game._state.db, 'shard_1')
+
+        response = self.client.get('/api/games/%d/' % game.id)
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.data['id'], game.id)
+
+    def test_list_games(self):
+        """
+        Test that lobbies are listed from both shards
+        """
+        games = [self.create_game(owner=self.user) for i in range(3)]
+
+        response = self.client.get('/api/games/')
+
+        self.assertEquals(
+            [g['id'] for g in response.data], [g.id for g in games]
+        )
@@ -9,7 +9,8 @@ from django.test import Client, RequestFactory, TestCase
 from rest_framework import status
 
 from .. import GameTestHelper
-from ...models import Game
+from ...models import Game, Phases, Roles, Teams
+from ...patch import apply_patch
 
 
 class GameViewTest(TestCase):
@@ -53,6 +54,23 @@ class GameViewTest(TestCase):
             self.assertNotIn('residents', game_data)
             self.assertNotIn('residents', game_data)
 
+    def test_get_game_list_ended(self):
+        """
+        Test that ended games are not listed
+        """
+        game = GameTestHelper.create_game()
+        ended = GameTestHelper.create_game()
+        ended.time_ended = datetime.now()
+        ended.save()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/')
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals([g['id'] for g in response.json()], [game.id])
+
     def test_get_game(self):
         """
         Test that game detail views should include model relationships
@@ -72,6 +90,416 @@ class GameViewTest(TestCase):
         self.assertIn('residents', response_json)
         self.assertIn('residents', response_json)
 
+    def test_get_game_version(self):
+        """
+        Test that games are sent with a version that is the same for every
+        player
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        versions = set()
+        for player in game.players.all():
+            client = Client()
+            client.force_login(player.user)
+
+            response = client.get('/api/games/%d/' % game.id)
+            versions.add(response['ETag'])
+
+        self.assertEquals(len(versions), 1)
+
+    def test_get_game_patch(self):
+        """
+        Test that clients passing the version they have get a JSON Patch to
+        the current version
+        """
+        game = GameTestHelper.create_start_ready_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/%d/' % game.id)
+        previous = response.json()
+        version = response['ETag'].strip('"')
+
+        game.start()
+
+        response = client.get(
+            '/api/games/%d/' % game.id, {'since_version': version}
+        )
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            response['Content-Type'], 'application/json-patch+json'
+        )
+        self.assertEquals(response['IM'], 'json-patch')
+
+        patched = apply_patch(previous, json.loads(response.content.decode()))
+        current = client.get('/api/games/%d/' % game.id)
+
+        self.assertEquals(patched, current.json())
+        self.assertEquals(response['ETag'], current['ETag'])
+
+    def test_get_game_patch_unchanged(self):
+        """
+        Test that clients that are up to date get an empty patch
+        """
+        game = GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        version = client.get('/api/games/%d/' % game.id)['ETag'].strip('"')
+        response = client.get(
+            '/api/games/%d/' % game.id, {'since_version': version}
+        )
+
+        self.assertEquals(json.loads(response.content.decode()), [])
+
+    def test_get_game_patch_unknown_version(self):
+        """
+        Test that the full game is sent when the client's version isn't
+        cached
+        """
+        game = GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get(
+            '/api/games/%d/' % game.id, {'since_version': 'unknown'}
+        )
+
+        self.assertEquals(response['Content-Type'], 'application/json')
+        self.assertNotIn('IM', response)
+        self.assertEquals(response.json()['id'], game.id)
+
+    def test_get_started_game(self):
+        """
+        Test that game detail views include the active turn once started
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/%d/' % game.id)
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            response.json()['active_turn']['id'], game.active_turn.id
+        )
+
+    def test_get_game_fields(self):
+        """
+        Test that clients can pick the fields they need
+        """
+        game = GameTestHelper.create_start_ready_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/%d/?fields=id,owner' % game.id)
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            response.json(), {'id': game.id, 'owner': game.owner.user.username}
+        )
+
+    def test_get_game_fields_queries(self):
+        """
+        Test that related data is only loaded for the requested fields
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        # Session, user, game and active turn
+        with self.assertNumQueries(4):
+            response = client.get(
+                '/api/games/%d/?fields=active_turn' % game.id
+            )
+
+        self.assertEquals(
+            response.json()['active_turn']['id'], game.active_turn.id
+        )
+
+    def test_get_game_list_without_owner(self):
+        """
+        Test that games without an owner are listed without one
+        """
+        game = GameTestHelper.create_game()
+        game.players.filter(is_owner=True).delete()
+
+        client = Client()
+        client.force_login(GameTestHelper.create_user())
+
+        response = client.get('/api/games/?fields=id,owner')
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(response.json(), [{'id': game.id, 'owner': None}])
+
+    def test_get_game_list_include(self):
+        """
+        Test that clients can include related data in game lists
+        """
+        game = GameTestHelper.create_start_ready_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/?include=players')
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        game_data = response.json()[0]
+
+        self.assertEquals(len(game_data['players']), Game.MIN_PLAYERS)
+        self.assertIn('owner', game_data)
+        self.assertNotIn('residents', game_data)
+
+    def test_get_game_unknown_fields(self):
+        """
+        Test that unknown fields are ignored
+        """
+        game = GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/%d/?fields=id,password' % game.id)
+
+        self.assertEquals(response.json(), {'id': game.id})
+
+    def test_batch(self):
+        """
+        Test that several games are fetched in the order asked for with the
+        same number of queries however many there are
+        """
+        user = GameTestHelper.create_user()
+        games = []
+        for i in range(5):
+            game = GameTestHelper.create_start_ready_game()
+            game.join(user)
+            game.start()
+            games.append(game)
+
+        client = Client()
+        client.force_login(user)
+
+        for ids in ([games[0].id], [g.id for g in reversed(games)]):
+            # Session, user, games, owners, players, residents, huts, votes
+            # and active turns
+            with self.assertNumQueries(9):
+                response = client.get(
+                    '/api/games/batch/', {'ids': ','.join(map(str, ids))}
+                )
+
+            self.assertEquals(response.status_code, status.HTTP_200_OK)
+            self.assertEquals([g['id'] for g in response.json()], ids)
+            for game_data in response.json():
+                self.assertIn('players', game_data)
+                self.assertIsNotNone(game_data['active_turn'])
+
+    def test_batch_participants_only(self):
+        """
+        Test that games the user doesn't play in, or doesn't exist, are left
+        out
+        """
+        game = GameTestHelper.create_game()
+        other_game = GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/batch/', {
+            'ids': '%d,%d,%d' % (other_game.id, game.id, other_game.id + 100)
+        })
+
+        self.assertEquals([g['id'] for g in response.json()], [game.id])
+
+    def test_batch_invalid(self):
+        """
+        Test that invalid and oversized lists of ids are rejected
+        """
+        game = GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/batch/', {'ids': '1,two'})
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = client.get('/api/games/batch/', {
+            'ids': ','.join(str(i) for i in range(100))
+        })
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_player_view(self):
+        """
+        Test that players can load everything for their game screen at once
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        game.add_resident(Roles.SEER)
+
+        player = game.owner
+        seer = game.residents.get(role__role=Roles.SEER.value)
+        hut = game.huts.exclude(resident=seer).first()
+        seer.queue_action(player, game.active_turn, target_hut=hut)
+
+        client = Client()
+        client.force_login(player.user)
+
+        # Session, user, game, owner, players, huts, votes, active turn and
+        # pending actions
+        with self.assertNumQueries(9):
+            response = client.get('/api/games/%d/me/' % game.id)
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+
+        self.assertEquals(data['game']['id'], game.id)
+        self.assertEquals(data['player']['id'], player.id)
+        self.assertEquals(data['player']['team'], player.team)
+        self.assertEquals(len(data['players']), Game.MIN_PLAYERS)
+        self.assertEquals(len(data['huts']), game.huts.count())
+        self.assertNotIn('resident', data['huts'][0])
+        self.assertEquals(data['active_turn']['id'], game.active_turn.id)
+        self.assertEquals(
+            [a['target_hut'] for a in data['pending_actions']], [hut.id]
+        )
+
+    def test_player_view_teams(self):
+        """
+        Test that the player view only shows the player's own team
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        for team in (Teams.VILLAGER, Teams.WEREWOLF):
+            player = game.players.filter(team=team.value).first()
+
+            client = Client()
+            client.force_login(player.user)
+
+            response = client.get('/api/games/%d/me/' % game.id)
+
+            self.assertEquals(response.json()['player']['team'], team.value)
+            for player_data in response.json()['players']:
+                self.assertNotIn('team', player_data)
+
+    def test_move(self):
+        """
+        Test that players can check whether it's their move from the game's
+        row alone
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        turn = game.active_turn
+        other = game.players.exclude(pk=turn.current_player_id).first()
+
+        for player, is_my_turn in ((turn.current_player, True),
+                                   (other, False)):
+            client = Client()
+            client.force_login(player.user)
+
+            # Session, user and game
+            with self.assertNumQueries(3):
+                response = client.get('/api/games/%d/move/' % game.id)
+
+            self.assertEquals(response.json(), {
+                'turn_number': 1,
+                'current_phase': Phases.INITIAL.name,
+                'is_my_turn': is_my_turn,
+            })
+
+    def test_move_not_started(self):
+        """
+        Test that nobody has a move before the game starts
+        """
+        game = GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/%d/move/' % game.id)
+
+        self.assertEquals(response.json(), {
+            'turn_number': None, 'current_phase': None, 'is_my_turn': False
+        })
+
+    def test_team(self):
+        """
+        Test that werewolves can see who the other werewolves are
+        """
+        game = GameTestHelper.create_start_ready_game(Game.MAX_PLAYERS)
+        game.start()
+
+        werewolves = game.players.filter(team=Teams.WEREWOLF.value)
+
+        client = Client()
+        client.force_login(werewolves[0].user)
+
+        response = client.get('/api/games/%d/team/' % game.id)
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(response.json()['team'], Teams.WEREWOLF.value)
+        self.assertEquals(
+            sorted(p['id'] for p in response.json()['members']),
+            sorted(p.id for p in werewolves)
+        )
+
+    def test_team_villager(self):
+        """
+        Test that villagers and other users have no team channel
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        villager = game.players.filter(team=Teams.VILLAGER.value).first()
+
+        for user in (villager.user, GameTestHelper.create_user()):
+            client = Client()
+            client.force_login(user)
+
+            response = client.get('/api/games/%d/team/' % game.id)
+
+            self.assertEquals(
+                response.status_code, status.HTTP_403_FORBIDDEN
+            )
+
+    def test_player_view_not_started(self):
+        """
+        Test that the player view works before the game starts
+        """
+        game = GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/%d/me/' % game.id)
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.json()['active_turn'])
+        self.assertEquals(response.json()['pending_actions'], [])
+
+    def test_player_view_non_participant(self):
+        """
+        Test that only participants get a player view
+        """
+        game = GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(User.objects.create(username='outsider'))
+
+        response = client.get('/api/games/%d/me/' % game.id)
+
+        self.assertEquals(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_update_winner(self):
         """
         Test that you can't actually update the winning team manually
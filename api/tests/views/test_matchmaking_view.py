@@ -0,0 +1,98 @@
+from django.test import Client, TestCase
+
+from rest_framework import status
+
+from .. import GameTestHelper
+from ...models import MatchTicket, Presets
+
+
+class MatchmakingViewTest(TestCase):
+    def setUp(self):
+        self.user = GameTestHelper.create_user()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_queue(self):
+        """
+        Test that users can queue for a match with their preferences
+        """
+        response = self.client.post('/api/matchmaking/', {
+            'player_count': 5, 'preset': Presets.CLASSIC.value
+        })
+
+        self.assertEquals(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(response.json()['game_id'])
+
+        ticket = MatchTicket.objects.get()
+        self.assertEquals(ticket.user, self.user)
+        self.assertEquals(ticket.player_count, 5)
+        self.assertEquals(ticket.preset, Presets.CLASSIC.value)
+
+    def test_queue_invalid(self):
+        """
+        Test that player counts outside of the game limits and unknown
+        presets are rejected
+        """
+        for data in ({'player_count': 2, 'preset': Presets.BASIC.value},
+                     {'player_count': 13, 'preset': Presets.BASIC.value},
+                     {'player_count': 5, 'preset': 'unknown'}):
+            response = self.client.post('/api/matchmaking/', data)
+            self.assertEquals(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+        self.assertFalse(MatchTicket.objects.exists())
+
+    def test_queue_twice(self):
+        """
+        Test that users can only wait for one match at a time
+        """
+        data = {'player_count': 5, 'preset': Presets.BASIC.value}
+        self.client.post('/api/matchmaking/', data)
+
+        response = self.client.post('/api/matchmaking/', data)
+
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEquals(MatchTicket.objects.count(), 1)
+
+    def test_get_matched(self):
+        """
+        Test that users can see the game they were matched into
+        """
+        self.assertEquals(
+            self.client.get('/api/matchmaking/').status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+
+        MatchTicket.objects.create(
+            user=self.user, player_count=3, preset=Presets.BASIC.value,
+            game_id=42
+        )
+
+        response = self.client.get('/api/matchmaking/')
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(response.json()['game_id'], 42)
+
+    def test_cancel(self):
+        """
+        Test that users can leave the queue unless they were matched
+        """
+        MatchTicket.objects.create(
+            user=self.user, player_count=3, preset=Presets.BASIC.value
+        )
+
+        response = self.client.delete('/api/matchmaking/')
+
+        self.assertEquals(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(MatchTicket.objects.exists())
+
+        MatchTicket.objects.create(
+            user=self.user, player_count=3, preset=Presets.BASIC.value,
+            game_id=42
+        )
+
+        response = self.client.delete('/api/matchmaking/')
+
+        self.assertEquals(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(MatchTicket.objects.exists())
@@ -1,18 +1,27 @@
 from unittest.mock import patch
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import Client, RequestFactory, TestCase
 
 from rest_framework import status
 
 from .. import GameTestHelper
 from ...models import Teams
+from ...presence import PresenceTracker
 
 
 class PlayerViewTest(TestCase):
     def setUp(self):
         self.request = RequestFactory()
 
+        # Heartbeats of other tests' players must not show up here
+        cache.clear()
+        tracker = PresenceTracker()
+        patcher = patch('api.views.get_tracker', return_value=tracker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_create(self):
         """
         Test that players can be POST'ed and join the game
@@ -108,69 +117,95 @@ class PlayerViewTest(TestCase):
             {
                 'id': player.id,
                 'user': player.user.username,
-                'position': player.position
+                'position': player.position,
+                'is_online': False
             } for player in game.players.all()
         ]
 
         self.assertEquals(player_data, response_json)
 
-    def test_get_players_other_game(self):
+    def test_heartbeat(self):
         """
-        Test that players cannot fetch player data for another game
+        Test that players who sent a heartbeat are shown as online
         """
-        game = GameTestHelper.create_game(
-            User.objects.create(username='user1')
-        )
-        other_game = GameTestHelper.create_game(
-            User.objects.create(username='user2')
-        )
+        game = GameTestHelper.create_start_ready_game()
 
         client = Client()
         client.force_login(game.owner.user)
 
-        response = client.get('/api/games/%d/players/' % other_game.id)
+        response = client.post('/api/games/%d/players/heartbeat/' % game.id)
+        self.assertEquals(response.status_code, status.HTTP_204_NO_CONTENT)
 
+        response = client.get('/api/games/%d/players/' % game.id)
+
+        online = dict((p['id'], p['is_online']) for p in response.json())
+        self.assertTrue(online.pop(game.owner.id))
+        self.assertFalse(any(online.values()))
+
+    def test_heartbeat_not_participant(self):
+        """
+        Test that only players of the game can send heartbeats
+        """
+        game = GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(GameTestHelper.create_user())
+
+        response = client.post('/api/games/%d/players/heartbeat/' % game.id)
         self.assertEquals(response.status_code, status.HTTP_403_FORBIDDEN)
 
-    def test_get_player_villager(self):
+    def test_get_players_queries(self):
         """
-        Test that villagers should not be able to see player team data
+        Test that the game and the requesting player are only fetched once
         """
         game = GameTestHelper.create_start_ready_game()
         game.start()
 
-        villager = game.players.filter(team=Teams.VILLAGER.value).first()
-
         client = Client()
-        client.force_login(villager.user)
+        client.force_login(game.owner.user)
 
-        response = client.get('/api/games/%d/players/' % game.id)
+        # Session, user, game, requesting player and the player list
+        with self.assertNumQueries(5):
+            response = client.get('/api/games/%d/players/' % game.id)
 
         self.assertEquals(response.status_code, status.HTTP_200_OK)
-        response_json = response.json()
 
-        for player_data in response_json:
-            self.assertFalse('team' in player_data)
+    def test_get_players_other_game(self):
+        """
+        Test that players cannot fetch player data for another game
+        """
+        game = GameTestHelper.create_game(
+            User.objects.create(username='user1')
+        )
+        other_game = GameTestHelper.create_game(
+            User.objects.create(username='user2')
+        )
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/%d/players/' % other_game.id)
+
+        self.assertEquals(response.status_code, status.HTTP_403_FORBIDDEN)
 
-    def test_get_player_werewolf(self):
+    def test_get_player_teams(self):
         """
-        Test that werewolves should be able to see player team data
+        Test that player data never shows teams, whoever is asking
         """
         game = GameTestHelper.create_start_ready_game()
         game.start()
 
-        werewolf = game.players.filter(team=Teams.WEREWOLF.value).first()
+        for team in (Teams.VILLAGER, Teams.WEREWOLF):
+            player = game.players.filter(team=team.value).first()
 
-        client = Client()
-        client.force_login(werewolf.user)
-
-        response = client.get('/api/games/%d/players/' % game.id)
+            client = Client()
+            client.force_login(player.user)
 
-        self.assertEquals(response.status_code, status.HTTP_200_OK)
-        response_json = response.json()
+            response = client.get('/api/games/%d/players/' % game.id)
 
-        for player_data in response_json:
-            self.assertTrue('team' in player_data)
+            self.assertEquals(response.status_code, status.HTTP_200_OK)
+            for player_data in response.json():
+                self.assertNotIn('team', player_data)
 
     @patch('api.models.Player.leave_game')
     def test_delete(self, leave):
@@ -4,6 +4,7 @@ from django.test import Client, RequestFactory, TestCase
 from rest_framework import status
 
 from .. import GameTestHelper
+from ...models import Roles
 
 
 class ResidentViewTest(TestCase):
@@ -29,6 +30,36 @@ class ResidentViewTest(TestCase):
         self.assertEquals(resident.id, response.json()['id'])
         self.assertEquals(resident.role.role, response.json()['role'])
 
+    def test_list_residents_fields(self):
+        """
+        Test that clients can pick the resident fields they need
+        """
+        game = GameTestHelper.create_start_ready_game()
+
+        client = Client()
+        client.force_login(game.owner.user)
+
+        response = client.get('/api/games/%d/residents/?fields=id' % game.id)
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            response.json(),
+            [{'id': r.id} for r in game.residents.order_by('id')]
+        )
+
+        response = client.get(
+            '/api/games/%d/residents/?fields=id&include=role' % game.id
+        )
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            response.json(),
+            [
+                {'id': r.id, 'role': r.role.role}
+                for r in game.residents.order_by('id')
+            ]
+        )
+
     def test_get_resident_other_game(self):
         """
         Test that other game owners cannot delete another game's resident
@@ -273,3 +304,112 @@ class ResidentViewSetAuthTest(TestCase):
                 status.HTTP_403_FORBIDDEN,
                 '%s did not return 403' % uri
             )
+
+    def test_action(self):
+        """
+        Test that residents with a role action can act through the API
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        game.add_resident(Roles.SEER)
+
+        turn = GameTestHelper.start_night(game)
+
+        seer = game.residents.get(role__role=Roles.SEER.value)
+        target = game.residents.filter(role__role=Roles.VILLAGER.value).first()
+
+        client = Client()
+        client.force_login(turn.current_player.user)
+        response = client.post(
+            '/api/games/%d/residents/%d/action/' % (game.id, seer.id),
+            {'target_hut': target.hut.id}
+        )
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(response.json()['id'], target.id)
+        self.assertEquals(response.json()['role'], Roles.VILLAGER.value)
+        self.assertTrue(
+            game.active_turn.queued_actions.filter(resident=seer).exists()
+        )
+
+    def test_action_not_current_player(self):
+        """
+        Test that players other than the turn's current player cannot see
+        what's in other huts through a Seer
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        game.add_resident(Roles.SEER)
+        turn = GameTestHelper.start_night(game)
+
+        seer = game.residents.get(role__role=Roles.SEER.value)
+        target = game.residents.filter(role__role=Roles.VILLAGER.value).first()
+        other = game.players.exclude(pk=turn.current_player_id).first()
+
+        client = Client()
+        client.force_login(other.user)
+        response = client.post(
+            '/api/games/%d/residents/%d/action/' % (game.id, seer.id),
+            {'target_hut': target.hut.id}
+        )
+
+        self.assertEquals(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertNotIn('role', response.json())
+        self.assertFalse(turn.queued_actions.exists())
+
+    def test_action_wrong_phase(self):
+        """
+        Test that resident actions are rejected outside of the night
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        game.add_resident(Roles.SEER)
+
+        seer = game.residents.get(role__role=Roles.SEER.value)
+        target = game.residents.filter(role__role=Roles.VILLAGER.value).first()
+
+        client = Client()
+        client.force_login(game.active_turn.current_player.user)
+        response = client.post(
+            '/api/games/%d/residents/%d/action/' % (game.id, seer.id),
+            {'target_hut': target.hut.id}
+        )
+
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(game.active_turn.queued_actions.exists())
+
+    def test_action_without_handler(self):
+        """
+        Test that residents without a role action cannot act
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        villager = game.residents.first()
+
+        client = Client()
+        client.force_login(game.owner.user)
+        response = client.post(
+            '/api/games/%d/residents/%d/action/' % (game.id, villager.id)
+        )
+
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_action_non_participant(self):
+        """
+        Test that users outside of the game cannot perform resident actions
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+        game.add_resident(Roles.SEER)
+
+        seer = game.residents.get(role__role=Roles.SEER.value)
+
+        client = Client()
+        client.force_login(User.objects.create(username='outsider'))
+        response = client.post(
+            '/api/games/%d/residents/%d/action/' % (game.id, seer.id),
+            {'target_hut': game.huts.first().id}
+        )
+
+        self.assertEquals(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,9 +1,12 @@
+from unittest.mock import patch
+
 from django.test import RequestFactory, TestCase
 
 from rest_framework import status
 
 from .. import GameTestHelper
 from ...models import Phases
+from ...views import TurnViewSet
 
 
 class TurnViewTest(TestCase):
@@ -43,6 +46,28 @@ class TurnViewTest(TestCase):
             Phases(current_turn.current_phase).name
         )
 
+    def test_get_turn_fields(self):
+        """
+        Test that clients can pick the turn fields they need
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        current_turn = game.active_turn
+
+        self.client.force_login(game.owner.user)
+        response = self.client.get(
+            '/api/games/%d/turns/%d/?fields=number,current_phase' % (
+                game.id, current_turn.id
+            )
+        )
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals(response.json(), {
+            'number': current_turn.number,
+            'current_phase': Phases(current_turn.current_phase).name,
+        })
+
     def test_get_turn_already_ended(self):
         """
         Test that you may get turn data from games even if they're ended
@@ -94,6 +119,105 @@ class TurnViewTest(TestCase):
 
         self.assertCountEqual(expected_turn_data, actual_turn_data)
 
+    def create_turns(self, count):
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        for i in range(count - 1):
+            game.active_turn.end()
+
+        return game
+
+    def test_list_turns_since(self):
+        """
+        Test that clients can only fetch turns newer than the ones they have
+        """
+        game = self.create_turns(4)
+
+        self.client.force_login(game.owner.user)
+        response = self.client.get(
+            '/api/games/%d/turns/?since_number=2' % game.id
+        )
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertEquals([t['number'] for t in response.json()], [3, 4])
+
+    def test_list_turns_limit(self):
+        """
+        Test that turn lists are bounded
+        """
+        game = self.create_turns(4)
+
+        self.client.force_login(game.owner.user)
+        response = self.client.get(
+            '/api/games/%d/turns/?since_number=1&limit=2' % game.id
+        )
+        self.assertEquals([t['number'] for t in response.json()], [2, 3])
+
+        with patch('api.views.TurnViewSet.max_page_size', 3):
+            response = self.client.get(
+                '/api/games/%d/turns/?limit=100' % game.id
+            )
+        self.assertEquals([t['number'] for t in response.json()], [1, 2, 3])
+
+    def test_list_turns_next_page(self):
+        """
+        Test that clients are linked to the next page of turns until they
+        have every turn
+        """
+        game = self.create_turns(TurnViewSet.max_page_size + 5)
+
+        self.client.force_login(game.owner.user)
+        response = self.client.get('/api/games/%d/turns/' % game.id)
+
+        self.assertEquals(
+            [t['number'] for t in response.json()],
+            list(range(1, TurnViewSet.max_page_size + 1))
+        )
+        self.assertEquals(
+            response['Link'],
+            '<http://testserver/api/games/%d/turns/?since_number=%d>; '
+            'rel="next"' % (game.id, TurnViewSet.max_page_size)
+        )
+
+        response = self.client.get(response['Link'][1:].split('>')[0])
+
+        self.assertEquals(
+            [t['number'] for t in response.json()],
+            list(range(
+                TurnViewSet.max_page_size + 1, TurnViewSet.max_page_size + 6
+            ))
+        )
+        self.assertNotIn('Link', response)
+
+    def test_list_turns_invalid_cursor(self):
+        """
+        Test that cursors and limits must be valid numbers
+        """
+        game = self.create_turns(1)
+
+        self.client.force_login(game.owner.user)
+
+        for query in ('since_number=abc', 'limit=abc', 'limit=0'):
+            response = self.client.get(
+                '/api/games/%d/turns/?%s' % (game.id, query)
+            )
+            self.assertEquals(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+    def test_list_turns_queries(self):
+        """
+        Test that listing turns doesn't cost a query per turn
+        """
+        game = self.create_turns(4)
+
+        self.client.force_login(game.owner.user)
+
+        # Session, user, game, requesting player and the turns
+        with self.assertNumQueries(5):
+            self.client.get('/api/games/%d/turns/' % game.id)
+
     def test_delete_turn(self):
         """
         Test that you may not delete a turn manually
@@ -0,0 +1,83 @@
+from django.test import Client, TestCase
+
+from rest_framework import status
+
+from .. import GameTestHelper
+from ...models import Phases
+
+
+class UserGamesViewTest(TestCase):
+    def test_list(self):
+        """
+        Test that users get the games they play in, newest first, with the
+        phase of the active turn and whether it's their move
+        """
+        started = GameTestHelper.create_start_ready_game()
+        started.start()
+
+        turn = started.active_turn
+        user = turn.current_player.user
+
+        lobby = GameTestHelper.create_game(owner=user)
+        GameTestHelper.create_game()
+
+        client = Client()
+        client.force_login(user)
+
+        # Session, user and games
+        with self.assertNumQueries(3):
+            response = client.get('/api/me/games/')
+
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+
+        self.assertEquals([g['id'] for g in data], [lobby.id, started.id])
+
+        self.assertIsNone(data[0]['current_phase'])
+        self.assertIsNone(data[0]['turn_number'])
+        self.assertFalse(data[0]['is_my_turn'])
+
+        self.assertEquals(
+            data[1]['current_phase'], Phases(turn.current_phase).name
+        )
+        self.assertEquals(data[1]['turn_number'], turn.number)
+        self.assertTrue(data[1]['is_my_turn'])
+
+    def test_list_other_players_turn(self):
+        """
+        Test that the active turn of later turns is used
+        """
+        game = GameTestHelper.create_start_ready_game()
+        game.start()
+
+        first_player = game.active_turn.current_player
+        new_turn = game.active_turn.end()
+
+        client = Client()
+        client.force_login(first_player.user)
+
+        data = client.get('/api/me/games/').json()
+
+        self.assertEquals(data[0]['turn_number'], new_turn.number)
+        self.assertFalse(data[0]['is_my_turn'])
+
+    def test_list_left(self):
+        """
+        Test that games the user left are not listed
+        """
+        game = GameTestHelper.create_start_ready_game()
+        player = game.players.exclude(is_owner=True).first()
+        player.leave_game()
+
+        client = Client()
+        client.force_login(player.user)
+
+        self.assertEquals(client.get('/api/me/games/').json(), [])
+
+    def test_list_unauthenticated(self):
+        """
+        Test that users have to be logged in
+        """
+        response = Client().get('/api/me/games/')
+
+        self.assertEquals(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,3 +1,5 @@
+from django.conf.urls import url
+
 from rest_framework import routers
 
 from . import views
@@ -20,4 +22,10 @@ router.register(
     base_name='turns'
 )
 
-urlpatterns = router.urls
+urlpatterns = [
+    url(r'^me/games/$', views.UserGamesView.as_view(), name='user-games'),
+    url(
+        r'^matchmaking/$', views.MatchmakingView.as_view(),
+        name='matchmaking'
+    ),
+] + router.urls
@@ -1,31 +1,308 @@
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import Prefetch
 from django.http import Http404
 
 from rest_framework import generics, status, viewsets
-from rest_framework.decorators import detail_route
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import detail_route, list_route
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from .models import Game, Player, Resident, Roles, Teams, Turn
+from . import snapshots
+from .models import (
+    Game, Hut, MatchTicket, Phases, Player, Resident, Roles, Teams, Turn
+)
+from .patch import make_patch
+from .presence import get_tracker
 from .permissions import IsGameParticipant, IsGameOwnerOrReadOnly
 from .serializers import (
-    GameSerializer, PlayerSerializer, ResidentSerializer, TurnSerializer
+    DynamicFieldsModelSerializer, GameSerializer, HutSerializer,
+    MatchTicketSerializer, PlayerSerializer, QueuedActionSerializer,
+    ResidentSerializer, TeamSerializer, TurnSerializer, UserGameSerializer
 )
+from .sharding import fan_out, group_by_shard, shard_for_game, using_shard
 
 
-class GameViewSet(viewsets.ModelViewSet):
+def get_sharded_game(game_id):
+    try:
+        return using_shard(Game.objects, shard_for_game(game_id)).get(
+            pk=game_id
+        )
+    except (Game.DoesNotExist, ValueError):
+        raise Http404
+
+
+class SparseFieldsMixin(object):
+    """
+    Lets clients pick the fields they need with `?fields=id,owner` and add
+    fields that aren't shown by default with `?include=players`.
+
+    Fields are pruned from the serializer before anything is fetched, and
+    related data is only loaded for the fields that are actually rendered:
+    `select_related_fields` and `prefetch_related_fields` map a serialized
+    field name to the lookups it needs on reads.
+    """
+    select_related_fields = {}
+    prefetch_related_fields = {}
+
+    def get_query_param_list(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        return [f.strip() for f in value.split(',') if f.strip()]
+
+    def get_requested_fields(self, many=False):
+        """
+        The serializer fields to render, or `None` to use the serializer's
+        own defaults
+        """
+        requested = self.get_query_param_list('fields')
+        included = self.get_query_param_list('include')
+
+        if requested is None and included is None:
+            return None
+
+        serializer_class = self.get_serializer_class()
+        available = serializer_class.Meta.fields
+
+        if requested is None:
+            requested = available
+            if many:
+                requested = getattr(serializer_class, 'list_fields', requested)
+
+        selected = set(requested) | set(included or [])
+        return tuple(f for f in available if f in selected)
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields(many=kwargs.get('many', False))
+        # Only dynamic serializers can leave fields out
+        serializer_class = self.get_serializer_class()
+        if fields is not None and issubclass(
+                serializer_class, DynamicFieldsModelSerializer):
+            kwargs['fields'] = fields
+
+        return super(SparseFieldsMixin, self).get_serializer(*args, **kwargs)
+
+    def get_rendered_fields(self):
+        many = self.action == 'list'
+        fields = self.get_requested_fields(many=many)
+
+        if fields is None:
+            serializer_class = self.get_serializer_class()
+            fields = serializer_class.Meta.fields
+            if many:
+                fields = getattr(serializer_class, 'list_fields', fields)
+
+        return fields
+
+    def filter_queryset(self, queryset):
+        queryset = super(SparseFieldsMixin, self).filter_queryset(queryset)
+
+        # Writes re-serialize objects after modifying them, so only reads
+        # may use data loaded up front
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+
+        return self.prefetch_fields(queryset, self.get_rendered_fields())
+
+    def prefetch_fields(self, queryset, fields):
+        for field in fields:
+            lookups = self.select_related_fields.get(field)
+            if lookups:
+                queryset = queryset.select_related(*lookups)
+
+            lookups = self.prefetch_related_fields.get(field)
+            if lookups:
+                queryset = queryset.prefetch_related(*lookups)
+
+        return queryset
+
+
+class GameResourceMixin(object):
+    """
+    For views nested under a game. The game from the URL and the requesting
+    user's player are only looked up once per request, and are shared with
+    the permission checks and the serializers (as the `player` in their
+    context).
+    """
+
+    def get_game(self):
+        if not hasattr(self, '_game'):
+            self._game = get_sharded_game(self.kwargs['game_id'])
+        return self._game
+
+    def get_player(self):
+        """
+        The requesting user's player in the game, or `None` if they never
+        joined it
+        """
+        if not hasattr(self, '_player'):
+            try:
+                self._player = self.get_game().get_player(
+                    self.request.user.username
+                )
+            except Player.DoesNotExist:
+                self._player = None
+        return self._player
+
+
+class GameViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
+    use_read_replica = True
     permission_classes = (IsAuthenticated, )
     serializer_class = GameSerializer
     queryset = Game.objects.all()
 
-    def create(self, request):
-        game = Game.objects.create()
-        game.players.create(
-            user=request.user,
-            position=1,
-            is_owner=True,
-            team=Teams.VILLAGER.value
+    # Upper bound on the number of games fetched by a single batch request
+    max_batch_size = 50
+
+    prefetch_related_fields = {
+        'owner': (
+            Prefetch(
+                'players',
+                queryset=Player.objects.filter(is_owner=True),
+                to_attr='prefetched_owners'
+            ),
+        ),
+        'players': ('players', ),
+        'residents': (
+            Prefetch(
+                'residents', queryset=Resident.objects.select_related('role')
+            ),
+        ),
+        'huts': ('huts__votes', ),
+        'active_turn': (
+            Prefetch(
+                'turns',
+                queryset=Turn.objects.filter(is_active=True).select_related(
+                    'current_player__user', 'grand_inquisitor__user'
+                ),
+                to_attr='prefetched_active_turns'
+            ),
+        ),
+    }
+
+    def get_queryset(self):
+        if 'pk' not in self.kwargs:
+            return self.queryset.all()
+
+        try:
+            return using_shard(
+                Game.objects.all(), shard_for_game(self.kwargs['pk'])
+            )
+        except ValueError:
+            raise Http404
+
+    def list(self, request):
+        # Lobbies are spread across every shard. Ended games (e.g. lobbies
+        # ended by `api.reaper`) aren't listed.
+        queryset = self.filter_queryset(
+            self.get_queryset().filter(time_ended=None)
+        ).order_by('id')
+        games = fan_out(queryset, key=lambda g: g.pk)
+
+        serializer = self.get_serializer(games, many=True)
+        return Response(serializer.data)
+
+    def retrieve(self, request, pk):
+        """
+        The game's version is sent as the `ETag`. Clients that pass the
+        version they already have as `?since_version=` get a JSON Patch
+        (RFC 6902) from it instead of the full document, as long as the
+        document of that version is still cached.
+        """
+        game = self.get_object()
+        document, version = snapshots.freeze(self.get_serializer(game).data)
+        snapshots.store(game.pk, version, document)
+
+        previous = None
+        since_version = request.query_params.get('since_version')
+        if since_version:
+            previous = snapshots.load(game.pk, since_version)
+
+        if previous is None:
+            response = Response(document)
+        else:
+            content_type = None
+            if request.accepted_renderer.format == 'json':
+                content_type = 'application/json-patch+json'
+
+            response = Response(
+                make_patch(previous, document), content_type=content_type
+            )
+            # Delta encoding as in RFC 3229
+            response['IM'] = 'json-patch'
+
+        response['ETag'] = '"%s"' % version
+        return response
+
+    @list_route(methods=['GET'], url_path='batch')
+    def batch(self, request):
+        """
+        Several games at once with `?ids=1,2,3`, e.g. for players in more
+        than one game. Every shard with any of the games is queried once
+        with the same prefetch plan, however many games are asked for.
+        Games the requesting user doesn't play in are left out.
+        """
+        try:
+            game_ids = [
+                int(i) for i in self.get_query_param_list('ids') or []
+            ]
+        except ValueError:
+            return Response(
+                'ids must be a list of integers',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(game_ids) > self.max_batch_size:
+            return Response(
+                'At most %d games can be fetched at once' % (
+                    self.max_batch_size
+                ),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        game_ids = list(OrderedDict.fromkeys(game_ids))
+
+        games = {}
+        for alias, ids in group_by_shard(game_ids).items():
+            # Players are needed to check who may see the games
+            queryset = self.filter_queryset(
+                using_shard(Game.objects.all(), alias)
+            ).prefetch_related('players')
+
+            for game in queryset.filter(pk__in=ids):
+                games[game.pk] = game
+
+        visible = [
+            games[i] for i in game_ids
+            if i in games and self.is_participant(games[i], request.user)
+        ]
+
+        serializer = self.get_serializer(
+            visible, many=True, fields=self.get_rendered_fields()
+        )
+        return Response(serializer.data)
+
+    def is_participant(self, game, user):
+        return any(
+            p.user_id == user.id and not p.has_left()
+            for p in game.players.all()
         )
 
+    def create(self, request):
+        game = Game()
+
+        with transaction.atomic(using=shard_for_game(game.allocate_id())):
+            game.save()
+            game.players.create(
+                user=request.user,
+                position=1,
+                is_owner=True,
+                team=Teams.VILLAGER.value
+            )
+
         serializer = self.get_serializer(game)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -68,6 +345,111 @@ class GameViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(game)
         return Response(serializer.data)
 
+    @detail_route(methods=['GET'], url_path='me')
+    def player_view(self, request, pk):
+        """
+        Everything a player's client needs to render the game screen, loaded
+        with a single prefetch plan
+        """
+        queryset = self.prefetch_fields(
+            self.get_queryset(), ('owner', 'players', 'huts', 'active_turn')
+        )
+        game = generics.get_object_or_404(queryset, pk=pk)
+
+        player = next((
+            p for p in game.players.all()
+            if p.user_id == request.user.id and not p.has_left()
+        ), None)
+
+        if player is None:
+            return Response(
+                'You are not a participant of the game',
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        context = self.get_serializer_context()
+
+        active_turn = game.active_turn
+        pending_actions = []
+        if active_turn is not None:
+            pending_actions = active_turn.queued_actions.filter(player=player)
+
+        me = PlayerSerializer(player, context=context).data
+        # Players always know their own team
+        me['team'] = player.team
+
+        return Response({
+            'game': GameSerializer(game, context=context, fields=(
+                'id', 'owner', 'winning_team', 'time_created',
+                'time_started', 'time_ended'
+            )).data,
+            'player': me,
+            'players': PlayerSerializer(
+                game.players.all(), many=True, context=context
+            ).data,
+            'huts': HutSerializer(game.huts.all(), many=True, fields=(
+                'id', 'position', 'time_eliminated', 'votes'
+            )).data,
+            'active_turn': TurnSerializer(
+                active_turn, context=context
+            ).data if active_turn is not None else None,
+            'pending_actions': QueuedActionSerializer(
+                pending_actions, many=True
+            ).data,
+        })
+
+    @detail_route(methods=['GET'], url_path='move')
+    def move(self, request, pk):
+        """
+        Whether it's the requesting user's move, for clients that poll. The
+        answer comes from the turn fields kept on the game's own row.
+        """
+        game = generics.get_object_or_404(
+            self.get_queryset().only(*Game.TURN_FIELDS), pk=pk
+        )
+
+        current_phase = None
+        if game.current_phase is not None:
+            current_phase = Phases(game.current_phase).name
+
+        return Response({
+            'turn_number': game.turn_number,
+            'current_phase': current_phase,
+            'is_my_turn': game.is_users_move(request.user),
+        })
+
+    @detail_route(methods=['GET'], url_path='team')
+    def team(self, request, pk):
+        """
+        The private channel of the requesting player's team. Only werewolves
+        have one: they know who the other werewolves are, which nobody else
+        may see.
+        """
+        game = generics.get_object_or_404(self.get_queryset(), pk=pk)
+
+        try:
+            player = game.get_player(request.user.username)
+        except Player.DoesNotExist:
+            player = None
+
+        if player is None or player.has_left():
+            return Response(
+                'You are not a participant of the game',
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        if player.team != Teams.WEREWOLF.value:
+            return Response(
+                'Only werewolves have a team channel',
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = TeamSerializer({
+            'team': player.team,
+            'members': player.get_teammates(),
+        })
+        return Response(serializer.data)
+
     def destroy(self, request, pk):
         game = self.get_object()
 
@@ -89,19 +471,50 @@ class GameViewSet(viewsets.ModelViewSet):
         return Response(None)
 
 
-class PlayerViewSet(viewsets.ModelViewSet):
+class PlayerViewSet(GameResourceMixin,
+                    SparseFieldsMixin,
+                    viewsets.ModelViewSet):
+    use_read_replica = True
     permission_classes = (IsAuthenticated, IsGameParticipant, )
     serializer_class = PlayerSerializer
 
     def get_queryset(self):
-        game = self.get_game()
-        return Player.objects.filter(game=game)
+        return self.get_game().players.all()
+
+    def get_serializer_context(self):
+        context = super(PlayerViewSet, self).get_serializer_context()
+        if hasattr(self, '_online_players'):
+            context['online_players'] = self._online_players
+        return context
+
+    def list(self, request, game_id):
+        """
+        The game's players, along with whether they are online
+        """
+        players = list(self.filter_queryset(self.get_queryset()))
+        self._online_players = get_tracker().get_online(
+            self.get_game().pk, [p.pk for p in players]
+        )
 
-    def get_game(self):
-        try:
-            return Game.objects.get(pk=self.kwargs['game_id'])
-        except Game.DoesNotExist:
-            raise Http404
+        serializer = self.get_serializer(players, many=True)
+        return Response(serializer.data)
+
+    @list_route(methods=['POST'])
+    def heartbeat(self, request, game_id):
+        """
+        Keeps the requesting player online for `PRESENCE_TTL` seconds
+        """
+        # POSTs are let through by `IsGameParticipant` for joining
+        player = self.get_player()
+        if player is None or player.has_left():
+            return Response(
+                'You are not a participant of the game',
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        get_tracker().heartbeat(self.get_game().pk, player.pk)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     def create(self, request, game_id):
         game = self.get_game()
@@ -124,23 +537,19 @@ class PlayerViewSet(viewsets.ModelViewSet):
         return Response(None)
 
 
-class ResidentViewSet(viewsets.ViewSetMixin,
+class ResidentViewSet(GameResourceMixin,
+                      SparseFieldsMixin,
+                      viewsets.ViewSetMixin,
                       generics.ListCreateAPIView,
                       generics.RetrieveDestroyAPIView):
+    use_read_replica = True
     permission_classes = (
         IsAuthenticated, IsGameParticipant, IsGameOwnerOrReadOnly
     )
     serializer_class = ResidentSerializer
 
     def get_queryset(self):
-        game = self.get_game()
-        return Resident.objects.filter(game=game)
-
-    def get_game(self):
-        try:
-            return Game.objects.get(pk=self.kwargs['game_id'])
-        except Game.DoesNotExist:
-            raise Http404
+        return self.get_game().residents.select_related('role')
 
     def create(self, request, game_id):
         game = self.get_game()
@@ -176,12 +585,58 @@ class ResidentViewSet(viewsets.ViewSetMixin,
             )
 
         resident.delete()
+        resident.game.touch()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @detail_route(
+        methods=['POST'],
+        url_path='action',
+        permission_classes=(IsAuthenticated, IsGameParticipant)
+    )
+    def perform_action(self, request, game_id, pk):
+        resident = self.get_object()
+        game = self.get_game()
+        player = self.get_player()
 
-class TurnViewSet(viewsets.ViewSetMixin,
+        if player is None or player.has_left():
+            return Response(
+                'You are not a participant of the game',
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        targets = {}
+        try:
+            if 'target_hut' in request.data:
+                targets['target_hut'] = game.huts.get(
+                    pk=request.data['target_hut']
+                )
+            if 'target_player' in request.data:
+                targets['target_player'] = game.players.get(
+                    pk=request.data['target_player']
+                )
+        except (Hut.DoesNotExist, Player.DoesNotExist, ValueError):
+            return Response(
+                'Invalid action target',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # The role's action handler is looked up from the resident's role
+        # value so new roles never need changes here
+        result = resident.action(player, **targets)
+
+        if result is None:
+            return Response(None, status=status.HTTP_202_ACCEPTED)
+
+        serializer = self.get_serializer(result)
+        return Response(serializer.data)
+
+
+class TurnViewSet(GameResourceMixin,
+                  SparseFieldsMixin,
+                  viewsets.ViewSetMixin,
                   generics.ListAPIView,
                   generics.RetrieveAPIView):
+    use_read_replica = True
 
     permission_classes = (
         IsAuthenticated, IsGameParticipant, IsGameOwnerOrReadOnly
@@ -189,12 +644,119 @@ class TurnViewSet(viewsets.ViewSetMixin,
 
     serializer_class = TurnSerializer
 
-    def get_queryset(self):
-        game = self.get_game()
-        return Turn.objects.filter(game=game)
+    select_related_fields = {
+        'current_player': ('current_player__user', ),
+        'grand_inquisitor': ('grand_inquisitor__user', ),
+    }
 
-    def get_game(self):
+    # Upper bound on the number of turns returned by a single list request
+    max_page_size = 50
+
+    def get_queryset(self):
+        return self.get_game().turns.all()
+
+    def list(self, request, game_id):
+        """
+        Turns in order of their number. Clients that already have some of the
+        game's turns only ask for the newer ones with `?since_number=`, and
+        fetch at most `?limit=` turns per request. When there are more turns
+        the response has a `Link` header to the next page.
+        """
         try:
-            return Game.objects.get(pk=self.kwargs['game_id'])
-        except Game.DoesNotExist:
+            since_number = int(request.query_params.get('since_number', 0))
+            limit = int(request.query_params.get('limit', self.max_page_size))
+        except ValueError:
+            return Response(
+                'since_number and limit must be integers',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if limit < 1:
+            return Response(
+                'limit must be a positive number',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limit = min(limit, self.max_page_size)
+
+        # One more turn than requested tells whether there is a next page
+        turns = list(self.filter_queryset(self.get_queryset()).filter(
+            number__gt=since_number
+        ).order_by('number')[:limit + 1])
+        has_more = len(turns) > limit
+        turns = turns[:limit]
+
+        serializer = self.get_serializer(turns, many=True)
+        response = Response(serializer.data)
+
+        if has_more:
+            url = replace_query_param(
+                request.build_absolute_uri(), 'since_number',
+                turns[-1].number
+            )
+            response['Link'] = '<%s>; rel="next"' % url
+
+        return response
+
+
+class UserGamesView(generics.ListAPIView):
+    """
+    The games the requesting user is still playing in, newest first, with
+    the phase of their active turn and whether it's the user's move
+    """
+    permission_classes = (IsAuthenticated, )
+    serializer_class = UserGameSerializer
+
+    def get_queryset(self):
+        # The turn data is kept on the games themselves
+        return Game.objects.filter(
+            players__user=self.request.user, players__time_withdrawn=None
+        ).order_by('-id')
+
+    def list(self, request):
+        games = fan_out(self.get_queryset(), key=lambda g: -g.pk)
+
+        serializer = self.get_serializer(games, many=True)
+        return Response(serializer.data)
+
+
+class MatchmakingView(generics.GenericAPIView):
+    """
+    The requesting user's place in the matchmaking queue. Users queue with
+    `POST`, check whether they have been matched into a game yet with `GET`
+    and leave the queue with `DELETE` (see `api.matchmaking`).
+    """
+    permission_classes = (IsAuthenticated, )
+    serializer_class = MatchTicketSerializer
+
+    def get_queryset(self):
+        return MatchTicket.objects.filter(user=self.request.user)
+
+    def get(self, request):
+        ticket = self.get_queryset().order_by('-id').first()
+        if ticket is None:
+            raise Http404
+
+        serializer = self.get_serializer(ticket)
+        return Response(serializer.data)
+
+    def post(self, request):
+        if self.get_queryset().filter(game_id=None).exists():
+            return Response(
+                'You are already waiting for a match',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        # Tickets that were matched in the meantime are left alone
+        deleted, rows = self.get_queryset().filter(game_id=None).delete()
+        if not deleted:
             raise Http404
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -9,6 +9,10 @@ setup(
         'djangorestframework >= 3.3, < 3.4',
     ],
 
+    extras_require={
+        'msgpack': ['msgpack'],
+    },
+
     author='Rolando Cruz',
     author_email='rolando.cruz21@gmail.com',
     license='MIT',
@@ -0,0 +1,16 @@
+"""
+ASGI config for werewolf project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``, e.g. for `uvicorn werewolf.asgi:application`.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "werewolf.settings")
+
+from werewolf.asgi_handler import ASGIHandler  # NOQA
+
+application = ASGIHandler(get_wsgi_application())
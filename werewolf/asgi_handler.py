@@ -0,0 +1,204 @@
+"""
+A minimal ASGI handler for running the project on an ASGI server.
+
+Django itself is synchronous, so every request is run through the regular
+WSGI application on a thread pool and the event loop is never blocked.
+Views listed in `ASYNC_ROUTES` are coroutines instead, which lets them wait
+(e.g. long-poll for new data) without holding on to one of the threads:
+they only borrow a thread while they actually touch the database.
+
+`ASYNC_ROUTES` is the dotted path to a list of `(method, regex, view)`
+entries. Views are called as `view(handler, environ, **url_kwargs)` and
+return a `(status, headers, body)` tuple like `handler.call_wsgi` does.
+
+WebSocket connections are handed to the consumers in `WEBSOCKET_ROUTES`, a
+dotted path to a list of `(regex, consumer_class)` entries. Consumers are
+created as `consumer_class(handler, scope, receive, send, **url_kwargs)` and
+served by awaiting their `run()`.
+"""
+import asyncio
+import io
+import re
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ASGIHandler(object):
+    def __init__(self, wsgi_application, executor=None, routes=None,
+                 websocket_routes=None):
+        self.wsgi_application = wsgi_application
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=getattr(settings, 'ASGI_THREADS', 10)
+        )
+
+        if routes is None:
+            routes = self.load_routes('ASYNC_ROUTES')
+
+        if websocket_routes is None:
+            websocket_routes = self.load_routes('WEBSOCKET_ROUTES')
+
+        self.routes = [
+            (method, re.compile(pattern), view)
+            for method, pattern, view in routes
+        ]
+        self.websocket_routes = [
+            (re.compile(pattern), consumer_class)
+            for pattern, consumer_class in websocket_routes
+        ]
+
+    def load_routes(self, setting):
+        path = getattr(settings, setting, None)
+        return import_string(path) if path else []
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+
+        if scope['type'] == 'websocket':
+            await self.websocket(scope, receive, send)
+            return
+
+        if scope['type'] != 'http':
+            raise ValueError('Unsupported connection type: %s' % scope['type'])
+
+        body = await self.read_body(receive)
+        environ = self.get_environ(scope, body)
+
+        status, headers, content = await self.dispatch(environ)
+
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def websocket(self, scope, receive, send):
+        for pattern, consumer_class in self.websocket_routes:
+            match = pattern.match(scope['path'])
+            if match:
+                consumer = consumer_class(
+                    self, scope, receive, send, **match.groupdict()
+                )
+                await consumer.run()
+                return
+
+        # Closing before accepting rejects the connection
+        await receive()
+        await send({'type': 'websocket.close'})
+
+    async def read_body(self, receive):
+        body = b''
+
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+
+            body += message.get('body', b'')
+            if not message.get('more_body', False):
+                break
+
+        return body
+
+    def get_environ(self, scope, body):
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'],
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': 'HTTP/%s' % scope.get('http_version', '1.1'),
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = 'HTTP_' + name
+
+            if name in environ:
+                # Repeated cookie headers are joined like the cookies of a
+                # single header
+                separator = '; ' if name == 'HTTP_COOKIE' else ','
+                value = environ[name] + separator + value
+            environ[name] = value
+
+        # The whole body has been read already, whatever the client said
+        environ['CONTENT_LENGTH'] = str(len(body))
+
+        return environ
+
+    async def dispatch(self, environ):
+        for method, pattern, view in self.routes:
+            if method != environ['REQUEST_METHOD']:
+                continue
+
+            match = pattern.match(environ['PATH_INFO'])
+            if match:
+                return await view(self, environ, **match.groupdict())
+
+        return await self.call_wsgi(environ)
+
+    async def run_in_thread(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def call_wsgi(self, environ):
+        """
+        Run the request through the WSGI application on the thread pool.
+        Returns a `(status, headers, body)` tuple.
+        """
+        # Views may call this more than once for the same request
+        environ = dict(environ)
+        environ['wsgi.input'].seek(0)
+
+        return await self.run_in_thread(self.run_wsgi, environ)
+
+    def run_wsgi(self, environ):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = status
+            response['headers'] = headers
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        return response['status'], response['headers'], body
@@ -0,0 +1,82 @@
+"""
+Channel layers fan messages out to groups of WebSocket connections.
+
+A group is a named set of connections (e.g. every player connected to the
+same game). Messages sent to a group are encoded once and the same frame is
+delivered to every member.
+
+`InMemoryChannelLayer` only reaches connections served by the same process,
+which is enough for local development and tests. The layer in use is set
+with `CHANNEL_LAYER`.
+"""
+import asyncio
+import json
+import threading
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class InMemoryChannelLayer(object):
+    # Messages may hold serializer data, e.g. dates
+    encoder_class = JSONEncoder
+
+    def __init__(self):
+        # The event loop each member queue belongs to, by group
+        self._groups = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def group_add(self, group, queue):
+        """
+        Add `queue` to `group`. Must be called from the thread of the event
+        loop the queue is read from.
+        """
+        with self._lock:
+            self._groups[group][queue] = asyncio.get_event_loop()
+
+    def group_discard(self, group, queue):
+        with self._lock:
+            members = self._groups.get(group)
+            if members is None:
+                return
+
+            members.pop(queue, None)
+            if not members:
+                del self._groups[group]
+
+    def group_size(self, group):
+        with self._lock:
+            return len(self._groups.get(group, ()))
+
+    def group_send(self, group, message):
+        """
+        Encode `message` and queue it on every member of `group`. May be
+        called from any thread: frames reach each member in the order they
+        were sent.
+        """
+        frame = json.dumps(message, cls=self.encoder_class)
+
+        with self._lock:
+            members = list(self._groups.get(group, {}).items())
+
+        for queue, loop in members:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(queue.put_nowait, frame)
+
+
+_layer = None
+
+
+def get_channel_layer():
+    global _layer
+
+    if _layer is None:
+        _layer = import_string(getattr(
+            settings, 'CHANNEL_LAYER', 'werewolf.channels.InMemoryChannelLayer'
+        ))()
+
+    return _layer
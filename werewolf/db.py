@@ -0,0 +1,88 @@
+"""
+Read replica routing.
+
+Safe (read-only) requests handled by views that opt in with
+`use_read_replica = True` read from one of the `DATABASE_REPLICAS`. All
+writes, and every read outside of those requests, go to the primary
+`default` database.
+
+To give clients read-your-writes consistency, any unsafe request pins the
+client to the primary for `REPLICA_PIN_SECONDS` through a cookie, so
+replication lag never hides a change the client just made.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+PIN_COOKIE = 'db_pin'
+
+_state = threading.local()
+
+
+def use_replica():
+    return getattr(_state, 'use_replica', False)
+
+
+class ReplicaRouter(object):
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if use_replica() and replicas:
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Instances read from a replica must still be saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = [DEFAULT_DB_ALIAS] + list(
+            getattr(settings, 'DATABASE_REPLICAS', [])
+        )
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary through replication
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware(object):
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+
+        _state.use_replica = all((
+            request.method in SAFE_METHODS,
+            getattr(view_class, 'use_read_replica', False),
+            not self.is_pinned(request),
+        ))
+
+    def process_response(self, request, response):
+        _state.use_replica = False
+
+        if request.method not in SAFE_METHODS:
+            pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+            response.set_cookie(
+                PIN_COOKIE,
+                str(time.time() + pin_seconds),
+                max_age=pin_seconds,
+                httponly=True
+            )
+
+        return response
+
+    def process_exception(self, request, exception):
+        _state.use_replica = False
+
+    def is_pinned(self, request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,169 @@
+"""
+Database connection pooling.
+
+Django opens a connection per thread and, with `CONN_MAX_AGE = 0`, closes it
+at the end of every request. The pooled backends in `werewolf.backends`
+hand closed connections back to a per-alias `ConnectionPool` instead, so
+the next request on any thread checks out an already open connection.
+
+Pools are configured through a `POOL` entry on the database settings:
+
+    DATABASES['default']['POOL'] = {
+        'MAX_SIZE': 10,                # idle connections kept open
+        'MAX_LIFETIME': 600,           # seconds before a connection retires
+        'HEALTH_CHECK_INTERVAL': 30,   # idle seconds before re-checking
+    }
+"""
+import threading
+import time
+
+from collections import deque
+
+
+class ConnectionPool(object):
+    def __init__(self, max_size=10, max_lifetime=600,
+                 health_check_interval=30, clock=time.monotonic):
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.clock = clock
+
+        self._idle = deque()
+        self._created = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._idle)
+
+    def acquire(self, connect):
+        """
+        Check out an idle connection, or open a new one with `connect`.
+        Connections past their lifetime or failing their health check are
+        closed instead of being handed out.
+        """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, last_used = self._idle.pop()
+
+            now = self.clock()
+            if self.is_expired(conn, now):
+                self.discard(conn)
+                continue
+
+            if now - last_used >= self.health_check_interval:
+                if not self.is_healthy(conn):
+                    self.discard(conn)
+                    continue
+
+            return conn
+
+        conn = connect()
+        self._created[id(conn)] = self.clock()
+        return conn
+
+    def release(self, conn, discard=False):
+        if discard or self.is_expired(conn, self.clock()):
+            self.discard(conn)
+            return
+
+        try:
+            # Never hand out a connection with a transaction left open
+            conn.rollback()
+        except Exception:
+            self.discard(conn)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((conn, self.clock()))
+                return
+
+        self.discard(conn)
+
+    def discard(self, conn):
+        self._created.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+
+        for conn, last_used in idle:
+            self.discard(conn)
+
+    def is_expired(self, conn, now):
+        created = self._created.get(id(conn), now)
+        return now - created >= self.max_lifetime
+
+    def is_healthy(self, conn):
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+        except Exception:
+            return False
+        return True
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                max_lifetime=options.get('MAX_LIFETIME', 600),
+                health_check_interval=options.get(
+                    'HEALTH_CHECK_INTERVAL', 30
+                )
+            )
+        return _pools[alias]
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.close()
+
+
+class PooledDatabaseWrapperMixin(object):
+    """
+    Mixin for a backend's `DatabaseWrapper` that checks connections out of
+    and back into a `ConnectionPool`. Without a `POOL` entry in the database
+    settings it behaves exactly like the backend it is mixed into.
+    """
+
+    def get_pool(self):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        return get_pool(self.alias, options)
+
+    def get_new_connection(self, conn_params):
+        connect = super(PooledDatabaseWrapperMixin, self).get_new_connection
+        pool = self.get_pool()
+
+        if pool is None:
+            return connect(conn_params)
+        return pool.acquire(lambda: connect(conn_params))
+
+    def _close(self):
+        pool = self.get_pool()
+
+        if pool is None or self.connection is None:
+            return super(PooledDatabaseWrapperMixin, self)._close()
+
+        with self.wrap_database_errors:
+            pool.release(self.connection, discard=self.errors_occurred)
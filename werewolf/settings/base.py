@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/1.9/ref/settings/
 
 import os
 import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -52,6 +53,7 @@ MIDDLEWARE_CLASSES = [
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'werewolf.db.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'werewolf.urls'
@@ -86,10 +88,90 @@ DATABASES = {
     }
 }
 
+# Aliases of the `DATABASES` used as read replicas for safe requests. Clients
+# are pinned to the primary for `REPLICA_PIN_SECONDS` after writing.
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 5
+
+# Aliases of the `DATABASES` that game data is sharded across. Games (and
+# everything that belongs to them) are placed on a shard by their id.
+DATABASE_SHARDS = []
+
+DATABASE_ROUTERS = ['api.sharding.ShardRouter', 'werewolf.db.ReplicaRouter']
+
+# ASGI deployments (`werewolf.asgi`) run Django on a pool of this many
+# threads, and serve the coroutine views listed in `ASYNC_ROUTES` directly
+ASGI_THREADS = 10
+ASYNC_ROUTES = 'api.async_views.routes'
+
+# WebSocket consumers, and the channel layer that fans messages out to every
+# connection of a game. The in-memory layer only reaches connections served
+# by the same process.
+WEBSOCKET_ROUTES = 'api.consumers.routes'
+# Hosts (in the format of `ALLOWED_HOSTS`) of the pages that may open
+# WebSocket connections. Defaults to `ALLOWED_HOSTS` when empty.
+WEBSOCKET_ALLOWED_ORIGINS = []
+CHANNEL_LAYER = 'werewolf.channels.InMemoryChannelLayer'
+
+# Number of seconds rendered game documents are cached for, so that clients
+# can be sent only the changes since the version they have
+GAME_SNAPSHOT_TIMEOUT = 300
+
+# Players are online for this many seconds after their last heartbeat.
+# Heartbeats are written to `PRESENCE_CACHE` at most once per interval.
+PRESENCE_TTL = 60
+PRESENCE_WRITE_INTERVAL = 15
+PRESENCE_CACHE = 'presence'
+
+# Presence has to be shared by the processes serving the API and the phase
+# scheduler, so it gets a cache they can all reach. Files stand in for a
+# shared cache server (e.g. memcached) on a single machine.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'presence': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'werewolf-presence'),
+    },
+}
+
 if 'test' in sys.argv:
     DATABASES['default'] = {
         'ENGINE': 'django.db.backends.sqlite3',
     }
+    # Separate databases that tests can route reads and games to. They are
+    # only used as a replica or shard when listed in `DATABASE_REPLICAS` or
+    # `DATABASE_SHARDS`.
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+    }
+    DATABASES['shard_1'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+    }
+    # Heartbeats must not outlive the test run
+    CACHES['presence'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'presence',
+    }
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Compact MessagePack responses (`Accept: application/msgpack`) are only
+# available when the optional `msgpack` package is installed
+try:
+    import msgpack  # NOQA
+except ImportError:
+    pass
+else:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append(
+        'api.renderers.MessagePackRenderer'
+    )
 
 # Password validation
 # https://docs.djangoproject.com/en/1.9/ref/settings/#auth-password-validators
@@ -13,3 +13,22 @@ from .base import *  # NOQA
 
 DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
 DATABASES['default']['NAME'] = 'werewolf.db'
+
+# Uncomment to try out read replica routing locally with a second SQLite
+# database. SQLite doesn't replicate, so copy `werewolf.db` over to
+# `werewolf-replica.db` whenever you want the replica to catch up.
+#
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': 'werewolf-replica.db',
+# }
+# DATABASE_REPLICAS = ['replica']
+
+# Uncomment to shard game data across two SQLite databases. Run `migrate`
+# with `--database` for every shard so each one gets the full schema.
+#
+# DATABASES['shard_1'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': 'werewolf-shard-1.db',
+# }
+# DATABASE_SHARDS = ['default', 'shard_1']
@@ -0,0 +1,40 @@
+# Production settings
+#
+# Use these by setting the `DJANGO_SETTINGS_MODULE` environment variable:
+#
+#    export DJANGO_SETTINGS_MODULE='werewolf.settings.production'
+
+import os
+
+from .base import *  # NOQA
+
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('WEREWOLF_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = os.environ.get('WEREWOLF_ALLOWED_HOSTS', '*').split(',')
+
+WEBSOCKET_ALLOWED_ORIGINS = [
+    host for host in
+    os.environ.get('WEREWOLF_WEBSOCKET_ORIGINS', '').split(',') if host
+]
+
+# Connections are kept open by the pool rather than by each thread: Django
+# "closes" its connection at the end of every request (`CONN_MAX_AGE = 0`),
+# which checks it back into the pool, and the next request on any thread
+# checks out an open connection. Connections idle for longer than
+# `HEALTH_CHECK_INTERVAL` are pinged before being reused and every
+# connection is retired after `MAX_LIFETIME` seconds, well within MySQL's
+# default `wait_timeout`.
+DATABASES['default'].update({
+    'ENGINE': 'werewolf.backends.mysql',
+    'HOST': os.environ.get('WEREWOLF_DB_HOST', ''),
+    'PASSWORD': os.environ.get('WEREWOLF_DB_PASSWORD', ''),
+    'CONN_MAX_AGE': 0,
+    'POOL': {
+        'MAX_SIZE': 20,
+        'MAX_LIFETIME': 600,
+        'HEALTH_CHECK_INTERVAL': 30,
+    },
+})